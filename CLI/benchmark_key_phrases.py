@@ -0,0 +1,108 @@
+"""
+Compare key phrase extraction backends on a transcript.
+
+Each backend runs in its own process so model load time and peak memory are
+measured in isolation. The report shows load time, per-call latency, peak RSS
+and how much the key phrases overlap with the original BERT output.
+
+Usage:
+    python benchmark_key_phrases.py transcript.txt [--runs 5] [--backends bert minilm]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def run_worker_process(script, args):
+    """Run a benchmark script's --worker mode in a new process and return its JSON result."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(script), *args],
+        cwd=os.path.dirname(os.path.abspath(script)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    # Model loading and the analyzers print progress; the measurement is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def p95(latencies):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+
+def run_worker(backend, transcript_path, runs):
+    """Measure one backend inside this process and print the result as JSON."""
+    os.environ["KEY_PHRASE_BACKEND"] = backend
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    from speech_analyzer.emphasis_analyzer import identify_key_phrases
+    from speech_analyzer.key_phrases import get_key_phrase_backend
+
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    get_key_phrase_backend().extract("warm up")
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    phrases = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        phrases = identify_key_phrases(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "latencies_ms": latencies,
+        "peak_rss_mb": peak_rss_mb(),
+        "model_rss_mb": peak_rss_mb() - baseline_rss,
+        "phrases": sorted(phrases)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", help="Path to a plain-text transcript")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=["bert", "minilm"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.transcript, args.runs)
+        return
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = run_worker_process(__file__, [args.transcript, "--runs", str(args.runs), "--worker", backend])
+
+    reference = set(results[args.backends[0]]["phrases"])
+    print(f"\n{'backend':<10}{'load s':>10}{'mean ms':>12}{'p95 ms':>12}{'peak RSS MB':>14}{'model MB':>12}{'overlap':>10}")
+    for backend, result in results.items():
+        latencies = result["latencies_ms"]
+        phrases = set(result["phrases"])
+        union = reference | phrases
+        overlap = len(reference & phrases) / len(union) if union else 1.0
+        print(f"{backend:<10}{result['load_seconds']:>10.2f}{statistics.mean(latencies):>12.1f}{p95(latencies):>12.1f}"
+              f"{result['peak_rss_mb']:>14.0f}{result['model_rss_mb']:>12.0f}{overlap:>10.2f}")
+    print(f"\nOverlap is the Jaccard similarity of the key phrases with the '{args.backends[0]}' output.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import os
 import warnings
 import urllib.request
 from sklearn.preprocessing import StandardScaler
+from .audio_frontend import as_audio_frontend
 
 # Define model URL and local path
 MODEL_URL = "https://github.com/jim-schwoebel/voicebook/raw/master/chapter_3_featurization/models/gender_models/gender_model.pickle"
@@ -27,8 +28,9 @@ def download_gender_model():
             return False
     return True
 
-def extract_gender_features(audio, sample_rate):
-    """Extract comprehensive features for gender detection"""
+def extract_gender_features(frontend):
+    """Extract comprehensive features for gender detection from the shared audio front end"""
+    audio, sample_rate = frontend.audio, frontend.sample_rate
     features = []
 
     # Time domain features
@@ -36,11 +38,11 @@ def extract_gender_features(audio, sample_rate):
     features.append(np.std(audio))  # Standard deviation
 
     # Spectral features
-    spec_centroid = librosa.feature.spectral_centroid(y=audio, sr=sample_rate)[0]
+    spec_centroid = frontend.spectral_centroid()[0]
     features.append(np.mean(spec_centroid))  # Spectral centroid mean
 
     # MFCC features - strong indicators for gender
-    mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=13)
+    mfccs = frontend.mfcc(13)
     for i in range(13):
         features.append(np.mean(mfccs[i]))
         features.append(np.std(mfccs[i]))
@@ -50,17 +52,17 @@ def extract_gender_features(audio, sample_rate):
     pitches_mean = np.mean(pitches[pitches > 0]) if np.any(pitches > 0) else 0
     features.append(pitches_mean)  # Mean F0
 
-    # Voice formant features (approximated)
-    formant_data = np.abs(librosa.stft(audio))
-    formant1 = np.mean(formant_data[5:20, :])  # First formant approximation
-    formant2 = np.mean(formant_data[20:35, :])  # Second formant approximation
+    # Voice formant features (approximated), over the bands of bins 5-20 and
+    # 20-35 of a 2048-point FFT at 16 kHz
+    formant1 = np.mean(frontend.band_magnitude(40, 160))  # First formant approximation
+    formant2 = np.mean(frontend.band_magnitude(160, 280))  # Second formant approximation
     features.append(formant1)
     features.append(formant2)
     features.append(formant2/formant1 if formant1 > 0 else 0)  # Formant ratio
 
     return np.array(features)
 
-def detect_gender_with_model(audio, sample_rate):
+def detect_gender_with_model(frontend):
     """Detect gender using pre-trained model"""
     if not download_gender_model():
         return "male"  # Default to male if model download fails
@@ -69,7 +71,7 @@ def detect_gender_with_model(audio, sample_rate):
         with open(MODEL_PATH, 'rb') as f:
             model = pickle.load(f)
 
-        features = extract_gender_features(audio, sample_rate)
+        features = extract_gender_features(frontend)
         scaler = StandardScaler()
         features = scaler.fit_transform(features.reshape(1, -1))
 
@@ -134,14 +136,16 @@ def detect_gender_heuristic(audio, sample_rate):
 
 def analyze_pitch_and_volume(audio_path, gender='auto', detailed=True):
     try:
-        audio, sample_rate = librosa.load(audio_path, sr=None)
+        # Decoded audio (and spectrogram) shared with the transcription
+        frontend = as_audio_frontend(audio_path)
+        audio, sample_rate = frontend.audio, frontend.sample_rate
         duration = len(audio) / sample_rate  # Total duration in seconds
 
         # Gender detection
         if gender == 'auto':
             try:
                 # Try model-based detection first
-                gender = detect_gender_with_model(audio, sample_rate)
+                gender = detect_gender_with_model(frontend)
                 print(f"Model-based gender detection: {gender}")
             except Exception as e:
                 # Fall back to heuristic if model fails
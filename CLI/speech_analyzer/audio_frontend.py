@@ -0,0 +1,110 @@
+from functools import cached_property, lru_cache
+from typing import Union
+
+import librosa
+import numpy as np
+from scipy.fft import dct
+
+# Whisper's front end: 16 kHz audio, 25 ms Hann windows every 10 ms, 80 mel bins
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_MELS = 80
+
+
+@lru_cache(maxsize=4)
+def mel_filters(n_mels: int = N_MELS) -> np.ndarray:
+    """Slaney mel filterbank, the one Whisper ships for its log-mel input."""
+    return librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=n_mels)
+
+
+class AudioFrontend:
+    """
+    Decoded audio of one upload with its spectrogram, computed once.
+
+    The waveform is loaded at Whisper's canonical rate and handed to the
+    transcription, so the file is decoded a single time. The STFT and the
+    log-mel spectrogram use Whisper's window, hop and filterbank and are
+    computed lazily on first use; MFCCs and the other spectral features are
+    derived from them with a DCT and per-frame reductions instead of each
+    analyzer running its own transform.
+    """
+
+    def __init__(self, audio: np.ndarray, path: str = None):
+        """
+        Args:
+            audio: Mono float32 waveform at SAMPLE_RATE
+            path: File the audio was loaded from, if any
+        """
+        self.audio = np.ascontiguousarray(audio, dtype=np.float32)
+        self.path = path
+        self.sample_rate = SAMPLE_RATE
+
+    @classmethod
+    def load(cls, path: str) -> 'AudioFrontend':
+        audio, _ = librosa.load(path, sr=SAMPLE_RATE, mono=True)
+        return cls(audio, path)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        """(1 + N_FFT // 2, n_frames) STFT magnitude."""
+        return np.abs(librosa.stft(self.audio, n_fft=N_FFT, hop_length=HOP_LENGTH,
+                                   window='hann', center=True, pad_mode='reflect'))
+
+    @cached_property
+    def frequencies(self) -> np.ndarray:
+        return librosa.fft_frequencies(sr=SAMPLE_RATE, n_fft=N_FFT)
+
+    @cached_property
+    def mel_power(self) -> np.ndarray:
+        """(N_MELS, n_frames) mel power spectrogram."""
+        return mel_filters() @ (self.magnitude ** 2)
+
+    @cached_property
+    def log_mel(self) -> np.ndarray:
+        """Mel spectrogram in dB (top 80 dB), as librosa's mfcc and onset functions use it."""
+        return librosa.power_to_db(self.mel_power)
+
+    def mfcc(self, n_mfcc: int = 13) -> np.ndarray:
+        """(n_mfcc, n_frames) MFCCs: orthonormal DCT-II of the log-mel frames."""
+        return dct(self.log_mel, axis=0, type=2, norm='ortho')[:n_mfcc]
+
+    def spectral_centroid(self) -> np.ndarray:
+        """(1, n_frames) magnitude-weighted mean frequency."""
+        weights = self.magnitude / np.maximum(self.magnitude.sum(axis=0, keepdims=True), 1e-10)
+        return (self.frequencies[:, None] * weights).sum(axis=0, keepdims=True)
+
+    def spectral_bandwidth(self, centroid: np.ndarray = None) -> np.ndarray:
+        """(1, n_frames) magnitude-weighted spread around the centroid."""
+        if centroid is None:
+            centroid = self.spectral_centroid()
+        weights = self.magnitude / np.maximum(self.magnitude.sum(axis=0, keepdims=True), 1e-10)
+        return np.sqrt((weights * (self.frequencies[:, None] - centroid) ** 2).sum(axis=0, keepdims=True))
+
+    def spectral_contrast(self) -> np.ndarray:
+        """(7, n_frames) octave-band peak/valley contrast of the shared STFT."""
+        return librosa.feature.spectral_contrast(S=self.magnitude, sr=SAMPLE_RATE,
+                                                 n_fft=N_FFT, hop_length=HOP_LENGTH)
+
+    def onset_strength(self) -> np.ndarray:
+        """Spectral flux of the log-mel frames."""
+        return librosa.onset.onset_strength(S=self.log_mel, sr=SAMPLE_RATE, hop_length=HOP_LENGTH)
+
+    def zero_crossing_rate(self) -> np.ndarray:
+        """(1, n_frames) zero crossing rate over the STFT frames."""
+        return librosa.feature.zero_crossing_rate(self.audio, frame_length=N_FFT, hop_length=HOP_LENGTH)
+
+    def band_magnitude(self, low_hz: float, high_hz: float) -> np.ndarray:
+        """STFT magnitude rows between two frequencies."""
+        return self.magnitude[(self.frequencies >= low_hz) & (self.frequencies < high_hz)]
+
+
+def as_audio_frontend(source: Union[AudioFrontend, str]) -> AudioFrontend:
+    """Accept a front end or a path to load one from."""
+    if isinstance(source, AudioFrontend):
+        return source
+    return AudioFrontend.load(source)
@@ -2,18 +2,15 @@ import re
 import spacy
 from collections import Counter
 from nltk.tokenize import word_tokenize
+from .filler_detector import filler_detector
 
 # Load language model
 nlp = spacy.load('en_core_web_sm')
 
 def filler_word_detection(transcription):
-    if isinstance(transcription, dict):
-        transcription = transcription.get('text', '')
-    filler_count = 0
-    filler_words = ["um", "uh", "ah", "ugh", "er", "hmm", "like", "you know", "so", "actually", "basically"]
-    for word in filler_words:
-        filler_count += len(re.findall(r'\b' + re.escape(word) + r'\b', transcription.lower()))
-    return filler_count
+    # Same detector and filler list as the server; accepts the word timeline, a
+    # Whisper result (timestamps are used when present) or plain text
+    return len(filler_detector.detect(transcription))
 
 def analyze_grammar_and_word_selection(text):
     if isinstance(text, dict):
@@ -3,7 +3,11 @@ import torch
 import spacy
 import re
 
-from .transcription import transcribe_audio, process_transcription
+from .transcription import transcribe_audio
+from .audio_frontend import AudioFrontend
+from .word_timeline import WordTimeline
+from .pause_events import detect_pauses
+from .sentence_model import get_sentence_model
 from .time_analysis import neutralize_time_durations, get_audio_duration
 from .structure_analyzer import analyze_speech_effectiveness, analyze_speech_structure
 from .content_analyzer import filler_word_detection, analyze_grammar_and_word_selection
@@ -24,21 +28,40 @@ class SpeechAnalyzer:
         self.topic = topic
         self.transcription_with_pauses = []
         self.number_of_pauses = 0
+        self.word_timeline = None
+        self.pause_events = None
+        self.sentence_model = None
+        self.audio_frontend = None
         self.device = 0 if torch.cuda.is_available() else -1
         self.evaluator = SpeechEvaluator()
         print("SpeechAnalyzer initialized.")
 
     def transcribe_audio(self):
-        return transcribe_audio(self.model, self.audio_path)
+        # Decode once at 16 kHz; Whisper and the spectral analyses share the front end
+        if self.audio_frontend is None:
+            self.audio_frontend = AudioFrontend.load(self.audio_path)
+        return transcribe_audio(self.model, self.audio_frontend)
+
+    def _audio(self, audio_data=None):
+        """The shared front end for the speech's own audio, otherwise the given audio."""
+        if self.audio_frontend is not None and audio_data in (None, self.audio_path):
+            return self.audio_frontend
+        return audio_data if audio_data is not None else self.audio_path
 
     def process_transcription(self, result):
-        self.transcription_with_pauses, self.number_of_pauses = process_transcription(result)
+        # Flatten the word timestamps once; the word-level analyses share the timeline
+        # and the pause events, and the marker transcript is only for display
+        self.word_timeline = WordTimeline.from_result(result)
+        self.pause_events = detect_pauses(self.word_timeline)
+        self.sentence_model = get_sentence_model(self.word_timeline)
+        self.transcription_with_pauses = self.pause_events.transcript()
+        self.number_of_pauses = len(self.pause_events)
 
     def get_audio_duration(self):
         return get_audio_duration(self.audio_path)
 
     def neutralize_time_durations(self, transcription_result):
-        return neutralize_time_durations(self.audio_path, self.transcription_with_pauses, transcription_result, self.get_audio_duration())
+        return neutralize_time_durations(self.audio_path, self.pause_events, transcription_result, self.get_audio_duration())
 
     def filler_word_detection(self, transcription):
         return filler_word_detection(transcription)
@@ -53,20 +76,20 @@ class SpeechAnalyzer:
         return analyze_grammar_and_word_selection(text)
 
     def analyze_pronunciation_quality(self, audio_data=None, transcription=None):
-        audio_path = audio_data if audio_data is not None else self.audio_path
+        audio = self._audio(audio_data)
         text = transcription if transcription is not None else self.transcription_with_pauses
-        return analyze_pronunciation_quality(audio_path, text, self.model)
+        word_timeline = self.word_timeline if audio is self.audio_frontend else None
+        return analyze_pronunciation_quality(audio, text, self.model, word_timeline)
 
     def analyze_pitch_and_volume(self, audio_data=None, gender='auto'):
-        audio_path = audio_data if audio_data is not None else self.audio_path
-        return analyze_pitch_and_volume(audio_path, gender=gender)
+        return analyze_pitch_and_volume(self._audio(audio_data), gender=gender)
 
     def analyze_emphasis(self, audio_data=None, transcription_result=None, transcript_text=None):
         """Analyze emphasis in speech"""
         audio_path = audio_data if audio_data is not None else self.audio_path
         result = transcription_result if transcription_result is not None else self.transcribe_audio()
         text = transcript_text if transcript_text is not None else self.transcription_with_pauses
-        return analyze_emphasis(audio_path, result, text)
+        return analyze_emphasis(audio_path, result, text, self.pause_events if transcription_result is not None else None)
 
     def analyze_topic_relevance(self, transcription_text=None, topic=None):
         """Analyze how relevant the speech is to a given topic"""
@@ -84,17 +107,19 @@ class SpeechAnalyzer:
         print("\nTranscription with pauses:\n")
         print(self.transcription_with_pauses)
         print("\nNumber of pauses detected:", self.number_of_pauses)
-        filler_count = self.filler_word_detection(transcription_result)
+        word_timeline = self.word_timeline if self.word_timeline is not None else WordTimeline.from_result(transcription_result)
+        filler_count = self.filler_word_detection(word_timeline)
         print("\nNumber of filler words detected:", filler_count)
 
         # Run all analyses
         time_results = self.neutralize_time_durations(transcription_result)
-        effectiveness_results = self.analyze_speech_effectiveness(transcription_result)
-        structure_results = self.analyze_speech_structure(transcription_result)
+        sentences = self.sentence_model if self.sentence_model is not None else get_sentence_model(word_timeline)
+        effectiveness_results = self.analyze_speech_effectiveness(sentences)
+        structure_results = self.analyze_speech_structure(sentences)
         grammar_results = self.analyze_grammar_and_word_selection(transcription_result)
         pronunciation_results = self.analyze_pronunciation_quality(self.audio_path, transcription_result)
         pitch_volume_results = self.analyze_pitch_and_volume(self.audio_path)
-        emphasis_results = self.analyze_emphasis(self.audio_path, transcription_result, self.transcription_with_pauses)
+        emphasis_results = self.analyze_emphasis(self.audio_path, word_timeline, self.transcription_with_pauses)
 
         # Run topic relevance analysis if a topic is provided
         topic_relevance_results = None
@@ -0,0 +1,263 @@
+"""
+Sentence embedding backends.
+
+Two interchangeable backends expose the same interface (``encode``,
+``token_embeddings``, ``tokenizer``, ``max_seq_length``):
+
+- ``torch``: the sentence-transformers model in PyTorch fp32
+- ``onnx``:  an int8-quantized ONNX export of the same model on ONNX Runtime
+
+The backend is selected with EMBEDDING_BACKEND (auto, onnx or torch). "auto" and
+"onnx" use the ONNX export when one exists and passed its compatibility check,
+and otherwise fall back to PyTorch. Create the export with:
+
+    python -m models.embedding_backend export        (Server)
+    python -m speech_analyzer.embedding_backend export  (CLI)
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+# Intra-op threads for ONNX Runtime (0 lets ONNX Runtime decide)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Minimum cosine similarity between ONNX and PyTorch embeddings for the export to be used
+EMBEDDING_TOLERANCE = float(os.getenv("EMBEDDING_TOLERANCE", "0.99"))
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "onnx_models"
+))
+
+# Sentences used to validate an export against the PyTorch model
+PROBE_TEXTS = [
+    "Today I want to talk about the power of habit.",
+    "When I was young, my grandmother told me a story about courage.",
+    "In conclusion, practice is what turns knowledge into skill.",
+    "Technology tools help leaders communicate with their teams.",
+    "um so basically I think that uh we should start",
+]
+
+
+def _mean_pool(hidden, attention_mask, normalize):
+    mask = attention_mask[..., None].astype(hidden.dtype)
+    pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+    if normalize:
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+    return pooled
+
+
+class TorchEmbeddingBackend:
+    """sentence-transformers model on PyTorch."""
+
+    name = 'torch'
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.tokenizer = self.model.tokenizer
+        self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        return self.model.encode(texts, batch_size=batch_size, **kwargs)
+
+    def token_embeddings(self, input_ids, attention_mask):
+        """Last hidden states for a padded batch of token ids, as a NumPy array."""
+        import torch
+        with torch.inference_mode():
+            hidden = self.model[0].auto_model(
+                input_ids=torch.from_numpy(input_ids),
+                attention_mask=torch.from_numpy(attention_mask)
+            ).last_hidden_state
+        return hidden.numpy()
+
+
+class OnnxEmbeddingBackend:
+    """Int8-quantized ONNX export of a sentence-transformers model on ONNX Runtime."""
+
+    name = 'onnx'
+
+    def __init__(self, model_dir, threads=EMBEDDING_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, 'export.json'), 'r') as f:
+            self.metadata = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.metadata['model_file']),
+            options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model_name = self.metadata['model_name']
+        self.max_seq_length = self.metadata['max_seq_length']
+        self.normalize = self.metadata['normalize']
+
+    def token_embeddings(self, input_ids, attention_mask):
+        """Last hidden states for a padded batch of token ids."""
+        feeds = {
+            'input_ids': input_ids.astype(np.int64),
+            'attention_mask': attention_mask.astype(np.int64)
+        }
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.zeros_like(feeds['input_ids'])
+        return self.session.run(['last_hidden_state'], feeds)[0]
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        # Batch texts of similar length together to minimise padding
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        embeddings = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            batch_indices = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_indices],
+                padding=True, truncation=True, max_length=self.max_seq_length, return_tensors='np'
+            )
+            hidden = self.token_embeddings(encoded['input_ids'], encoded['attention_mask'])
+            pooled = _mean_pool(hidden, encoded['attention_mask'], self.normalize)
+            for i, embedding in zip(batch_indices, pooled):
+                embeddings[i] = embedding
+
+        embeddings = np.vstack(embeddings).astype(np.float32) if embeddings else np.zeros((0, 0), np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def _onnx_model_dir(model_name):
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace('/', '__'))
+
+
+def _load_onnx_backend(model_name):
+    model_dir = _onnx_model_dir(model_name)
+    metadata_path = os.path.join(model_dir, 'export.json')
+    if not os.path.exists(metadata_path):
+        raise FileNotFoundError(f"No ONNX export at {model_dir}")
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    if metadata.get('model_name') != model_name:
+        raise ValueError(f"ONNX export is for {metadata.get('model_name')}, not {model_name}")
+    if metadata.get('min_cosine', 0) < EMBEDDING_TOLERANCE:
+        raise ValueError(
+            f"ONNX export differs from PyTorch (min cosine {metadata.get('min_cosine')} < {EMBEDDING_TOLERANCE})"
+        )
+    return OnnxEmbeddingBackend(model_dir)
+
+
+_backends = {}
+
+
+def get_embedding_backend(model_name=DEFAULT_MODEL_NAME, backend=None):
+    """
+    Return the embedding backend for a model, created once per process.
+
+    Args:
+        model_name: sentence-transformers model name
+        backend: 'auto', 'onnx' or 'torch' (defaults to EMBEDDING_BACKEND)
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    key = (model_name, backend)
+    if key not in _backends:
+        instance = None
+        if backend in ('auto', 'onnx'):
+            try:
+                instance = _load_onnx_backend(model_name)
+                print(f"Using ONNX Runtime embedding backend for {model_name}")
+            except Exception as e:
+                if backend == 'onnx':
+                    print(f"ONNX embedding backend unavailable, falling back to PyTorch: {e}")
+        if instance is None:
+            instance = TorchEmbeddingBackend(model_name)
+        _backends[key] = instance
+    return _backends[key]
+
+
+def export_onnx(model_name=DEFAULT_MODEL_NAME, output_dir=None, opset=14):
+    """
+    Export a sentence-transformers model to ONNX, quantize it to int8 and
+    record how closely it matches the PyTorch embeddings.
+
+    Returns:
+        Dict: Export metadata (also written to export.json)
+    """
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = output_dir or _onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    reference = SentenceTransformer(model_name)
+    pooling_modes = [m.get_pooling_mode_str() for m in reference if hasattr(m, 'get_pooling_mode_str')]
+    if pooling_modes != ['mean']:
+        raise ValueError(f"Only mean pooling is supported, model uses {pooling_modes}")
+    normalize = any(type(m).__name__ == 'Normalize' for m in reference)
+
+    transformer = reference[0].auto_model.eval()
+    dummy = reference.tokenizer(["export sample"], return_tensors='pt')
+    input_names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in dummy]
+    dynamic_axes = {n: {0: 'batch', 1: 'sequence'} for n in input_names + ['last_hidden_state']}
+
+    fp32_path = os.path.join(output_dir, 'model.onnx')
+    int8_path = os.path.join(output_dir, 'model_int8.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    reference.tokenizer.save_pretrained(output_dir)
+
+    metadata = {
+        'model_name': model_name,
+        'model_file': 'model_int8.onnx',
+        'max_seq_length': reference.max_seq_length,
+        'normalize': normalize,
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'min_cosine': 0.0
+    }
+    with open(os.path.join(output_dir, 'export.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    # Compare against the PyTorch embeddings before the export is trusted
+    expected = reference.encode(PROBE_TEXTS, normalize_embeddings=True)
+    actual = OnnxEmbeddingBackend(output_dir).encode(PROBE_TEXTS)
+    actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+    metadata['min_cosine'] = round(float(np.min(np.sum(expected * actual, axis=1))), 5)
+    with open(os.path.join(output_dir, 'export.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"Exported {model_name} to {int8_path} (min cosine vs PyTorch: {metadata['min_cosine']})")
+    if metadata['min_cosine'] < EMBEDDING_TOLERANCE:
+        print(f"Warning: below tolerance {EMBEDDING_TOLERANCE}; the PyTorch backend will be used instead")
+    return metadata
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentence embedding backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="Export an int8-quantized ONNX model")
+    export_parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    export_parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_onnx(args.model, args.output)
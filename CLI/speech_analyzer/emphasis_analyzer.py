@@ -1,12 +1,12 @@
 import numpy as np
 import librosa
-import re
 from sklearn.preprocessing import StandardScaler
 import spacy
-import torch
-from transformers import BertTokenizer, BertModel
 import os
 import warnings
+from .key_phrases import get_key_phrase_backend
+from .word_timeline import as_word_timeline
+from .pause_events import as_pause_events
 
 # Suppress unnecessary warnings
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -14,28 +14,13 @@ warnings.filterwarnings("ignore", category=UserWarning)
 # Load NLP models
 nlp = spacy.load("en_core_web_sm")
 
-# Load BERT model for key phrase identification
-BERT_MODEL_NAME = "bert-base-uncased"
-tokenizer = None
-model = None
-
-def load_bert_model():
-    """Lazily load BERT model when needed"""
-    global tokenizer, model
-    if tokenizer is None:
-        try:
-            tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
-            model = BertModel.from_pretrained(BERT_MODEL_NAME)
-            return True
-        except Exception as e:
-            print(f"Error loading BERT model: {e}")
-            return False
-    return True
-
-def detect_emphasized_segments(audio, sample_rate, transcript_with_timestamps=None):
+def detect_emphasized_segments(audio, sample_rate, pauses=None):
     """
     Detect emphasized segments in audio based on audio features
 
+    Args:
+        pauses: Optional PauseEvents of the transcription
+
     Returns: List of time segments with emphasis markers
     """
     # Extract audio features for emphasis detection
@@ -67,21 +52,12 @@ def detect_emphasized_segments(audio, sample_rate, transcript_with_timestamps=No
     contrast_mean = np.mean(contrast, axis=0)
     contrast_scaled = StandardScaler().fit_transform(contrast_mean.reshape(-1, 1)).flatten()
 
-    # 4. Detect pauses from transcript if available
+    # 4. Mark the frames where pauses begin, if available
     pause_indicators = np.zeros_like(rms)
-    if transcript_with_timestamps:
-        # Extract pause information from transcript
-        pause_pattern = r'\[(\d+\.\d+) second pause\]'
-        pause_matches = re.finditer(pause_pattern, transcript_with_timestamps)
-
-        for match in pause_matches:
-            pause_duration = float(match.group(1))
-            start_idx = transcript_with_timestamps.find(match.group(0))
-
-            # Find nearby frames - simplified approximation
-            frame_index = int(start_idx / len(transcript_with_timestamps) * len(pause_indicators))
-            if 0 <= frame_index < len(pause_indicators):
-                pause_indicators[frame_index] = 1.0
+    if pauses is not None and len(pauses):
+        frames = librosa.time_to_frames(pauses.events['start'], sr=sample_rate, hop_length=hop_length)
+        frames = frames[(frames >= 0) & (frames < len(pause_indicators))]
+        pause_indicators[frames] = 1.0
 
     # Combine features into an emphasis score
     # Weight: 40% volume, 30% pitch change, 20% spectral contrast, 10% pauses
@@ -157,39 +133,15 @@ def identify_key_phrases(text):
             end = min(len(doc), token.i + 5)
             key_phrases.append(doc[start:end].text)
 
-    # 4. Use BERT for keyword extraction if available
-    if load_bert_model():
+    # 4. Embedding-based keyword extraction (MiniLM by default, BERT if configured)
+    backend = get_key_phrase_backend()
+    if backend is not None:
         try:
-            # Process text with BERT
-            inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-            with torch.no_grad():
-                outputs = model(**inputs)
-
-            # Extract token embeddings
-            token_embeddings = outputs.last_hidden_state
-
-            # Analyze token importance
-            sentence_embedding = torch.mean(token_embeddings[0], dim=0)
-            token_importance = torch.cosine_similarity(token_embeddings[0], sentence_embedding.unsqueeze(0))
-
-            # Find important tokens and their contexts
-            important_token_indices = torch.where(token_importance > 0.85)[0].tolist()
-            tokens = tokenizer.convert_ids_to_tokens(inputs.input_ids[0])
-
-            # Extract contexts around important tokens
-            for idx in important_token_indices:
-                if idx < len(tokens) - 1 and not tokens[idx].startswith('##'):
-                    # Get surrounding context
-                    start_idx = max(0, idx - 2)
-                    end_idx = min(len(tokens), idx + 3)
-
-                    # Reconstruct phrase from tokens
-                    phrase = tokenizer.convert_tokens_to_string(tokens[start_idx:end_idx])
-                    if len(phrase) > 3 and phrase not in key_phrases:
-                        key_phrases.append(phrase)
-
+            for phrase in backend.extract(text):
+                if phrase not in key_phrases:
+                    key_phrases.append(phrase)
         except Exception as e:
-            print(f"BERT keyword extraction failed: {e}")
+            print(f"{backend.name} keyword extraction failed: {e}")
 
     # Remove duplicates and normalize
     key_phrases = list(set(key_phrase.strip().lower() for key_phrase in key_phrases))
@@ -205,7 +157,7 @@ def map_emphasis_to_transcript(emphasized_segments, result, text):
 
     Args:
         emphasized_segments: List of time tuples (start, end)
-        result: Whisper transcription result with word timestamps
+        result: WordTimeline (or Whisper transcription result with word timestamps)
         text: Full transcript text
 
     Returns: Dictionary mapping emphasized words to their positions
@@ -213,33 +165,17 @@ def map_emphasis_to_transcript(emphasized_segments, result, text):
     emphasized_words = []
 
     try:
-        if not emphasized_segments or not result or 'segments' not in result:
+        if not emphasized_segments or result is None:
+            return emphasized_words
+
+        timeline = as_word_timeline(result)
+        if not timeline.has_times:
             return emphasized_words
 
-        # Extract words with timestamps from Whisper result
-        all_words = []
-        for segment in result['segments']:
-            if 'words' in segment:
-                for word_info in segment['words']:
-                    all_words.append({
-                        'word': word_info['word'],
-                        'start': word_info['start'],
-                        'end': word_info['end']
-                    })
-
-        # Find words that overlap with emphasized segments
-        for start_time, end_time in emphasized_segments:
-            segment_words = []
-            for word_info in all_words:
-                word_start = word_info['start']
-                word_end = word_info['end']
-
-                # Check for overlap
-                if (word_start <= end_time and word_end >= start_time):
-                    segment_words.append(word_info['word'])
-
-            if segment_words:
-                emphasized_phrase = ' '.join(segment_words).strip()
+        # Find words that overlap with emphasized segments (all segments at once)
+        for indices in timeline.in_ranges(emphasized_segments):
+            if indices.size:
+                emphasized_phrase = timeline.text(indices).strip()
                 if emphasized_phrase and len(emphasized_phrase) > 1:
                     emphasized_words.append(emphasized_phrase)
 
@@ -248,7 +184,7 @@ def map_emphasis_to_transcript(emphasized_segments, result, text):
 
     return emphasized_words
 
-def analyze_emphasis(audio_path, transcription_result, transcript_text):
+def analyze_emphasis(audio_path, transcription_result, transcript_text, pauses=None):
     """
     Analyze emphasis quality in speech
 
@@ -256,6 +192,7 @@ def analyze_emphasis(audio_path, transcription_result, transcript_text):
         audio_path: Path to audio file
         transcription_result: Whisper result with timestamps
         transcript_text: Text transcript with pause markers
+        pauses: PauseEvents (detected from transcription_result when None)
 
     Returns: Dictionary with emphasis analysis results
     """
@@ -264,7 +201,8 @@ def analyze_emphasis(audio_path, transcription_result, transcript_text):
         audio, sample_rate = librosa.load(audio_path, sr=None)
 
         # Detect emphasized segments in audio
-        emphasized_segments = detect_emphasized_segments(audio, sample_rate, transcript_text)
+        pauses = as_pause_events(pauses if pauses is not None else transcription_result)
+        emphasized_segments = detect_emphasized_segments(audio, sample_rate, pauses)
 
         # Map emphasized segments to words
         emphasized_words = map_emphasis_to_transcript(emphasized_segments, transcription_result, transcript_text)
@@ -0,0 +1,166 @@
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Backend used by identify_key_phrases: "minilm" (default) or "bert" (opt-in, original model)
+KEY_PHRASE_BACKEND = os.getenv("KEY_PHRASE_BACKEND", "minilm").lower()
+
+# Tokens whose embedding is this close to the context mean are treated as important
+TOKEN_IMPORTANCE_THRESHOLD = float(os.getenv("KEY_PHRASE_THRESHOLD", "0.85"))
+
+BERT_MODEL_NAME = "bert-base-uncased"
+
+
+class KeyPhraseBackend(ABC):
+    """Interface for embedding-based key phrase extraction."""
+
+    name = "base"
+
+    @abstractmethod
+    def extract(self, text):
+        """Return candidate key phrases found in text."""
+
+
+class BertKeyPhraseBackend(KeyPhraseBackend):
+    """Original bert-base-uncased extraction (single 512-token pass, fp32)."""
+
+    name = "bert"
+
+    def __init__(self, threshold=TOKEN_IMPORTANCE_THRESHOLD):
+        self.threshold = threshold
+        self.tokenizer = None
+        self.model = None
+
+    def load(self):
+        """Lazily load BERT model when needed"""
+        if self.tokenizer is None:
+            try:
+                from transformers import BertTokenizer, BertModel
+                self.tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
+                self.model = BertModel.from_pretrained(BERT_MODEL_NAME)
+                return True
+            except Exception as e:
+                print(f"Error loading BERT model: {e}")
+                return False
+        return True
+
+    def extract(self, text):
+        if not self.load():
+            return []
+
+        import torch
+
+        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+
+        # Token importance relative to the mean embedding
+        token_embeddings = outputs.last_hidden_state
+        sentence_embedding = torch.mean(token_embeddings[0], dim=0)
+        token_importance = torch.cosine_similarity(token_embeddings[0], sentence_embedding.unsqueeze(0))
+
+        important_token_indices = torch.where(token_importance > self.threshold)[0].tolist()
+        tokens = self.tokenizer.convert_ids_to_tokens(inputs.input_ids[0])
+
+        phrases = []
+        for idx in important_token_indices:
+            if idx < len(tokens) - 1 and not tokens[idx].startswith('##'):
+                start_idx = max(0, idx - 2)
+                end_idx = min(len(tokens), idx + 3)
+                phrase = self.tokenizer.convert_tokens_to_string(tokens[start_idx:end_idx])
+                if len(phrase) > 3 and phrase not in phrases:
+                    phrases.append(phrase)
+        return phrases
+
+
+class MiniLMKeyPhraseBackend(KeyPhraseBackend):
+    """
+    Key phrase extraction on the already-loaded all-MiniLM-L6-v2 sentence model.
+
+    Long transcripts are covered by overlapping token windows that are run
+    through the encoder in batches, instead of truncating at the first window.
+    Works with either embedding backend (PyTorch or the quantized ONNX export).
+    """
+
+    name = "minilm"
+
+    def __init__(self, embedding_backend, threshold=TOKEN_IMPORTANCE_THRESHOLD,
+                 overlap=32, batch_size=16):
+        """
+        Args:
+            embedding_backend: Loaded embedding backend (see embedding_backend.py)
+            threshold: Token-vs-window-mean cosine similarity for important tokens
+            overlap: Number of tokens shared by consecutive windows
+            batch_size: Number of windows per forward pass
+        """
+        self.tokenizer = embedding_backend.tokenizer
+        self.backend = embedding_backend
+        self.window = embedding_backend.max_seq_length - 2  # room for [CLS] and [SEP]
+        self.stride = max(1, self.window - overlap)
+        self.threshold = threshold
+        self.batch_size = batch_size
+
+    def _windows(self, token_ids):
+        windows = []
+        for start in range(0, max(1, len(token_ids)), self.stride):
+            windows.append(token_ids[start:start + self.window])
+            if start + self.window >= len(token_ids):
+                break
+        return windows
+
+    def extract(self, text):
+        token_ids = self.tokenizer(text, add_special_tokens=False)['input_ids']
+        if not token_ids:
+            return []
+
+        windows = self._windows(token_ids)
+        cls_id, sep_id, pad_id = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id, self.tokenizer.pad_token_id
+
+        phrases = []
+        for b in range(0, len(windows), self.batch_size):
+            batch = windows[b:b + self.batch_size]
+            width = max(len(w) for w in batch) + 2
+            input_ids = np.full((len(batch), width), pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+            for i, window in enumerate(batch):
+                input_ids[i, :len(window) + 2] = [cls_id] + window + [sep_id]
+                attention_mask[i, :len(window) + 2] = 1
+
+            hidden = self.backend.token_embeddings(input_ids, attention_mask)
+
+            # Cosine similarity of every token with its window's mean embedding, for the whole batch
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            window_mean = (hidden * mask).sum(axis=1) / mask.sum(axis=1)
+            importance = np.einsum('btd,bd->bt', hidden, window_mean) / np.maximum(
+                np.linalg.norm(hidden, axis=-1) * np.linalg.norm(window_mean, axis=-1)[:, None], 1e-8
+            )
+
+            for i, window in enumerate(batch):
+                tokens = self.tokenizer.convert_ids_to_tokens(window)
+                # Offset by one to skip [CLS]; [SEP] and padding are never considered
+                for idx in np.where(importance[i, 1:len(window) + 1] > self.threshold)[0]:
+                    if tokens[idx].startswith('##'):
+                        continue
+                    phrase = self.tokenizer.convert_tokens_to_string(tokens[max(0, idx - 2):idx + 3])
+                    if len(phrase) > 3 and phrase not in phrases:
+                        phrases.append(phrase)
+        return phrases
+
+
+_backend = None
+
+
+def get_key_phrase_backend():
+    """Return the configured key phrase backend, created once per process (None if unavailable)."""
+    global _backend
+    if _backend is None:
+        if KEY_PHRASE_BACKEND == "bert":
+            _backend = BertKeyPhraseBackend()
+        else:
+            # Reuse the sentence model loaded for topic relevance rather than loading another model
+            from . import topic_relevance
+            if not topic_relevance.TRANSFORMER_AVAILABLE:
+                return None
+            _backend = MiniLMKeyPhraseBackend(topic_relevance.model)
+    return _backend
@@ -0,0 +1,124 @@
+import re
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+from .word_timeline import WordTimeline, as_word_timeline
+
+# One row per detected pause. duration is rounded to 0.1 s, the precision
+# every pause metric (and the transcript marker) has always used.
+PAUSE_DTYPE = np.dtype([
+    ('start', np.float64),
+    ('end', np.float64),
+    ('duration', np.float64),
+    ('preceding_word', np.int32),
+    ('sentence_boundary', np.bool_)
+])
+
+# Gaps that count as pauses: between words of one segment, and between segments
+WORD_PAUSE_THRESHOLD = 1.0
+SEGMENT_PAUSE_THRESHOLD = 2.0
+
+SENTENCE_END_PATTERN = re.compile(r'[.!?]["\')\]]*$')
+
+
+def pause_marker(duration: float) -> str:
+    """Display form of a pause inside the transcript."""
+    return f"[{duration} second pause]"
+
+
+class PauseEvents:
+    """
+    Pauses of one transcription as a typed event array.
+
+    Pause metrics are computed from the events directly; the transcript with
+    '[1.3 second pause]' markers is only rendered for display.
+    """
+
+    def __init__(self, events: np.ndarray, timeline: WordTimeline):
+        """
+        Args:
+            events: Structured array of PAUSE_DTYPE ordered by position
+            timeline: Word timeline the events were detected in
+        """
+        self.events = events
+        self.timeline = timeline
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def duration(self) -> np.ndarray:
+        return self.events['duration']
+
+    @property
+    def sentence_boundary(self) -> np.ndarray:
+        return self.events['sentence_boundary']
+
+    @property
+    def total_duration(self) -> float:
+        return round(float(self.duration.sum()), 1)
+
+    def mid_sentence(self) -> np.ndarray:
+        """Durations of the pauses that do not follow the end of a sentence."""
+        return self.duration[~self.sentence_boundary]
+
+    def transcript(self) -> str:
+        """Transcript text with pause markers, for display."""
+        parts = []
+        # Pauses before the first word (preceding_word == -1) come first
+        positions = np.searchsorted(self.events['preceding_word'], np.arange(-1, len(self.timeline)), side='right')
+        markers = [pause_marker(d) for d in self.duration.tolist()]
+        parts.extend(markers[:positions[0]])
+        for i, word in enumerate(self.timeline.token.tolist()):
+            parts.append(self.timeline.strings[word])
+            parts.extend(markers[positions[i]:positions[i + 1]])
+        return re.sub(r'\s+', ' ', ' '.join(parts)).strip()
+
+
+def detect_pauses(source: Union[WordTimeline, Dict, str, None],
+                  word_threshold: float = WORD_PAUSE_THRESHOLD,
+                  segment_threshold: float = SEGMENT_PAUSE_THRESHOLD) -> PauseEvents:
+    """
+    Find pauses between words and between segments.
+
+    Args:
+        source: Word timeline (or a Whisper result to build one from)
+        word_threshold: Minimum gap between two words of a segment
+        segment_threshold: Minimum gap between two segments
+
+    Returns:
+        PauseEvents
+    """
+    timeline = as_word_timeline(source)
+
+    # Gaps inside a segment follow word i
+    word_gaps = timeline.gaps(within_segments=True)
+    word_rows = np.flatnonzero(word_gaps >= word_threshold)
+
+    # Gaps between segments follow the last word spoken up to that segment
+    segment_gaps = timeline.segment_gaps()
+    segment_rows = np.flatnonzero(segment_gaps >= segment_threshold)
+    segment_last_word = np.searchsorted(timeline.segment, segment_rows, side='right') - 1
+
+    events = np.zeros(len(word_rows) + len(segment_rows), dtype=PAUSE_DTYPE)
+    events['start'] = np.concatenate([timeline.end[word_rows], timeline.segment_bounds[segment_rows, 1]])
+    events['end'] = np.concatenate([timeline.start[word_rows + 1], timeline.segment_bounds[segment_rows + 1, 0]])
+    events['duration'] = np.round(np.concatenate([word_gaps[word_rows], segment_gaps[segment_rows]]), 1)
+    events['preceding_word'] = np.concatenate([word_rows, segment_last_word])
+    events = events[np.lexsort((events['start'], events['preceding_word']))]
+
+    # A pause after a word that ends a sentence is a sentence boundary
+    ends_sentence = np.array([bool(SENTENCE_END_PATTERN.search(s.strip())) for s in timeline.strings], dtype=bool)
+    preceding = events['preceding_word']
+    known = preceding >= 0
+    events['sentence_boundary'][known] = ends_sentence[timeline.token[preceding[known]]] if ends_sentence.size else False
+
+    return PauseEvents(events, timeline)
+
+
+def as_pause_events(source: Union[PauseEvents, WordTimeline, Dict, str, None]) -> PauseEvents:
+    """Accept pause events or anything detect_pauses accepts."""
+    if isinstance(source, PauseEvents):
+        return source
+    return detect_pauses(source)
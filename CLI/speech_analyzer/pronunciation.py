@@ -1,9 +1,10 @@
 import re
 import numpy as np
-import librosa
 import soundfile as sf
+from .audio_frontend import as_audio_frontend
+from .word_timeline import WordTimeline
 
-def analyze_pronunciation_quality(audio_path, text, model=None):
+def analyze_pronunciation_quality(audio_path, text, model=None, word_timeline=None):
     try:
         if isinstance(text, dict):
             text = text.get('text', '')
@@ -11,23 +12,22 @@ def analyze_pronunciation_quality(audio_path, text, model=None):
         clean_text = re.sub(r'\[\d+\.\d+ second pause\]', '', text)
         clean_text = re.sub(r'\b(um|uh|ah|er|hmm)\b', '', clean_text.lower())
 
-        audio, sample_rate = librosa.load(audio_path, sr=None)
+        # MFCCs and spectral features come from the shared log-mel front end
+        frontend = as_audio_frontend(audio_path)
 
-        mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=13)
-        spectral_centroid = librosa.feature.spectral_centroid(y=audio, sr=sample_rate)
-        zero_crossing_rate = librosa.feature.zero_crossing_rate(audio)
+        mfccs = frontend.mfcc(13)
+        spectral_centroid = frontend.spectral_centroid()
+        zero_crossing_rate = frontend.zero_crossing_rate()
 
-        word_timestamps = None
-        if model is not None:
-            result = model.transcribe(audio_path, fp16=False, word_timestamps=True)
+        # Reuse the word timings of the transcription; only transcribe again without them
+        word_timestamps = word_timeline
+        if word_timestamps is None and model is not None:
+            result = model.transcribe(frontend.audio, fp16=False, word_timestamps=True)
             if 'segments' in result:
-                word_timestamps = []
-                for segment in result['segments']:
-                    if 'words' in segment:
-                        word_timestamps.extend(segment['words'])
+                word_timestamps = WordTimeline.from_result(result)
 
         pronunciation_features = {
-            'speech_rate': len(clean_text.split()) / (len(audio) / sample_rate) if len(audio) > 0 else 0,
+            'speech_rate': len(clean_text.split()) / frontend.duration if frontend.duration > 0 else 0,
             'mfcc_variability': np.std(mfccs.mean(axis=1)),
             'spectral_contrast': np.mean(spectral_centroid),
             'zero_crossing_density': np.mean(zero_crossing_rate) * 100
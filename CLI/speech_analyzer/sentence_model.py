@@ -0,0 +1,148 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .pause_events import SEGMENT_PAUSE_THRESHOLD, SENTENCE_END_PATTERN
+from .word_timeline import PAUSE_MARKER_PATTERN, WordTimeline, as_word_timeline
+
+# One row per sentence; words [first_word, last_word) of the timeline
+SENTENCE_DTYPE = np.dtype([
+    ('start', np.float64),
+    ('end', np.float64),
+    ('first_word', np.int32),
+    ('last_word', np.int32)
+])
+
+# Words ending in a period that do not end a sentence
+ABBREVIATIONS = {'mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'st.', 'vs.', 'e.g.', 'i.e.', 'approx.'}
+
+
+class SentenceModel:
+    """
+    Sentences of one transcription with their time spans and word ranges.
+
+    Built once from the Whisper word timeline: a sentence ends at a word with
+    terminal punctuation, or at the end of a segment followed by a long pause.
+    Text-only transcripts fall back to NLTK punkt (without times). The model
+    behaves like the list of sentence strings, so analyzers that indexed the
+    output of sent_tokenize keep working.
+    """
+
+    def __init__(self, sentences: List[str], spans: np.ndarray):
+        """
+        Args:
+            sentences: Sentence texts
+            spans: Structured array of SENTENCE_DTYPE, one row per sentence
+        """
+        self.sentences = sentences
+        self.spans = spans
+
+    @classmethod
+    def from_timeline(cls, timeline: WordTimeline,
+                      pause_threshold: float = SEGMENT_PAUSE_THRESHOLD) -> 'SentenceModel':
+        if len(timeline) == 0:
+            return cls([], np.zeros(0, dtype=SENTENCE_DTYPE))
+
+        # Punctuation is checked once per distinct word
+        ends_sentence = np.array([
+            bool(SENTENCE_END_PATTERN.search(word.strip())) and word.strip().lower() not in ABBREVIATIONS
+            for word in timeline.strings
+        ], dtype=bool)
+        ends = ends_sentence[timeline.token]
+
+        # Segment ends separated from the next segment by a long pause
+        segment_change = timeline.segment[1:] != timeline.segment[:-1]
+        ends[:-1] |= segment_change & (timeline.gaps() >= pause_threshold)
+        ends[-1] = True
+
+        last_words = np.flatnonzero(ends) + 1
+        first_words = np.concatenate([[0], last_words[:-1]])
+
+        spans = np.zeros(len(last_words), dtype=SENTENCE_DTYPE)
+        spans['first_word'] = first_words
+        spans['last_word'] = last_words
+        spans['start'] = timeline.start[first_words]
+        spans['end'] = timeline.end[last_words - 1]
+        sentences = [timeline.text(range(first, last)) for first, last in zip(first_words.tolist(), last_words.tolist())]
+        return cls(sentences, spans)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'SentenceModel':
+        """Punkt fallback for transcripts without word timestamps."""
+        from nltk.tokenize import sent_tokenize
+
+        sentences = sent_tokenize(re.sub(r'\s+', ' ', PAUSE_MARKER_PATTERN.sub(' ', text)).strip())
+        counts = np.array([len(s.split()) for s in sentences], dtype=np.int64)
+        spans = np.zeros(len(sentences), dtype=SENTENCE_DTYPE)
+        spans['start'] = spans['end'] = np.nan
+        spans['last_word'] = np.cumsum(counts)
+        spans['first_word'] = spans['last_word'] - counts
+        return cls(sentences, spans)
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __getitem__(self, index):
+        return self.sentences[index]
+
+    @property
+    def text(self) -> str:
+        return ' '.join(self.sentences)
+
+    @property
+    def has_times(self) -> bool:
+        return len(self.spans) > 0 and not np.isnan(self.spans['start']).any()
+
+    def word_counts(self) -> np.ndarray:
+        return (self.spans['last_word'] - self.spans['first_word']).astype(np.int64)
+
+    def durations(self) -> np.ndarray:
+        return self.spans['end'] - self.spans['start']
+
+    def section_durations(self, boundaries: Sequence[int]) -> Optional[List[float]]:
+        """
+        Duration in seconds of consecutive sections of sentences.
+
+        Args:
+            boundaries: Sentence indices where the sections split, e.g.
+                [intro_end, conclusion_start] for three sections
+
+        Returns:
+            Seconds per section from the first word of a section to the first
+            word of the next (so pauses count towards the section they follow),
+            or None when the sentences have no times
+        """
+        if not self.has_times:
+            return None
+        edges = np.concatenate([[0], np.clip(np.asarray(boundaries, dtype=np.int64), 0, len(self)), [len(self)]])
+        times = np.append(self.spans['start'], self.spans['end'][-1])
+        return [round(float(times[b] - times[a]), 1) for a, b in zip(edges[:-1], edges[1:])]
+
+
+@lru_cache(maxsize=32)
+def _from_text(text: str) -> SentenceModel:
+    return SentenceModel.from_text(text)
+
+
+def get_sentence_model(source: Union[SentenceModel, WordTimeline, Dict, str, None]) -> SentenceModel:
+    """
+    Accept a sentence model, a word timeline, a Whisper result or plain text.
+
+    Plain text is segmented with punkt once per distinct transcript, so
+    analyzers called on the same text share the result.
+    """
+    if isinstance(source, SentenceModel):
+        return source
+    if isinstance(source, WordTimeline) or (isinstance(source, dict) and source.get('segments')):
+        timeline = as_word_timeline(source)
+        if timeline.has_times:
+            return SentenceModel.from_timeline(timeline)
+        source = timeline.text()
+    if isinstance(source, dict):
+        source = source.get('text', '')
+    return _from_text(source or '')
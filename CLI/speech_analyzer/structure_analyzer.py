@@ -1,13 +1,15 @@
-import nltk
 import spacy
 from nltk.tokenize import word_tokenize
+from .sentence_model import get_sentence_model
 
 # Load language model
 nlp = spacy.load('en_core_web_sm')
 
 def analyze_speech_effectiveness(text):
-    if isinstance(text, dict):
-        text = text.get('text', '')
+    # Accepts the sentence model, a Whisper result or plain text
+    sentence_model = get_sentence_model(text)
+    if not isinstance(text, str):
+        text = sentence_model.text
     try:
         purpose_indicators = [
             "purpose", "goal", "aim", "objective", "today", "discuss",
@@ -27,7 +29,7 @@ def analyze_speech_effectiveness(text):
         last_50_words = ' '.join(words[-50:])
         has_conclusion = any(indicator in last_50_words for indicator in conclusion_indicators)
 
-        sentences = nltk.sent_tokenize(text)
+        sentences = sentence_model.sentences
         if sentences:
             avg_sentence_length = sum(len(word_tokenize(sentence)) for sentence in sentences) / len(sentences)
         else:
@@ -76,19 +78,19 @@ def analyze_speech_effectiveness(text):
         return None
 
 def analyze_speech_structure(text):
-    if isinstance(text, dict):
-        text = text.get('text', '')
+    # Accepts the sentence model, a Whisper result or plain text
+    sentence_model = get_sentence_model(text)
+    if not isinstance(text, str):
+        text = sentence_model.text
     try:
         doc = nlp(text)
-        sentences = list(doc.sents)
-        num_sentences = len(sentences)
+        num_sentences = len(sentence_model)
         if num_sentences > 0:
-            sentence_lengths = [len(sentence) for sentence in sentences]
-            avg_sentence_length = sum(sentence_lengths) / num_sentences
+            avg_sentence_length = float(sentence_model.word_counts().mean())
         else:
             avg_sentence_length = 0
 
-        paragraphs = [sent.text for sent in doc.sents if sent.text.strip()]
+        paragraphs = [sentence for sentence in sentence_model if sentence.strip()]
 
         transitions = ["however", "moreover", "thus", "therefore", "in addition"]
         transition_count = sum(1 for token in doc if token.text.lower() in transitions)
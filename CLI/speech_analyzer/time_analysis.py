@@ -1,6 +1,6 @@
-import re
 import soundfile as sf
 import wave
+from .pause_events import as_pause_events
 
 def get_audio_duration(audio_path):
     try:
@@ -18,7 +18,9 @@ def get_audio_duration(audio_path):
             print(f"Error getting audio duration using wave: {e}")
             return 60
 
-def neutralize_time_durations(audio_path, transcription_with_pauses, transcription_result, total_time):
+def neutralize_time_durations(audio_path, pauses, transcription_result, total_time):
+    # pauses are the PauseEvents of the transcription (detected from the result when None)
+    pauses = as_pause_events(pauses if pauses is not None else transcription_result)
     total_time = get_audio_duration(audio_path)
 
     if total_time <= 0 and isinstance(transcription_result, dict):
@@ -28,15 +30,11 @@ def neutralize_time_durations(audio_path, transcription_with_pauses, transcripti
 
     total_time = max(total_time, 1.0)
 
-    pauses_pattern = r'\[(\d+\.\d+) second pause\]'
-    pause_matches = re.findall(pauses_pattern, transcription_with_pauses)
-
-    total_pause_time = sum(float(duration) for duration in pause_matches)
+    total_pause_time = pauses.total_duration
 
     neutralized_duration = max(total_time - total_pause_time, 0.1)
 
-    words_without_pauses = re.sub(pauses_pattern, '', transcription_with_pauses)
-    word_count = len([w for w in words_without_pauses.split() if w.strip()])
+    word_count = len(pauses.timeline)
 
     word_count = max(word_count, 1)
 
@@ -0,0 +1,218 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Default on-disk location, resolved relative to the application directory so the
+# cache is shared no matter which directory the process was started from
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "topic_index.db"
+)
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalize topic text so trivially different spellings share one cache entry."""
+    topic = topic.lower().replace('–', '-')
+    topic = re.sub(r"[^\w\s'-]", ' ', topic)
+    return re.sub(r'\s+', ' ', topic).strip()
+
+
+class TopicIndex:
+    """
+    Cache of topic embeddings, variant embeddings and keyword sets.
+
+    Entries live in an in-memory LRU and are persisted to a SQLite file so that
+    they survive restarts. Lookups that miss both layers are encoded once and
+    written back.
+    """
+
+    def __init__(self, encode: Callable, model_name: str,
+                 variations: Optional[Callable[[str], List[str]]] = None,
+                 keywords: Optional[Callable[[str], Iterable[str]]] = None,
+                 capacity: int = 512, db_path: Optional[str] = DEFAULT_INDEX_PATH):
+        """
+        Args:
+            encode: Callable mapping a list of texts to a 2D embedding array
+            model_name: Name of the embedding model, stored with every entry so a
+                model change never serves stale vectors
+            variations: Optional callable producing interpretations of a topic
+            keywords: Optional callable producing the keyword set of a topic
+            capacity: Maximum number of entries kept in memory
+            db_path: SQLite file for the persistent store (None disables it)
+        """
+        self.encode = encode
+        self.model_name = model_name
+        self.variations = variations or (lambda topic: [topic])
+        self.keywords = keywords or (lambda topic: topic.split())
+        self.capacity = capacity
+        self.db_path = db_path
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---------- persistent store ----------
+
+    def _connection(self):
+        if self._conn is None and self.db_path:
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS topics ("
+                    " key TEXT NOT NULL,"
+                    " model TEXT NOT NULL,"
+                    " topic TEXT NOT NULL,"
+                    " variants TEXT NOT NULL,"
+                    " keywords TEXT NOT NULL,"
+                    " dim INTEGER NOT NULL,"
+                    " embeddings BLOB NOT NULL,"
+                    " PRIMARY KEY (key, model))"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Topic index store unavailable ({self.db_path}): {e}")
+                self.db_path = None
+                self._conn = None
+        return self._conn
+
+    def _load(self, key: str) -> Optional[Dict]:
+        conn = self._connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT topic, variants, keywords, dim, embeddings FROM topics WHERE key = ? AND model = ?",
+            (key, self.model_name)
+        ).fetchone()
+        if row is None:
+            return None
+        topic, variants, keywords, dim, blob = row
+        matrix = np.frombuffer(blob, dtype=np.float32).reshape(-1, dim)
+        return self._make_entry(topic, json.loads(variants), json.loads(keywords), matrix)
+
+    def _store(self, key: str, entry: Dict):
+        conn = self._connection()
+        if conn is None:
+            return
+        matrix = np.ascontiguousarray(entry['variant_embeddings'], dtype=np.float32)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO topics (key, model, topic, variants, keywords, dim, embeddings)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self.model_name, entry['topic'], json.dumps(entry['variants']),
+                 json.dumps(sorted(entry['keywords'])), matrix.shape[1], matrix.tobytes())
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing topic index entry: {e}")
+
+    # ---------- entries ----------
+
+    @staticmethod
+    def _make_entry(topic: str, variants: List[str], keywords: Iterable[str], matrix: np.ndarray) -> Dict:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return {
+            'topic': topic,
+            'variants': list(variants),
+            'keywords': set(keywords),
+            # The first variant is always the topic itself
+            'embedding': matrix[0],
+            'variant_embeddings': matrix,
+            'unit_variant_embeddings': matrix / np.maximum(norms, 1e-12)
+        }
+
+    def _build(self, topic: str) -> Dict:
+        variants = self.variations(topic)
+        if not variants or variants[0] != topic:
+            variants = [topic] + [v for v in variants if v != topic]
+        matrix = np.asarray(self.encode(variants), dtype=np.float32).reshape(len(variants), -1)
+        return self._make_entry(topic, variants, self.keywords(topic), matrix)
+
+    def _remember(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, topic: str) -> Dict:
+        """
+        Return the cached entry for a topic, encoding it on a miss.
+
+        Returns:
+            Dict with 'topic', 'variants', 'keywords', 'embedding',
+            'variant_embeddings' and 'unit_variant_embeddings'
+        """
+        key = normalize_topic(topic)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            entry = self._load(key)
+            if entry is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                entry = self._build(topic)
+                self._store(key, entry)
+            self._remember(key, entry)
+            return entry
+
+    def preload(self, catalog_path: str) -> int:
+        """
+        Bulk-load topics from a catalog file.
+
+        The catalog is either a JSON list of topics or a text file with one topic
+        per line (blank lines and lines starting with '#' are ignored). Topics
+        already in the persistent store are only read back, not re-encoded.
+
+        Returns:
+            int: Number of topics loaded
+        """
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        if catalog_path.endswith('.json'):
+            topics = [str(t) for t in json.loads(content)]
+        else:
+            topics = [line.strip() for line in content.splitlines()
+                      if line.strip() and not line.strip().startswith('#')]
+
+        loaded = 0
+        for topic in topics:
+            key = normalize_topic(topic)
+            if not key:
+                continue
+            with self._lock:
+                if key in self._entries:
+                    continue
+                entry = self._load(key)
+                if entry is None:
+                    entry = self._build(topic)
+                    self._store(key, entry)
+                self._remember(key, entry)
+            loaded += 1
+        return loaded
+
+    def stats(self) -> Dict:
+        """Return cache counters, including the combined (memory + disk) hit rate."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'lookups': lookups,
+            'memory_hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            'entries_in_memory': len(self._entries),
+            'capacity': self.capacity
+        }
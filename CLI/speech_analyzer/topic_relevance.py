@@ -8,17 +8,30 @@ from collections import Counter
 import nltk
 from nltk.tokenize import word_tokenize
 import traceback
+from .topic_index import TopicIndex
+from .relevance_engine import RelevanceEngine
 
 # Try to load sentence-transformers for better semantic similarity
 # Falls back to simpler methods if not available
+TRANSFORMER_MODEL_NAME = 'all-MiniLM-L6-v2'
 try:
-    from sentence_transformers import SentenceTransformer, util
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    from .embedding_backend import get_embedding_backend
+    # Quantized ONNX Runtime model when exported, PyTorch otherwise (EMBEDDING_BACKEND)
+    model = get_embedding_backend(TRANSFORMER_MODEL_NAME)
     TRANSFORMER_AVAILABLE = True
 except ImportError:
     TRANSFORMER_AVAILABLE = False
     print("sentence-transformers not available, using fallback similarity methods")
 
+# Topic embeddings are cached in memory and on disk, so repeated topics are encoded once
+topic_index = TopicIndex(
+    encode=lambda texts: model.encode(texts),
+    model_name=f"{TRANSFORMER_MODEL_NAME}:{model.name}"
+) if TRANSFORMER_AVAILABLE else None
+
+# Sentence-level relevance so long speeches are scored in full rather than truncated
+relevance_engine = RelevanceEngine(encode=model.encode) if TRANSFORMER_AVAILABLE else None
+
 # Load spaCy model
 try:
     nlp = spacy.load('en_core_web_sm')
@@ -82,23 +95,24 @@ def extract_key_topics(text, n=10):
     # Return unique topics
     return list(set(key_phrases))[:n]
 
-def calculate_similarity_transformer(text1, text2):
-    """Calculate semantic similarity using sentence transformers"""
+def analyze_relevance_transformer(speech_text, topic_text):
+    """Sentence-level relevance of a speech to its topic using sentence transformers"""
     if not TRANSFORMER_AVAILABLE:
         return None
 
     try:
-        # Generate embeddings
-        embedding1 = model.encode(text1, convert_to_tensor=True)
-        embedding2 = model.encode(text2, convert_to_tensor=True)
-
-        # Calculate cosine similarity
-        similarity = util.pytorch_cos_sim(embedding1, embedding2).item()
-        return similarity
+        # All sentences are encoded in one batch; the topic embedding comes from the topic index
+        topic_embedding = topic_index.get(topic_text)['embedding']
+        return relevance_engine.analyze(speech_text, topic_embedding)
     except Exception as e:
         print(f"Error in transformer similarity calculation: {e}")
         return None
 
+def calculate_similarity_transformer(speech_text, topic_text):
+    """Calculate semantic similarity between a speech and its topic using sentence transformers"""
+    relevance = analyze_relevance_transformer(speech_text, topic_text)
+    return relevance['score'] if relevance is not None else None
+
 def calculate_similarity_tfidf(text1, text2):
     """Calculate similarity using TF-IDF vectors"""
     try:
@@ -157,12 +171,14 @@ def analyze_topic_relevance(transcription_text, topic):
         key_speech_topics = extract_key_topics(speech_text)
 
         # Calculate semantic similarity between speech and topic
-        transformer_similarity = calculate_similarity_transformer(speech_text, topic_text)
+        transformer_relevance = analyze_relevance_transformer(speech_text, topic_text)
 
-        if transformer_similarity is not None:
-            similarity = transformer_similarity
+        if transformer_relevance is not None:
+            similarity = transformer_relevance['score']
+            relevance_timeline = transformer_relevance['timeline']
         else:
             similarity = calculate_similarity_tfidf(speech_text, topic_text)
+            relevance_timeline = []
 
         # Ensure similarity is between 0 and 1
         similarity = max(0, min(1, similarity))
@@ -177,6 +193,7 @@ def analyze_topic_relevance(transcription_text, topic):
             'topic_relevance_score': relevance_score,
             'similarity': round(similarity, 2),
             'key_speech_topics': key_speech_topics,
+            'relevance_timeline': relevance_timeline,
             'feedback': feedback
         }
 
@@ -0,0 +1,172 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# One row per recognised word; token indexes the interned string table
+WORD_DTYPE = np.dtype([
+    ('start', np.float64),
+    ('end', np.float64),
+    ('probability', np.float32),
+    ('segment', np.int32),
+    ('token', np.int32)
+])
+
+PAUSE_MARKER_PATTERN = re.compile(r'\[\d+(?:\.\d+)? second pause\]')
+
+
+class WordTimeline:
+    """
+    Word-level timestamps of one transcription as a NumPy structured array.
+
+    Built once from the Whisper result and shared by every analysis, so the
+    nested segments/words dicts are flattened a single time. Word strings are
+    interned in a table (repeated words share one entry); times are NaN for
+    text-only transcripts.
+    """
+
+    def __init__(self, words: np.ndarray, strings: List[str],
+                 segment_bounds: Optional[np.ndarray] = None,
+                 segment_confidence: Optional[np.ndarray] = None):
+        """
+        Args:
+            words: Structured array of WORD_DTYPE
+            strings: String table indexed by words['token']
+            segment_bounds: (n_segments, 2) start and end time of each segment
+            segment_confidence: Confidence of each segment (NaN when unknown)
+        """
+        self.words = words
+        self.strings = strings
+        self.segment_bounds = segment_bounds if segment_bounds is not None else np.zeros((0, 2))
+        self.segment_confidence = (segment_confidence if segment_confidence is not None
+                                   else np.full(len(self.segment_bounds), np.nan))
+
+    @classmethod
+    def from_result(cls, result: Dict) -> 'WordTimeline':
+        """Flatten the segments and words of a Whisper result."""
+        segments = result.get('segments', []) if isinstance(result, dict) else []
+        strings, interned = [], {}
+        rows = []
+        for segment_id, segment in enumerate(segments):
+            for word_info in segment.get('words', []):
+                word = word_info.get('word', '')
+                token = interned.get(word)
+                if token is None:
+                    token = interned[word] = len(strings)
+                    strings.append(word)
+                rows.append((
+                    word_info.get('start', np.nan),
+                    word_info.get('end', np.nan),
+                    word_info.get('probability', np.nan),
+                    segment_id,
+                    token
+                ))
+
+        bounds = np.array([(s.get('start', np.nan), s.get('end', np.nan)) for s in segments],
+                          dtype=np.float64).reshape(-1, 2)
+        confidence = np.array([s.get('confidence', np.nan) for s in segments], dtype=np.float64)
+        return cls(np.array(rows, dtype=WORD_DTYPE), strings, bounds, confidence)
+
+    @classmethod
+    def from_text(cls, text: str) -> 'WordTimeline':
+        """Timeline without timestamps, for transcripts that only have text."""
+        strings, interned = [], {}
+        tokens = []
+        for word in PAUSE_MARKER_PATTERN.sub(' ', text).split():
+            token = interned.get(word)
+            if token is None:
+                token = interned[word] = len(strings)
+                strings.append(word)
+            tokens.append(token)
+
+        words = np.zeros(len(tokens), dtype=WORD_DTYPE)
+        words['start'] = words['end'] = words['probability'] = np.nan
+        words['token'] = tokens
+        return cls(words, strings)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def start(self) -> np.ndarray:
+        return self.words['start']
+
+    @property
+    def end(self) -> np.ndarray:
+        return self.words['end']
+
+    @property
+    def probability(self) -> np.ndarray:
+        return self.words['probability']
+
+    @property
+    def segment(self) -> np.ndarray:
+        return self.words['segment']
+
+    @property
+    def token(self) -> np.ndarray:
+        return self.words['token']
+
+    @property
+    def has_times(self) -> bool:
+        return len(self.words) > 0 and not np.isnan(self.start).all()
+
+    def word(self, index: int) -> str:
+        return self.strings[self.token[index]]
+
+    def text(self, indices: Optional[Sequence[int]] = None) -> str:
+        """Words (all, or the given indices) joined as Whisper spells them."""
+        tokens = self.token if indices is None else self.token[np.asarray(indices, dtype=np.int64)]
+        return ' '.join(self.strings[t].strip() for t in tokens.tolist())
+
+    def durations(self) -> np.ndarray:
+        """Spoken duration of every word."""
+        return self.end - self.start
+
+    def gaps(self, within_segments: bool = False) -> np.ndarray:
+        """
+        Silence between consecutive words (gaps[i] follows word i).
+
+        Args:
+            within_segments: Only keep gaps between words of the same segment;
+                gaps across a segment boundary are NaN
+        """
+        gaps = self.start[1:] - self.end[:-1]
+        if within_segments:
+            gaps = np.where(self.segment[1:] == self.segment[:-1], gaps, np.nan)
+        return gaps
+
+    def segment_gaps(self) -> np.ndarray:
+        """Silence between consecutive segments (gaps[i] follows segment i)."""
+        return self.segment_bounds[1:, 0] - self.segment_bounds[:-1, 1]
+
+    def per_minute(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Word counts per minute of speech (all words, or the given indices)."""
+        starts = self.start if indices is None else self.start[np.asarray(indices, dtype=np.int64)]
+        starts = starts[~np.isnan(starts)]
+        if starts.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.bincount((starts // 60).astype(np.int64))
+
+    def in_range(self, start_time: float, end_time: float) -> np.ndarray:
+        """Indices of the words overlapping [start_time, end_time]."""
+        return np.flatnonzero((self.start <= end_time) & (self.end >= start_time))
+
+    def in_ranges(self, ranges: Sequence[Tuple[float, float]]) -> List[np.ndarray]:
+        """Indices of the words overlapping each (start, end) range, in one pass."""
+        if len(ranges) == 0:
+            return []
+        bounds = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+        overlap = (self.start[None, :] <= bounds[:, 1:2]) & (self.end[None, :] >= bounds[:, 0:1])
+        return [np.flatnonzero(row) for row in overlap]
+
+
+def as_word_timeline(source: Union[WordTimeline, Dict, str, None]) -> WordTimeline:
+    """Accept a timeline, a Whisper result or plain text and return a timeline."""
+    if isinstance(source, WordTimeline):
+        return source
+    if isinstance(source, dict):
+        if source.get('segments'):
+            return WordTimeline.from_result(source)
+        return WordTimeline.from_text(source.get('text', ''))
+    return WordTimeline.from_text(source or '')
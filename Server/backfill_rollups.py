@@ -0,0 +1,61 @@
+"""
+Rebuild users' progress rollups from their stored speeches.
+
+Rollups are maintained when a speech is stored, so this is only needed for
+speeches stored before rollups existed, or to repair a rollup. Each user's
+speeches are read once, replayed in recording order through the same
+add_to_rollup as uploads, and the rollup is replaced. A speech stored while
+its user is being rebuilt may be missed; running the command again fixes it.
+
+Usage:
+    python backfill_rollups.py [--backend firestore|sqlite|memory] [--user USER_ID ...] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+
+from persistence.backends import STORAGE_BACKENDS, get_speech_store
+from persistence.rollups import ROLLUP_METRICS, add_to_rollup
+
+
+async def rebuild_rollup(store, user_id):
+    """The user's rollup recomputed from their speeches, and the number of speeches skipped."""
+    speeches = []
+    skipped = 0
+    async for _, speech in store.iter_speeches(user_id):
+        if speech.get("recorded_at") is None:
+            skipped += 1
+            continue
+        speeches.append({field: speech.get(field) for field in ROLLUP_METRICS + ["speech_type", "recorded_at"]})
+
+    rollup = None
+    for speech in sorted(speeches, key=lambda s: s["recorded_at"]):
+        rollup = add_to_rollup(rollup, speech, speech["recorded_at"])
+    return rollup, skipped
+
+
+async def main(args):
+    store = get_speech_store(args.backend)
+    user_ids = args.user or [user_id async for user_id in store.iter_user_ids()]
+
+    for user_id in user_ids:
+        rollup, skipped = await rebuild_rollup(store, user_id)
+        if rollup is None:
+            continue
+        if not args.dry_run:
+            await store.put_rollup(user_id, rollup)
+        note = f" ({skipped} without a timestamp skipped)" if skipped else ""
+        print(f"{user_id}: {rollup['count']} speeches{note}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default=None,
+                        help="Store to rebuild (default: STORAGE_BACKEND)")
+    parser.add_argument("--user", nargs="+", help="Only these users")
+    parser.add_argument("--dry-run", action="store_true", help="Compute the rollups without writing them")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Maintain the score sketch shards behind the percentile endpoints.
+
+Backfill (--before): speeches stored before workers kept sketches are added
+to a "backfill" shard. Pass the time the sketch-keeping release was
+deployed; later speeches are already in the workers' shards. The shard is
+replaced on every run, so running it again never counts a speech twice.
+
+Compaction (--compact): every worker process writes its own shards, and a
+new one each SCORE_SKETCH_SHARD_SECONDS. Shards not written for longer than
+--idle-hours are final; they are merged into one shard, which replaces them
+in a single commit.
+
+Usage:
+    python backfill_score_sketches.py [--backend firestore|sqlite|memory] [--before 2026-10-19T12:00:00+00:00] [--compact] [--idle-hours 2]
+"""
+import argparse
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+
+from persistence.backends import STORAGE_BACKENDS, get_speech_store
+from persistence.score_sketches import (SCORE_SKETCH_FLUSH_SECONDS, SCORE_SKETCH_SHARD_SECONDS, add_speech_scores,
+                                        decode_sketches, encode_sketches, merge_sketches)
+
+BACKFILL_SHARD_ID = "backfill"
+
+
+async def backfill(store, before: datetime):
+    sketches = {}
+    speeches = 0
+    async for user_id in store.iter_user_ids():
+        async for _, speech in store.iter_speeches(user_id):
+            recorded_at = speech.get("recorded_at")
+            if recorded_at is None or recorded_at >= before:
+                continue
+            add_speech_scores(sketches, speech)
+            speeches += 1
+    await store.put_sketch_shard(BACKFILL_SHARD_ID, encode_sketches(sketches))
+    print(f"Backfilled {speeches} speeches recorded before {before.isoformat()}")
+
+
+async def compact(store, idle: timedelta):
+    cutoff = datetime.now(timezone.utc) - idle
+    shards = await store.list_sketch_shards()
+    final = [shard_id for shard_id, (_, updated_at) in shards.items()
+             if shard_id != BACKFILL_SHARD_ID and updated_at < cutoff]
+    if len(final) < 2:
+        print(f"{len(final)} idle shards, nothing to compact")
+        return
+    merged = merge_sketches(decode_sketches(shards[shard_id][0]) for shard_id in final)
+    await store.put_sketch_shard(f"compacted-{uuid.uuid4().hex[:12]}", encode_sketches(merged), replaces=final)
+    print(f"Compacted {len(final)} of {len(shards)} shards")
+
+
+def _utc(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+async def main(args):
+    store = get_speech_store(args.backend)
+    if args.before:
+        await backfill(store, args.before)
+    if args.compact:
+        idle = timedelta(hours=args.idle_hours)
+        if idle.total_seconds() <= SCORE_SKETCH_SHARD_SECONDS + SCORE_SKETCH_FLUSH_SECONDS:
+            raise SystemExit("--idle-hours must exceed SCORE_SKETCH_SHARD_SECONDS plus the flush interval")
+        await compact(store, idle)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default=None,
+                        help="Store holding the shards (default: STORAGE_BACKEND)")
+    parser.add_argument("--before", type=_utc, help="Backfill speeches recorded before this time (ISO 8601)")
+    parser.add_argument("--compact", action="store_true", help="Merge final worker shards into one")
+    parser.add_argument("--idle-hours", type=float, default=2.0, help="Age of the last write of a final shard")
+    args = parser.parse_args()
+    if not args.before and not args.compact:
+        parser.error("nothing to do: pass --before and/or --compact")
+    asyncio.run(main(args))
@@ -0,0 +1,130 @@
+"""
+Compare the PyTorch and quantized ONNX Runtime embedding backends.
+
+Every backend is measured in a fresh process, so its load time and peak
+memory are its own. Every run encodes the transcript the way an analysis
+request does (topic variations plus all transcript sentences). The report
+shows load time, per-request latency, peak RSS and the cosine similarity of
+the embeddings with those of the first backend.
+
+Export the ONNX model first:
+    python -m models.embedding_backend export
+
+Usage:
+    python benchmark_embeddings.py transcript.txt [--topic "..."] [--runs 10] [--backends torch onnx]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def run_worker_process(args):
+    """Run this script's --worker mode in a new process and return its JSON result."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    ).stdout
+    # Model loading prints progress; the measurement is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def p95(latencies):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+
+def run_worker(backend, transcript_path, topic, runs, embeddings_path):
+    """Measure one backend inside this process and print the result as JSON."""
+    from models.embedding_backend import get_embedding_backend
+    from models.relevance_engine import split_into_chunks
+
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        chunks = split_into_chunks(f.read())
+    texts = [topic, f"The importance of {topic}", f"How {topic} affects our lives"] + chunks
+
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    model = get_embedding_backend(backend=backend)
+    model.encode(["warm up"])
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    embeddings = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        embeddings = model.encode(texts, batch_size=64)
+        latencies.append((time.perf_counter() - start) * 1000)
+    np.save(embeddings_path, np.asarray(embeddings, dtype=np.float32))
+
+    print(json.dumps({
+        "backend": model.name,
+        "texts": len(texts),
+        "load_seconds": load_seconds,
+        "latencies_ms": latencies,
+        "peak_rss_mb": peak_rss_mb(),
+        "model_rss_mb": peak_rss_mb() - baseline_rss
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", help="Path to a plain-text transcript")
+    parser.add_argument("--topic", default="The power of habit")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--embeddings", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.transcript, args.topic, args.runs, args.embeddings)
+        return
+
+    results = {}
+    embeddings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            embeddings_path = os.path.join(tmp, f"{backend}.npy")
+            results[backend] = run_worker_process([
+                args.transcript, "--topic", args.topic, "--runs", str(args.runs),
+                "--worker", backend, "--embeddings", embeddings_path
+            ])
+            embeddings[backend] = np.load(embeddings_path)
+
+    reference = embeddings[args.backends[0]]
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    print(f"\n{'requested':<11}{'loaded':<8}{'load s':>9}{'mean ms':>11}{'p95 ms':>10}"
+          f"{'peak RSS MB':>13}{'model MB':>10}{'min cos':>9}{'mean cos':>10}")
+    for backend, result in results.items():
+        latencies = result["latencies_ms"]
+        current = embeddings[backend] / np.linalg.norm(embeddings[backend], axis=1, keepdims=True)
+        cosines = np.sum(reference * current, axis=1)
+        print(f"{backend:<11}{result['backend']:<8}{result['load_seconds']:>9.2f}{statistics.mean(latencies):>11.1f}"
+              f"{p95(latencies):>10.1f}{result['peak_rss_mb']:>13.0f}{result['model_rss_mb']:>10.0f}"
+              f"{cosines.min():>9.4f}{cosines.mean():>10.4f}")
+    print(f"\n{results[args.backends[0]]['texts']} texts per request; "
+          f"cosine similarity is measured against the '{args.backends[0]}' embeddings.")
+
+
+if __name__ == "__main__":
+    main()
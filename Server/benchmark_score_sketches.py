@@ -0,0 +1,66 @@
+"""
+Measure the accuracy, size and speed of the score percentile sketches.
+
+Scores are drawn like real ones (rounded to two decimals, so with many
+ties) and split across several simulated worker shards. The shards are
+encoded, decoded and merged the way the percentile endpoints do, and the
+percentile of every distinct score is compared with the exact one computed
+by sorting all scores. The report shows the largest and the 99th
+percentile absolute error (in percentile points), the encoded shard size
+and the time per lookup.
+
+Usage:
+    python benchmark_score_sketches.py [--sizes 1000 10000 100000] [--shards 4] [--trials 5]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from persistence.score_sketches import KLLSketch, decode_sketches, encode_sketches, merge_sketches
+
+
+def exact_percentiles(scores, values):
+    """Percentage of scores below each value, ties counted half."""
+    scores = np.sort(scores)
+    below = np.searchsorted(scores, values, side="left")
+    at_or_below = np.searchsorted(scores, values, side="right")
+    return 100.0 * (below + at_or_below) / (2 * len(scores))
+
+
+def run(size, shards, seed):
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    scores = np.clip(rng.normal(13.0, 3.0, size), 0, 20).round(2)
+
+    shard_sketches = [{("vocabulary_evaluation_score", "all"): KLLSketch()} for _ in range(shards)]
+    for i, score in enumerate(scores):
+        shard_sketches[i % shards][("vocabulary_evaluation_score", "all")].update(score)
+    blobs = [encode_sketches(sketches) for sketches in shard_sketches]
+    sketch = merge_sketches(decode_sketches(blob) for blob in blobs)[("vocabulary_evaluation_score", "all")]
+
+    values = np.unique(scores)
+    start = time.perf_counter()
+    estimates = np.array([sketch.percentile(v) for v in values])
+    lookup_us = (time.perf_counter() - start) / len(values) * 1e6
+    errors = np.abs(estimates - exact_percentiles(scores, values))
+    return errors.max(), np.percentile(errors, 99), max(len(blob) for blob in blobs), lookup_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--trials', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scores':>10}{'max err (pts)':>16}{'p99 err (pts)':>16}{'shard bytes':>14}{'lookup (us)':>14}")
+    for size in args.sizes:
+        results = np.array([run(size, args.shards, seed) for seed in range(args.trials)])
+        print(f"{size:>10}{results[:, 0].max():>16.2f}{results[:, 1].mean():>16.2f}"
+              f"{int(results[:, 2].max()):>14}{results[:, 3].mean():>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
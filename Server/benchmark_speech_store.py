@@ -0,0 +1,128 @@
+"""
+Benchmark the persistence calls of an upload against a local store.
+
+Numbering: the store is filled with users holding increasingly many
+speeches (each with a transcript of realistic size). For every history size
+the report compares the time to number the next speech through the store's
+counter with the old approach, which fetched and counted every stored speech
+document.
+
+Round trips: the reads of an upload (user profile and speech number) are
+awaited one after the other and concurrently, and the writes (speech and
+counter) are committed separately and as one batch. The memory store adds a
+simulated network latency per call; the SQLite store (--backend sqlite, in a
+temporary database) pays its real query and commit costs.
+
+Usage:
+    python benchmark_speech_store.py [--backend memory|sqlite] [--sizes 10 100 1000 5000] [--runs 200] [--round-trip-ms 40]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from persistence.speech_store import MemorySpeechStore
+from persistence.sqlite_store import SQLiteSpeechStore
+
+TRANSCRIPT = ("Today I want to talk about the power of habit and how small daily changes "
+              "[1.2 second pause] add up over a lifetime. ") * 40
+
+
+def speech(i):
+    return {
+        "topic": f"Topic {i}",
+        "speech_type": "Prepared Speech",
+        "overall_score": 60 + i % 40,
+        "transcription": TRANSCRIPT
+    }
+
+
+async def add_user(store, speeches):
+    batch = store.batch()
+    user_id = batch.add_user({"name": f"user_{speeches}", "email": f"user_{speeches}@example.com"})
+    for i in range(speeches):
+        batch.add_speech(user_id, speech(i))
+    await batch.commit()
+    return user_id
+
+
+async def time_calls(fn, runs):
+    """Median latency of await fn() in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def count_all(store, user_id):
+    return len([s async for s in store.iter_speeches(user_id)]) + 1
+
+
+def make_store(backend, round_trip_ms=0.0):
+    if backend == 'sqlite':
+        return SQLiteSpeechStore(os.path.join(tempfile.mkdtemp(), "benchmark.db"))
+    return MemorySpeechStore(round_trip_ms=round_trip_ms)
+
+
+async def benchmark_numbering(backend, sizes, runs):
+    store = make_store(backend)
+    print(f"{'speeches':>10}{'counter (ms)':>16}{'fetch all (ms)':>18}")
+    for size in sizes:
+        user_id = await add_user(store, size)
+        counter = await time_calls(lambda: store.next_speech_number(user_id), runs)
+        fetch_all = await time_calls(lambda: count_all(store, user_id), max(1, runs // 10))
+        assert await store.next_speech_number(user_id) == size + 1
+        print(f"{size:>10}{counter:>16.4f}{fetch_all:>18.4f}")
+
+
+async def benchmark_round_trips(backend, round_trip_ms, runs):
+    store = make_store(backend, round_trip_ms)
+    user_id = await add_user(store, 10)
+
+    async def sequential_reads():
+        await store.get_user(user_id)
+        await store.next_speech_number(user_id)
+
+    async def concurrent_reads():
+        await asyncio.gather(store.get_user(user_id), store.next_speech_number(user_id))
+
+    async def separate_writes():
+        for i in range(2):
+            batch = store.batch()
+            batch.add_speech(user_id, speech(i))
+            await batch.commit()
+
+    async def batched_writes():
+        batch = store.batch()
+        for i in range(2):
+            batch.add_speech(user_id, speech(i))
+        await batch.commit()
+
+    print(f"\nSimulated round trip: {round_trip_ms} ms" if backend == 'memory' else f"\n{backend} store")
+    for label, fn in [("reads, sequential", sequential_reads), ("reads, concurrent", concurrent_reads),
+                      ("writes, separate commits", separate_writes), ("writes, one batch", batched_writes)]:
+        print(f"{label:<28}{await time_calls(fn, runs):>8.1f} ms")
+
+    print("\nPer-call latency:")
+    for operation, stats in store.latency.stats().items():
+        print(f"  {operation:<20}{stats['calls']:>6} calls  p50 {stats['p50_ms']:>6.1f} ms  p95 {stats['p95_ms']:>6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--round-trip-ms', type=float, default=40.0)
+    args = parser.parse_args()
+
+    asyncio.run(benchmark_numbering(args.backend, args.sizes, args.runs))
+    asyncio.run(benchmark_round_trips(args.backend, args.round_trip_ms, max(1, args.runs // 20)))
+
+
+if __name__ == "__main__":
+    main()
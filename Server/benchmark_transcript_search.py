@@ -0,0 +1,85 @@
+"""
+Benchmark phrase search over the transcript index.
+
+A temporary index is filled with synthetic speeches (words drawn from a
+Zipf-like vocabulary, with word timings) spread over users and clubs. The
+report shows the indexing rate, the index size and the median and 95th
+percentile latency of phrase queries scoped to one user and to one club,
+for common and rare phrases.
+
+Usage:
+    python benchmark_transcript_search.py [--speeches 20000] [--words 600] [--users 2000] [--clubs 50] [--queries 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from persistence.transcript_index import TranscriptIndex
+
+VOCABULARY = ("the of and to a in is that it for on with as was be at this have from or by but not "
+              "what all were we when your can said there use an each which she do how their if will up "
+              "other about out many then them these so some her would make like him into time has look "
+              "two more write go see number no way could people my than first water been call who oil "
+              "its now find long down day did get come made may part habit change confidence audience "
+              "story journey lesson courage vision purpose growth leadership community resilience").split()
+
+
+def synthetic_timeline(rng, words):
+    # Zipf-like: frequent words much more common than rare ones
+    ranks = np.minimum(rng.zipf(1.3, words), len(VOCABULARY)) - 1
+    starts = np.cumsum(rng.uniform(0.2, 0.6, words))
+    return {'word': [VOCABULARY[r] for r in ranks], 'start': starts.tolist(), 'end': (starts + 0.18).tolist()}
+
+
+def percentile_ms(timings, q):
+    return np.percentile(timings, q) * 1000
+
+
+async def run(args):
+    rng = np.random.default_rng(0)
+    path = os.path.join(tempfile.mkdtemp(), "transcript_index.db")
+    index = TranscriptIndex(path)
+
+    start = time.perf_counter()
+    for i in range(args.speeches):
+        user = i % args.users
+        await index.add_speech(f"speech{i}", f"user{user}", synthetic_timeline(rng, args.words),
+                               club_id=f"club{user % args.clubs}", topic=f"Topic {i}")
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {args.speeches} speeches in {elapsed:.1f} s ({args.speeches / elapsed:.0f}/s), "
+          f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+    phrases = {"common": "of the", "rare": "leadership community"}
+    print(f"\n{'scope':<8}{'phrase':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'hits':>8}")
+    for scope in ("user", "club"):
+        for kind, phrase in phrases.items():
+            timings, hits = [], []
+            for _ in range(args.queries):
+                key = random.randrange(args.users if scope == "user" else args.clubs)
+                scope_args = {"user_id": f"user{key}"} if scope == "user" else {"club_id": f"club{key}"}
+                query_start = time.perf_counter()
+                result = await index.search(phrase, limit=20, **scope_args)
+                timings.append(time.perf_counter() - query_start)
+                hits.append(len(result["results"]))
+            print(f"{scope:<8}{kind:<10}{percentile_ms(timings, 50):>10.2f}{percentile_ms(timings, 95):>10.2f}"
+                  f"{statistics.mean(hits):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--speeches', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=600)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--clubs', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Calibrate the fast pronunciation estimate against the full audio analysis.
+
+Every audio file of a local test set is transcribed once, then scored by both
+paths of PronunciationAnalyzer. The report lists the per-file scores and, for
+the overall score and each component, the mean absolute error, bias and
+Pearson correlation of the fast estimate against the audio path.
+
+With --write, a linear map (intercept, slope) from each fast component score
+to the audio path's score is fitted by least squares and saved to
+pronunciation_calibration.json, which the fast mode picks up on start.
+
+Usage (from the Server directory):
+    python calibrate_pronunciation.py test_audio/ [--model base] [--write] [--report report.json]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.flac', '.ogg')
+
+# Component scores compared between the two paths, keyed by calibration name
+COMPONENTS = {
+    'phoneme_accuracy': lambda r: r['phoneme_accuracy']['overall_score'],
+    'rhythm': lambda r: r['prosody']['rhythm_score'],
+    'fluency': lambda r: r['fluency']['overall_score'],
+    'articulation': lambda r: r['articulation']['clarity_score'],
+    'overall': lambda r: r['pronunciation_score']
+}
+
+
+def score_file(analyzer, model, audio_path):
+    """Transcribe one file and score it with both paths."""
+    from models.audio_frontend import AudioFrontend
+    from models.transcript import transcribe_audio
+    from models.word_timeline import WordTimeline
+
+    audio = AudioFrontend.load(audio_path)
+    timeline = WordTimeline.from_result(transcribe_audio(model, audio))
+    transcript = timeline.text()
+
+    start = time.perf_counter()
+    full = analyzer.analyze_pronunciation(audio, transcript, timeline)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = analyzer.analyze_pronunciation_fast(timeline, transcript)
+    fast_seconds = time.perf_counter() - start
+
+    return {
+        'file': os.path.basename(audio_path),
+        'words': len(timeline),
+        'full': {name: float(get(full)) for name, get in COMPONENTS.items()},
+        'fast': {name: float(get(fast)) for name, get in COMPONENTS.items()},
+        'full_seconds': round(full_seconds, 3),
+        'fast_seconds': round(fast_seconds, 4)
+    }
+
+
+def summarize(rows):
+    """Agreement statistics of the fast estimate per component."""
+    summary = {}
+    for name in COMPONENTS:
+        full = np.array([row['full'][name] for row in rows])
+        fast = np.array([row['fast'][name] for row in rows])
+        correlation = float(np.corrcoef(full, fast)[0, 1]) if len(rows) > 1 and full.std() and fast.std() else None
+        summary[name] = {
+            'mae': round(float(np.abs(fast - full).mean()), 2),
+            'bias': round(float((fast - full).mean()), 2),
+            'pearson_r': round(correlation, 3) if correlation is not None else None
+        }
+    return summary
+
+
+def fit_coefficients(rows):
+    """Least-squares (intercept, slope) per component mapping the fast score onto the full score."""
+    coefficients = {}
+    for name in COMPONENTS:
+        if name == 'overall':
+            continue
+        full = np.array([row['full'][name] for row in rows])
+        fast = np.array([row['fast'][name] for row in rows])
+        if len(rows) < 3 or fast.std() == 0:
+            # Not enough spread to fit a slope; only correct the bias
+            coefficients[name] = [round(float((full - fast).mean()), 3), 1.0]
+        else:
+            slope, intercept = np.polyfit(fast, full, 1)
+            coefficients[name] = [round(float(intercept), 3), round(float(slope), 3)]
+    return coefficients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('test_set', help="Directory of audio files")
+    parser.add_argument('--model', default='base', help="Whisper model used for transcription")
+    parser.add_argument('--write', action='store_true', help="Save fitted coefficients for the fast mode")
+    parser.add_argument('--report', default=None, help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    import whisper
+    from models.vocabulary_evaluation import PRONUNCIATION_CALIBRATION_PATH, PronunciationAnalyzer
+
+    files = sorted(os.path.join(args.test_set, name) for name in os.listdir(args.test_set)
+                   if name.lower().endswith(AUDIO_EXTENSIONS))
+    if not files:
+        raise SystemExit(f"No audio files in {args.test_set}")
+
+    model = whisper.load_model(args.model)
+    analyzer = PronunciationAnalyzer()
+    # Score the uncalibrated estimate so refits do not compound
+    analyzer.fast_calibration = {}
+
+    rows = []
+    for path in files:
+        row = score_file(analyzer, model, path)
+        rows.append(row)
+        print(f"{row['file']:<40}{row['words']:>6} words   full {row['full']['overall']:>5.1f} "
+              f"({row['full_seconds']:.2f}s)   fast {row['fast']['overall']:>5.1f} ({row['fast_seconds'] * 1000:.1f}ms)")
+
+    summary = summarize(rows)
+    print(f"\n{'component':<20}{'MAE':>8}{'bias':>8}{'r':>8}")
+    for name, stats in summary.items():
+        r = f"{stats['pearson_r']:.3f}" if stats['pearson_r'] is not None else '-'
+        print(f"{name:<20}{stats['mae']:>8.2f}{stats['bias']:>8.2f}{r:>8}")
+    speedup = sum(r['full_seconds'] for r in rows) / max(sum(r['fast_seconds'] for r in rows), 1e-9)
+    print(f"\nFast mode is {speedup:.0f}x faster than the audio path on {len(rows)} files")
+
+    report = {'files': rows, 'summary': summary}
+    if args.write:
+        coefficients = fit_coefficients(rows)
+        with open(PRONUNCIATION_CALIBRATION_PATH, 'w') as f:
+            json.dump({'coefficients': coefficients, 'files': len(rows), 'whisper_model': args.model}, f, indent=2)
+        report['coefficients'] = coefficients
+        print(f"Saved calibration to {PRONUNCIATION_CALIBRATION_PATH}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Export every stored speech to partitioned columnar files for offline analytics.
+
+One row per speech: the summary stored in the speech document (scores,
+topic, durations, ...) and the scalar values of every analyzer's details,
+read from the speech's compressed analysis blob and flattened into columns
+named after their path (e.g. proficiency_scores__final_score). Lists such as
+the word timeline and pause events are left out; --include-transcripts adds
+the transcript text.
+
+Files are written with hive partitioning, by month and speech type:
+
+    OUT/month=2026-10/speech_type=Prepared Speech/part-000003-<run>.parquet
+
+so pandas and DuckDB can prune partitions, e.g.
+    SELECT avg(vocabulary_evaluation_score) FROM read_parquet('OUT/**/*.parquet', hive_partitioning=true, union_by_name=true)
+
+Columns are typed: scores and numeric details are float64, flags are
+booleans, timestamps are UTC microseconds and strings are dictionary
+encoded. A column whose values mix types is written as strings.
+
+Memory stays bounded: rows are buffered until --batch-rows is reached at the
+end of a user's speeches, then every partition's buffer is written as a new
+file. Users are exported in id order, and after every flush
+OUT/_checkpoint.json records the last exported user. The checkpoint only
+resumes an interrupted export: a rerun continues after that user, deleting
+files of a flush that did not reach its checkpoint, so no row is written
+twice. It is not incremental (user ids are random, and new speeches of
+exported users would be missed), so once an export completed a rerun stops;
+--restart exports everything again.
+
+Needs pyarrow (pip install pyarrow).
+
+Usage:
+    python export_analytics.py OUT [--backend firestore|sqlite|memory] [--format parquet|arrow] [--batch-rows 50000] [--concurrency 8] [--include-transcripts] [--restart]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import timezone
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
+
+from persistence.analysis_blobs import load_analysis
+from persistence.backends import STORAGE_BACKENDS, get_blob_store, get_speech_store
+from persistence.rollups import ROLLUP_METRICS
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+# Analysis fields exported as columns only with --include-transcripts, or never (lists)
+TRANSCRIPT_FIELDS = ("transcription",)
+SKIPPED_FIELDS = ("word_timeline", "pauses")
+
+SUMMARY_STRINGS = ("speech_id", "user_id", "topic", "expected_duration", "actual_duration", "audio_url")
+
+
+def duration_seconds(value):
+    """Seconds of an "MM:SS" duration, or None."""
+    try:
+        minutes, seconds = str(value).split(":")
+        return int(minutes) * 60 + int(seconds)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten(value, prefix, row):
+    """Add the scalar leaves of nested analyzer details to row, keyed by their path."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flatten(child, f"{prefix}__{key}" if prefix else str(key), row)
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        row[prefix] = value
+
+
+def partition_of(speech):
+    recorded_at = speech.get("recorded_at")
+    month = recorded_at.strftime("%Y-%m") if recorded_at else "unknown"
+    return month, speech.get("speech_type") or "unknown"
+
+
+async def speech_row(blob_store, speech_id, speech, include_transcripts):
+    recorded_at = speech.get("recorded_at")
+    row = {
+        "speech_id": speech_id,
+        "user_id": speech.get("user_id"),
+        "recorded_at": recorded_at.astimezone(timezone.utc) if recorded_at else None,
+        "topic": speech.get("topic"),
+        "expected_duration": speech.get("expected_duration"),
+        "actual_duration": speech.get("actual_duration"),
+        "actual_duration_seconds": duration_seconds(speech.get("actual_duration")),
+        "audio_url": speech.get("audio_url"),
+        "analysis_bytes": speech.get("analysis_bytes"),
+        **{metric: speech.get(metric) for metric in ROLLUP_METRICS}
+    }
+    if speech.get("analysis_blob"):
+        try:
+            analysis = await load_analysis(blob_store, speech["analysis_blob"])
+        except Exception as e:
+            print(f"Skipping details of speech {speech_id}: {str(e)}")
+            analysis = {}
+        for field, details in analysis.items():
+            if field in SKIPPED_FIELDS or (field in TRANSCRIPT_FIELDS and not include_transcripts):
+                continue
+            flatten(details, field, row)
+    elif include_transcripts:
+        # Speeches stored before analyses were kept have the transcript in the document
+        row["transcription"] = speech.get("transcription")
+    return row
+
+
+def column_type(name, values):
+    import pyarrow as pa
+
+    if name == "recorded_at":
+        return pa.timestamp("us", tz="UTC")
+    if name == "analysis_bytes":
+        return pa.int64()
+    if name in ROLLUP_METRICS or name == "actual_duration_seconds":
+        return pa.float64()
+    if name in SUMMARY_STRINGS:
+        return pa.dictionary(pa.int32(), pa.string())
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return pa.bool_()
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return pa.float64()
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def to_table(rows):
+    import pyarrow as pa
+
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    arrays = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        arrow_type = column_type(name, values)
+        if pa.types.is_dictionary(arrow_type):
+            values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=arrow_type))
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+class PartitionedWriter:
+    """Buffers rows per partition and writes each flush as new files, with a checkpoint."""
+
+    def __init__(self, out_dir, file_format, batch_rows, restart):
+        self.out_dir = out_dir
+        self.file_format = file_format
+        self.batch_rows = batch_rows
+        self.run_id = uuid.uuid4().hex[:8]
+        self.buffers = defaultdict(list)
+        self.buffered = 0
+        self.checkpoint = {"flushes": 0, "last_user_id": None, "rows": 0, "complete": False}
+
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, CHECKPOINT_FILE)
+        if restart and os.path.exists(path):
+            os.remove(path)
+        elif os.path.exists(path):
+            with open(path) as f:
+                self.checkpoint = json.load(f)
+        # Files of a flush that was interrupted before its checkpoint (all of them on restart)
+        self._remove_parts(lambda flush: flush > self.checkpoint["flushes"])
+
+    def _remove_parts(self, should_remove):
+        for path in glob.glob(os.path.join(self.out_dir, "month=*", "speech_type=*", "part-*")):
+            if should_remove(int(os.path.basename(path).split("-")[1])):
+                os.remove(path)
+
+    def add(self, partition, row):
+        self.buffers[partition].append(row)
+        self.buffered += 1
+
+    def _write(self, partition, rows, flush):
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+
+        month, speech_type = partition
+        directory = os.path.join(self.out_dir, f"month={month}", f"speech_type={quote(speech_type, safe=' ')}")
+        os.makedirs(directory, exist_ok=True)
+        extension = "parquet" if self.file_format == "parquet" else "arrow"
+        path = os.path.join(directory, f"part-{flush:06d}-{self.run_id}.{extension}")
+        table = to_table(rows)
+        # Written under a temporary name, so readers never see a partial file
+        if self.file_format == "parquet":
+            pq.write_table(table, path + ".tmp", compression="zstd")
+        else:
+            feather.write_feather(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+
+    def end_user(self, user_id):
+        """Mark a user's speeches as added; flush if the buffers are full."""
+        self.checkpoint["last_user_id"] = user_id
+        if self.buffered >= self.batch_rows:
+            self.flush()
+
+    def flush(self, complete=False):
+        flush = self.checkpoint["flushes"] + 1
+        for partition, rows in self.buffers.items():
+            self._write(partition, rows, flush)
+        self.checkpoint.update(flushes=flush, rows=self.checkpoint["rows"] + self.buffered, complete=complete)
+        path = os.path.join(self.out_dir, CHECKPOINT_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.checkpoint, f)
+        os.replace(path + ".tmp", path)
+        self.buffers.clear()
+        self.buffered = 0
+
+
+async def export(args):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("The analytics export needs pyarrow: pip install pyarrow")
+
+    store = get_speech_store(args.backend)
+    blob_store = get_blob_store(args.backend)
+    writer = PartitionedWriter(args.out_dir, args.format, args.batch_rows, args.restart)
+    if writer.checkpoint.get("complete"):
+        raise SystemExit(f"{args.out_dir} holds a completed export ({writer.checkpoint['rows']} rows); "
+                         "use --restart to export everything again")
+    resume_after = writer.checkpoint["last_user_id"]
+    if resume_after:
+        print(f"Resuming after user {resume_after} ({writer.checkpoint['rows']} rows already exported)")
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def row_of(speech_id, speech):
+        async with semaphore:
+            return partition_of(speech), await speech_row(blob_store, speech_id, speech, args.include_transcripts)
+
+    async for user_id in store.iter_user_ids():
+        if resume_after and user_id <= resume_after:
+            continue
+        tasks = [asyncio.ensure_future(row_of(speech_id, speech))
+                 async for speech_id, speech in store.iter_speeches(user_id)]
+        for partition, row in await asyncio.gather(*tasks):
+            writer.add(partition, row)
+        writer.end_user(user_id)
+    writer.flush(complete=True)
+    print(f"Exported {writer.checkpoint['rows']} rows to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", help="Output directory (also holds the checkpoint)")
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default=None,
+                        help="Store to export (default: STORAGE_BACKEND)")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--batch-rows", type=int, default=50000, help="Rows buffered before a flush")
+    parser.add_argument("--concurrency", type=int, default=8, help="Analysis blobs read at once")
+    parser.add_argument("--include-transcripts", action="store_true", help="Add the transcript text column")
+    parser.add_argument("--restart", action="store_true", help="Delete the previous export and export everything again")
+    asyncio.run(export(parser.parse_args()))
@@ -1,39 +1,61 @@
 # filepath: f:\SDGP_GIT_CONNECT\SDGP_GIT_CONNECT\Project-VocalLabs\Server\firebase_config.py
 import os
-from firebase_admin import credentials, firestore, storage
+import threading
+from firebase_admin import credentials
 import firebase_admin
 
-# Load environment variables directly (no .env file in Railway)
-private_key = os.getenv("FIREBASE_PRIVATE_KEY")
-private_key_id = os.getenv("FIREBASE_PRIVATE_KEY_ID")
-
-if not private_key or not private_key_id:
-    raise RuntimeError("FIREBASE_PRIVATE_KEY or FIREBASE_PRIVATE_KEY_ID is not set in the environment variables")
-
-# Replace escaped newlines with actual newlines in the private key
-private_key = private_key.replace("\\n", "\n")
-
-# Firebase service account key configuration
-service_account_key = {
-    "type": "service_account",
-    "project_id": "vocallabs-fc7d5",
-    "private_key_id": private_key_id,
-    "private_key": private_key,
-    "client_email": "firebase-adminsdk-fbsvc@vocallabs-fc7d5.iam.gserviceaccount.com",
-    "client_id": "113550497977436500236",
-    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-    "token_uri": "https://oauth2.googleapis.com/token",
-    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-    "client_x509_cert_url": "https://www.googleapis.com/robot/v1/metadata/x509/firebase-adminsdk-fbsvc%40vocallabs-fc7d5.iam.gserviceaccount.com",
-    "universe_domain": "googleapis.com"
-}
-
-cred = credentials.Certificate(service_account_key)
-
-# Initialize Firebase Admin SDK
-firebase_admin.initialize_app(cred, {
-    'storageBucket': 'vocallabs-fc7d5.firebasestorage.app'
-})
-
-# Firestore database instance
-db = firestore.client()
\ No newline at end of file
+# The Firebase app is initialized on first use, so the server (with a local
+# STORAGE_BACKEND) and the tools can be imported without Google credentials
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_service_account_key():
+    """Firebase service account key configuration from the environment."""
+    # Load environment variables directly (no .env file in Railway)
+    private_key = os.getenv("FIREBASE_PRIVATE_KEY")
+    private_key_id = os.getenv("FIREBASE_PRIVATE_KEY_ID")
+
+    if not private_key or not private_key_id:
+        raise RuntimeError("FIREBASE_PRIVATE_KEY or FIREBASE_PRIVATE_KEY_ID is not set in the environment variables")
+
+    # Replace escaped newlines with actual newlines in the private key
+    private_key = private_key.replace("\\n", "\n")
+
+    return {
+        "type": "service_account",
+        "project_id": "vocallabs-fc7d5",
+        "private_key_id": private_key_id,
+        "private_key": private_key,
+        "client_email": "firebase-adminsdk-fbsvc@vocallabs-fc7d5.iam.gserviceaccount.com",
+        "client_id": "113550497977436500236",
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": "https://www.googleapis.com/robot/v1/metadata/x509/firebase-adminsdk-fbsvc%40vocallabs-fc7d5.iam.gserviceaccount.com",
+        "universe_domain": "googleapis.com"
+    }
+
+
+def get_firebase_app():
+    """Initialize the Firebase Admin SDK once per process."""
+    global _app
+    with _app_lock:
+        if _app is None:
+            cred = credentials.Certificate(get_service_account_key())
+            _app = firebase_admin.initialize_app(cred, {
+                'storageBucket': 'vocallabs-fc7d5.firebasestorage.app'
+            })
+        return _app
+
+
+def get_async_db():
+    """Async Firestore client of the Firebase app."""
+    from firebase_admin import firestore_async
+    return firestore_async.client(get_firebase_app())
+
+
+def get_bucket():
+    """Default Cloud Storage bucket of the Firebase app."""
+    from firebase_admin import storage
+    return storage.bucket(app=get_firebase_app())
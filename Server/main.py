@@ -2,8 +2,13 @@ from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 import os
-from models.transcript import transcribe_audio, process_transcription
+from models.transcript import transcribe_audio
+from models.audio_frontend import AudioFrontend
+from models.word_timeline import WordTimeline
+from models.pause_events import detect_pauses
+from models.sentence_model import get_sentence_model
 from models.filler_word_detection import analyze_filler_words, analyze_mid_sentence_pauses
 from models.proficiency_evaluation import calculate_proficiency_score
 from models.voice_modulation import analyze_voice_modulation
@@ -12,27 +17,30 @@ from passlib.context import CryptContext
 import whisper
 import logging
 from nltk_download import download_nltk_resources  # Import the utility function
-from firebase_config import db
-from firebase_admin import firestore
-from firebase_admin import storage
+from persistence.audio_uploads import finish_audio_upload, remove_after_upload, start_audio_upload
 import json
+import asyncio
+import uuid
 from fastapi.encoders import jsonable_encoder
-from models.speech_effectiveness import evaluate_speech_effectiveness  # Add this import
-from models.vocabulary_evaluation import evaluate_speech  # Add this import
+from models.speech_effectiveness import evaluate_speech_effectiveness, topic_index  # Add this import
+from models.vocabulary_evaluation import evaluate_speech, get_word_frequency_data  # Add this import
 from dotenv import load_dotenv
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.staticfiles import StaticFiles
 
 # Explicitly specify the path to the .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
 
-# Debug: Check if the private key is loaded
-private_key = os.getenv("FIREBASE_PRIVATE_KEY")
-if not private_key:
-    raise RuntimeError("FIREBASE_PRIVATE_KEY is not set or improperly formatted in the .env file")
-
-# Update the service account key with the private key
-from firebase_config import service_account_key
-service_account_key["private_key"] = private_key
+# Storage backend (STORAGE_BACKEND) is read after the .env file is loaded
+from persistence.backends import get_blob_store, get_speech_store
+from persistence.blob_store import FilesystemBlobStore
+from persistence.analysis_blobs import load_analysis, save_analysis
+from persistence.speech_history import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SPEECH_PROJECTIONS,
+                                        SpeechHistoryCache)
+from persistence.rollups import ROLLUP_METRICS, progress_summary
+from persistence.score_sketches import ALL_SPEECH_TYPES, ScorePercentiles
+from persistence.transcript_index import TranscriptIndex
+from persistence.analysis_blobs import timeline_columns
 
 app = FastAPI()
 
@@ -78,6 +86,48 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # Load your transcription model here
 model = whisper.load_model("base")
 
+# Warm the topic embedding cache from the club topic catalog, if one is available
+TOPIC_CATALOG_PATH = os.getenv("TOPIC_CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "topic_catalog.txt"))
+if os.path.exists(TOPIC_CATALOG_PATH):
+    try:
+        preloaded_topics = topic_index.preload(TOPIC_CATALOG_PATH)
+        logging.info(f"Preloaded {preloaded_topics} topics from {TOPIC_CATALOG_PATH}")
+    except Exception as e:
+        logging.error(f"Error preloading topic catalog: {str(e)}")
+
+# The word frequency index is built offline; report a missing one once, at startup
+# (analyses still run, without the word complexity details)
+try:
+    get_word_frequency_data()
+except RuntimeError as e:
+    logging.error(str(e))
+
+# Users and their stored speeches (async, so handlers don't block the event loop)
+speech_store = get_speech_store()
+
+# Uploaded audio and stored analyses; local audio files are served by the app
+blob_store = get_blob_store()
+if isinstance(blob_store, FilesystemBlobStore):
+    os.makedirs(blob_store.path("audio/"), exist_ok=True)
+    app.mount(f"{blob_store.url_prefix}/audio", StaticFiles(directory=blob_store.path("audio/")), name="blobs")
+
+# Pages of each user's speech history, invalidated when the user uploads
+speech_history_cache = SpeechHistoryCache()
+
+# Score percentiles over all users' speeches, from this worker's sketch shard and the stored ones
+score_percentiles = ScorePercentiles(speech_store)
+
+# Phrase search over stored transcripts (a local SQLite FTS5 index)
+transcript_index = TranscriptIndex()
+
+@app.on_event("startup")
+async def start_score_sketch_flusher():
+    asyncio.create_task(score_percentiles.run_flusher())
+
+@app.on_event("shutdown")
+async def flush_score_sketches():
+    await score_percentiles.flush(force=True)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -86,6 +136,7 @@ class UserCreate(BaseModel):
     name: str
     email: str
     password: str
+    club_id: Optional[str] = None
 
 class UserLogin(BaseModel):
     email: str
@@ -94,31 +145,97 @@ class UserLogin(BaseModel):
 # Create user endpoint
 @app.post("/register/")
 async def register_user(user: UserCreate):
-    users_ref = db.collection("users")
-    existing_user = users_ref.where("email", "==", user.email).get()
+    existing_user = await speech_store.find_user_by_email(user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = {
         "name": user.name,
         "email": user.email,
-        "createdAt": firestore.SERVER_TIMESTAMP,
     }
-    users_ref.add(new_user)
+    if user.club_id:
+        new_user["club_id"] = user.club_id
+    batch = speech_store.batch()
+    batch.add_user(new_user)
+    await batch.commit()
 
     return {"message": "User registered successfully"}
 
 # Login user endpoint
 @app.post("/login/")
 async def login_user(user: UserLogin):
-    users_ref = db.collection("users")
-    user_docs = users_ref.where("email", "==", user.email).get()
-    if not user_docs:
+    found = await speech_store.find_user_by_email(user.email)
+    if not found:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    user_data = user_docs[0].to_dict()
+    _, user_data = found
     return {"message": "Login successful", "name": user_data["name"]}
 
+# Runtime metrics endpoint
+@app.get("/metrics/")
+async def get_metrics():
+    return {
+        "topic_index": topic_index.stats(),
+        "persistence": speech_store.latency.stats(),
+        "speech_history_cache": speech_history_cache.stats(),
+        "transcript_index": transcript_index.stats()
+    }
+
+# A user's past speeches, newest first, without transcripts
+@app.get("/users/{user_id}/speeches")
+async def list_user_speeches(user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                             fields: str = "summary"):
+    if fields not in SPEECH_PROJECTIONS:
+        raise HTTPException(status_code=422, detail=f"fields must be one of: {', '.join(SPEECH_PROJECTIONS)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    key = (fields, limit, cursor)
+    page = speech_history_cache.get(user_id, key)
+    if page is None:
+        try:
+            speeches, next_cursor = await speech_store.list_speeches(user_id, limit, cursor,
+                                                                     SPEECH_PROJECTIONS[fields])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page = jsonable_encoder({"speeches": speeches, "next_cursor": next_cursor})
+        speech_history_cache.put(user_id, key, page)
+    return JSONResponse(content=page)
+
+# Score statistics and trends of a user, read from their progress rollup
+@app.get("/users/{user_id}/progress")
+async def get_user_progress(user_id: str):
+    rollup = await speech_store.get_rollup(user_id)
+    return JSONResponse(content=progress_summary(rollup))
+
+# Speeches of a user or a club containing a phrase, with snippets and timestamps
+@app.get("/search/transcripts")
+async def search_transcripts(q: str, user_id: str = None, club_id: str = None, limit: int = DEFAULT_PAGE_SIZE):
+    if not user_id and not club_id:
+        raise HTTPException(status_code=422, detail="Pass user_id or club_id")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return await transcript_index.search(q, user_id=user_id, club_id=club_id, limit=limit)
+
+# Percentile of a score among all stored speeches (of one speech type, or all)
+@app.get("/percentiles/{metric}")
+async def get_score_percentile(metric: str, value: float, speech_type: str = ALL_SPEECH_TYPES):
+    if metric not in ROLLUP_METRICS:
+        raise HTTPException(status_code=422, detail=f"metric must be one of: {', '.join(ROLLUP_METRICS)}")
+    result = await score_percentiles.percentile(metric, value, speech_type)
+    return {"metric": metric, "value": value, "speech_type": speech_type, **result}
+
+# Complete analysis of one stored speech, read from its compressed blob
+@app.get("/users/{user_id}/speeches/{speech_id}/analysis")
+async def get_speech_analysis(user_id: str, speech_id: str):
+    speech = await speech_store.get_speech(user_id, speech_id)
+    if speech is None:
+        raise HTTPException(status_code=404, detail="Speech not found")
+    if not speech.get("analysis_blob"):
+        # Speeches stored before analyses were kept only have their transcription
+        raise HTTPException(status_code=404, detail="No stored analysis for this speech")
+
+    analysis = await load_analysis(blob_store, speech["analysis_blob"])
+    return JSONResponse(content={"speech_id": speech_id, **analysis})
+
 def generate_timing_feedback(actual_duration_str, expected_duration, speech_type):
     """Generate feedback about timing compliance based on actual vs expected duration"""
     try:
@@ -187,7 +304,8 @@ async def upload_file(file: UploadFile = File(...),
                       speech_type: str = Form(None),
                       expected_duration: str = Form(None),
                       actual_duration: str = Form(None),
-                      user_id: str = Form(...)):
+                      user_id: str = Form(...),
+                      pronunciation_mode: str = Form(None)):
     logging.info(f"Received file: {file.filename}")
     logging.info(f"Topic: {topic}, Speech Type: {speech_type}, Expected Duration: {expected_duration}, Actual Duration: {actual_duration}, User ID: {user_id}")
 
@@ -196,6 +314,7 @@ async def upload_file(file: UploadFile = File(...),
 
     # Save file locally first
     file_location = os.path.join(UPLOAD_DIR, file.filename)
+    upload = None
     try:
         # Read the file content
         file_content = await file.read()
@@ -204,36 +323,39 @@ async def upload_file(file: UploadFile = File(...),
         with open(file_location, "wb") as f:
             f.write(file_content)
 
-        # Get user data from Firestore
-        user_ref = db.collection("users").document(user_id)
-        user_data = user_ref.get().to_dict()
+        # Get user data and number the speech from the user's
+        # speech counter (one document read each, concurrently)
+        user_data, speech_number = await asyncio.gather(
+            speech_store.get_user(user_id),
+            speech_store.next_speech_number(user_id)
+        )
         user_name = user_data.get("name", "unknown_user")
 
-        # Get the number of existing speeches for the user
-        speeches_ref = user_ref.collection("speeches")
-        speech_count = len(speeches_ref.get())
+        # The speech id makes the name unique; concurrent uploads can share a number
+        speech_id = uuid.uuid4().hex[:20]
+        unique_filename = f"{user_name}_{topic}_{speech_number}_{speech_id}.wav"
 
-        # Create a unique filename
-        unique_filename = f"{user_name}_{topic}_{speech_count + 1}.wav"
+        # Upload to blob storage in the background; analysis starts right away
+        upload = start_audio_upload(blob_store, file_location, f"audio/{user_id}/{unique_filename}")
 
-        # Upload to Firebase Storage
-        bucket = storage.bucket()
-        blob = bucket.blob(f"audio/{user_id}/{unique_filename}")
-
-        # Upload from local file
-        blob.upload_from_filename(file_location)
-        blob.make_public()
-        audio_url = blob.public_url
-        logging.info(f"File uploaded to Firebase Storage: {audio_url}")
+        # Decode the audio once at 16 kHz; Whisper and the spectral analyses share it
+        audio = AudioFrontend.load(file_location)
 
         # Process the audio file
-        result = transcribe_audio(model, file_location)
+        result = transcribe_audio(model, audio)
         if not result:
             raise HTTPException(status_code=500, detail="Transcription failed")
 
-        transcription, pause_duration = process_transcription(result)
-        filler_analysis = analyze_filler_words(result)
-        pause_analysis = analyze_mid_sentence_pauses(transcription)
+        # Flatten the word timestamps once; every analysis reads the same timeline
+        word_timeline = WordTimeline.from_result(result)
+
+        # Pause metrics come from the pause events; the marker transcript is for display
+        pauses = detect_pauses(word_timeline)
+        transcription, pause_duration = pauses.transcript(), pauses.total_duration
+        filler_analysis = analyze_filler_words(word_timeline)
+        # Sentences with time spans, shared by the structure and grammar analyses
+        sentences = get_sentence_model(word_timeline)
+        pause_analysis = analyze_mid_sentence_pauses(pauses)
 
         # Convert actual_duration
         actual_duration_seconds = 0
@@ -255,17 +377,20 @@ async def upload_file(file: UploadFile = File(...),
         speech_development = evaluate_speech_development(
             transcription,
             actual_duration_seconds,
-            expected_duration
+            expected_duration,
+            sentences
         )
 
         speech_effectiveness = evaluate_speech_effectiveness(
             transcription,
             topic or "General Speech",
             expected_duration or "5-7 minutes",
-            actual_duration_seconds
+            actual_duration_seconds,
+            sentences
         )
 
-        vocabulary_evaluation = evaluate_speech(result, transcription, file_location, "general")
+        vocabulary_evaluation = evaluate_speech(word_timeline, transcription, audio, "general", sentences,
+                                                pronunciation_mode)
         timing_feedback = generate_timing_feedback(actual_duration, expected_duration, speech_type)
 
         # Generate speech type feedback
@@ -277,11 +402,16 @@ async def upload_file(file: UploadFile = File(...),
         else:
             speech_type_feedback = "Speech type feedback is unavailable."
 
+        # The stored speech links the uploaded audio
+        audio_url = await finish_audio_upload(upload)
+        logging.info(f"File uploaded to blob storage: {audio_url}")
+
         # Clean up local file
         if os.path.exists(file_location):
             os.remove(file_location)
 
-        # Store results in Firestore
+        # Store results in the speech store
+        percentiles = {}
         try:
             # Extract scores correctly from individual analysis results
             speech_development_score = (speech_development.get("structure", {}).get("score", 0) +
@@ -314,25 +444,54 @@ async def upload_file(file: UploadFile = File(...),
                 "expected_duration": expected_duration,
                 "actual_duration": actual_duration,
                 "audio_url": audio_url,
-                "transcription": transcription,
 
-                # Metadata
-                "user_id": user_id,
-                "recorded_at": firestore.SERVER_TIMESTAMP
+                # Metadata (recorded_at is set by the store)
+                "user_id": user_id
             }
 
-            # Save under the user's document in Firestore
-            speeches_ref.add(speech_data)
+            # The complete analysis is stored as a compressed blob, written
+            # before the summary so documents never point to a missing blob
+            speech_data.update(await save_analysis(blob_store, user_id, speech_id, {
+                "transcription": transcription,
+                "word_timeline": word_timeline,
+                "pauses": pauses,
+                "pause_duration": pause_duration,
+                "pause_analysis": pause_analysis,
+                "filler_analysis": filler_analysis,
+                "proficiency_scores": proficiency_scores,
+                "modulation_analysis": modulation_analysis,
+                "speech_development": speech_development,
+                "speech_effectiveness": speech_effectiveness,
+                "vocabulary_evaluation": vocabulary_evaluation,
+                "timing_feedback": timing_feedback,
+                "speech_type_feedback": speech_type_feedback
+            }))
+
+            # Save the summary under the user's document, count it and add it
+            # to their progress rollup, in one commit
+            batch = speech_store.batch()
+            batch.add_speech(user_id, speech_data, speech_id)
+            await batch.commit()
+            speech_history_cache.invalidate(user_id)
+
+            # Written to this worker's sketch shard by the background flusher
+            score_percentiles.record(speech_data)
+            percentiles = await score_percentiles.speech_percentiles(speech_data)
+
+            await transcript_index.add_speech(speech_id, user_id, timeline_columns(word_timeline),
+                                              club_id=user_data.get("club_id"), topic=topic)
 
             logging.info(f"Speech data saved for user: {user_id}")
         except Exception as db_error:
-            logging.error(f"Error storing speech data in Firestore: {str(db_error)}")
+            logging.error(f"Error storing speech data: {str(db_error)}")
             # Continue execution even if database storage fails
 
         # Prepare enhanced response
         response = {
             "message": "Speech uploaded and analyzed successfully",
+            "speech_id": speech_id,
             "speech_data": speech_data,
+            "score_percentiles": percentiles,
             "filename": unique_filename,
             "transcription": transcription,
             "pause_duration": pause_duration,
@@ -379,7 +538,6 @@ async def upload_file(file: UploadFile = File(...),
 
     except Exception as e:
         logging.error(f"Error processing file: {str(e)}")
-        # Clean up local file if it exists
-        if os.path.exists(file_location):
-            os.remove(file_location)
+        # Clean up local file if it exists (after a pending upload of it)
+        remove_after_upload(upload, file_location)
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
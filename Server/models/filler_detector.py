@@ -0,0 +1,111 @@
+import re
+from typing import Dict, Iterable, List, Union
+
+from models.word_timeline import WordTimeline, as_word_timeline
+
+# Canonical filler list shared by the server and the CLI. Multi-word fillers are
+# matched as word sequences.
+FILLER_WORDS = {
+    'um', 'uh', 'ah', 'er', 'ugh', 'like', 'you know', 'sort of', 'kind of', 'basically',
+    'literally', 'actually', 'hmm', 'huh', 'yeah', 'right', 'okay', 'well',
+    'kinda', 'gonna', 'wanna', 'i guess', 'so yeah'
+}
+
+# Punctuation Whisper attaches to words; apostrophes and hyphens are part of the word
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s'-]")
+
+_END = ''
+
+
+def clean_token(word: str) -> str:
+    """Lowercase a word and strip surrounding punctuation."""
+    return PUNCTUATION_PATTERN.sub('', word.lower()).strip()
+
+
+def _time(value: float):
+    return None if value != value else float(value)
+
+
+class FillerDetector:
+    """
+    Single-pass filler detection over a word stream.
+
+    Fillers are stored in a prefix trie of word n-grams, so each position of the
+    stream is checked against every filler at once and the whole transcript is
+    processed in O(words). At each position the longest filler wins and the
+    words it covers are consumed ('you know' is one hit, not two).
+    """
+
+    def __init__(self, fillers: Iterable[str] = FILLER_WORDS):
+        self.trie = {}
+        self.max_length = 0
+        for filler in fillers:
+            tokens = [clean_token(t) for t in filler.split()]
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = ' '.join(tokens)
+            self.max_length = max(self.max_length, len(tokens))
+
+    def detect(self, words: Union[WordTimeline, Dict, str]) -> List[Dict]:
+        """
+        Find fillers in a word stream.
+
+        Args:
+            words: Word timeline (or a Whisper result / plain text to build one from)
+
+        Returns:
+            List of hits with 'filler', 'start', 'end' and 'word_index'
+        """
+        timeline = as_word_timeline(words)
+
+        # Each distinct word is cleaned once; words that are pure punctuation
+        # are skipped without breaking n-grams
+        cleaned = [clean_token(word) for word in timeline.strings]
+        tokens = [(cleaned[t], index) for index, t in enumerate(timeline.token.tolist()) if cleaned[t]]
+
+        hits = []
+        i = 0
+        while i < len(tokens):
+            node = self.trie
+            match = None
+            for j in range(i, min(i + self.max_length, len(tokens))):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                if _END in node:
+                    match = (node[_END], j)
+            if match is None:
+                i += 1
+                continue
+
+            filler, last = match
+            hits.append({
+                'filler': filler,
+                'start': _time(timeline.start[tokens[i][1]]),
+                'end': _time(timeline.end[tokens[last][1]]),
+                'word_index': tokens[i][1]
+            })
+            i = last + 1
+        return hits
+
+    def analyze(self, words: Union[WordTimeline, Dict, str]) -> Dict:
+        """
+        Detect fillers and summarise them.
+
+        Returns:
+            Dict with 'hits', 'total', 'total_words' and 'per_minute' counts
+            (index 0 is the first minute)
+        """
+        timeline = as_word_timeline(words)
+        hits = self.detect(timeline)
+        return {
+            'hits': hits,
+            'total': len(hits),
+            'total_words': len(timeline),
+            'per_minute': timeline.per_minute([hit['word_index'] for hit in hits])
+        }
+
+
+# Shared detector for the canonical filler list
+filler_detector = FillerDetector()
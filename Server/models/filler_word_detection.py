@@ -1,37 +1,17 @@
-import re
-
-FILLER_WORDS = {
-    'um', 'uh', 'ah', 'er', 'like', 'you know', 'sort of', 'kind of', 'basically',
-    'literally', 'actually', 'hmm', 'huh', 'yeah', 'right', 'okay', 'well',
-    'kinda', 'gonna', 'wanna', 'i guess', 'so yeah'
-}
-
-def clean_word(word):
-    # Remove punctuation and extra spaces
-    cleaned = re.sub(r'[.,!?"]', '', word.lower()).strip()
-    return cleaned
+import numpy as np
+from models.filler_detector import filler_detector
+from models.pause_events import as_pause_events
 
 def analyze_filler_words(result):
     """Analyze filler words with much stricter penalties."""
-    total_filler_words = 0
-    filler_words_per_minute = {}
-    total_words = 0
-    
-    # Process each word with its timestamp
-    for segment in result['segments']:
-        for word_info in segment.get('words', []):
-            total_words += 1
-            word = clean_word(word_info['word'])
-            
-            if word in FILLER_WORDS:
-                timestamp = word_info['start']
-                minute = int(timestamp // 60)
-                total_filler_words += 1
-                
-                # Update filler words count for this minute
-                if minute not in filler_words_per_minute:
-                    filler_words_per_minute[minute] = 0
-                filler_words_per_minute[minute] += 1
+    # One pass over the word stream finds single- and multi-word fillers with their timestamps
+    # (result is the word timeline of the transcription or the raw Whisper result)
+    detection = filler_detector.analyze(result)
+    total_filler_words = detection['total']
+    total_words = detection['total_words']
+    filler_words_per_minute = {
+        minute: int(count) for minute, count in enumerate(detection['per_minute']) if count
+    }
 
     # Calculate filler word density (percentage of filler words)
     filler_density = total_filler_words / total_words if total_words > 0 else 0
@@ -68,38 +48,25 @@ def analyze_filler_words(result):
         'Total Filler Words': total_filler_words,
         'Filler Words Per Minute': minute_breakdown,
         'Filler Density': filler_density,
+        'Filler Hits': [
+            {'word': hit['filler'], 'start': hit['start'], 'end': hit['end']}
+            for hit in detection['hits']
+        ],
         'Score': round(score, 1)
     }
 
-def analyze_mid_sentence_pauses(transcription):
+def analyze_mid_sentence_pauses(pauses):
+    """Categorize the pauses that do not follow the end of a sentence."""
+    # pauses are the PauseEvents of the transcription (or a timeline / Whisper result)
+    durations = as_pause_events(pauses).mid_sentence()
+
     # Define pause categories
     pause_categories = {
-        'under_1.5': 0,
-        'between_1.5_3': 0,
-        'exceeding_3': 0,
-        'exceeding_5': 0
+        'under_1.5': int(np.count_nonzero(durations < 1.5)),
+        'between_1.5_3': int(np.count_nonzero((durations >= 1.5) & (durations <= 3))),
+        'exceeding_3': int(np.count_nonzero((durations > 3) & (durations <= 5))),
+        'exceeding_5': int(np.count_nonzero(durations > 5))
     }
-    
-    # Find all pause markers in the text
-    pause_pattern = r'\[([\d.]+) second pause\]'
-    segments = transcription.split('[')
-    
-    for i, segment in enumerate(segments[1:], 1):  # Skip first segment as it's before first pause
-        pause_match = re.match(pause_pattern, '[' + segment)
-        if pause_match:
-            pause_duration = float(pause_match.group(1))
-            # Check if previous text ends with a period
-            previous_text = segments[i-1].strip()
-            if not previous_text.endswith('.'):
-                # Categorize the pause
-                if pause_duration < 1.5:
-                    pause_categories['under_1.5'] += 1
-                elif 1.5 <= pause_duration <= 3:
-                    pause_categories['between_1.5_3'] += 1
-                elif 3 < pause_duration <= 5:
-                    pause_categories['exceeding_3'] += 1
-                else:
-                    pause_categories['exceeding_5'] += 1
 
     return {
         'Pauses under 1.5 seconds': pause_categories['under_1.5'],
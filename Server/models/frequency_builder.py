@@ -0,0 +1,285 @@
+"""
+Word frequency builder.
+
+Corpora are counted once, in parallel worker processes, and their counts are
+stored per corpus under frequency_counts/. An index is then a cheap merge of
+stored counts, so adding a corpus (or new transcripts to an existing one)
+never recounts the others. The output is the binary index loaded at runtime
+(see word_frequency.py).
+
+Each corpus belongs to a domain. The general index is built from the
+'general' corpora; a domain index (e.g. academic) from the general corpora
+plus the corpora of that domain.
+
+Usage (from the Server directory):
+    python -m models.frequency_builder build                       # general index
+    python -m models.frequency_builder add talks archive/ --domain general --append
+    python -m models.frequency_builder add papers papers/ --domain academic
+    python -m models.frequency_builder build --domain academic
+    python -m models.frequency_builder list
+"""
+import argparse
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.word_frequency import DATA_DIR, index_path, load_word_frequency_index, write_index
+
+COUNTS_DIR = os.path.join(DATA_DIR, "frequency_counts")
+
+# Corpora of the general index when nothing else has been added
+BASE_CORPORA = {
+    'brown': 'nltk:brown',
+    'webtext': 'nltk:webtext',
+    'gutenberg': 'nltk:gutenberg'
+}
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+PAUSE_MARKER_PATTERN = re.compile(r'\[\d+(?:\.\d+)? second pause\]')
+
+# Number of files counted per worker task
+FILES_PER_TASK = 16
+
+
+def _keep(word: str) -> bool:
+    # Skip non-alphabetic words and very short words (likely not real words)
+    return word.isalpha() and len(word) >= 2
+
+
+def _count_task(task: Tuple[str, List[str]]) -> Counter:
+    """Count one chunk of a corpus (runs in a worker process)."""
+    source, files = task
+    counts = Counter()
+    if source.startswith('nltk:'):
+        import nltk
+        corpus = getattr(nltk.corpus, source[len('nltk:'):])
+        counts.update(w for w in (word.lower() for word in corpus.words(files)) if _keep(w))
+    else:
+        for path in files:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = PAUSE_MARKER_PATTERN.sub(' ', f.read().lower())
+            counts.update(w for w in WORD_PATTERN.findall(text) if _keep(w))
+    return counts
+
+
+def _expand_sources(sources: List[str]) -> List[Tuple[str, List[str]]]:
+    """Turn corpus sources (nltk:<name>, text files, directories) into (source, files) units."""
+    units = []
+    for source in sources:
+        if source.startswith('nltk:'):
+            import nltk
+            corpus = getattr(nltk.corpus, source[len('nltk:'):])
+            units.extend((source, [fileid]) for fileid in corpus.fileids())
+        elif os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                units.extend(('files', [os.path.abspath(os.path.join(root, n))])
+                             for n in sorted(names) if n.endswith('.txt'))
+        elif os.path.isfile(source):
+            units.append(('files', [os.path.abspath(source)]))
+        else:
+            raise FileNotFoundError(f"Corpus source not found: {source}")
+    return units
+
+
+def _counts_path(name: str) -> str:
+    return os.path.join(COUNTS_DIR, f"{name}.npz")
+
+
+def load_counts(name: str) -> Tuple[Counter, Dict]:
+    """Stored counts and info of a corpus (empty if it has not been counted)."""
+    path = _counts_path(name)
+    if not os.path.exists(path):
+        return Counter(), {}
+    data = np.load(path, allow_pickle=False)
+    counts = Counter(dict(zip(data['words'].tolist(), data['counts'].tolist())))
+    return counts, json.loads(str(data['info']))
+
+
+def save_counts(name: str, counts: Counter, info: Dict):
+    os.makedirs(COUNTS_DIR, exist_ok=True)
+    words = sorted(counts)
+    np.savez_compressed(
+        _counts_path(name),
+        words=np.array(words, dtype=str),
+        counts=np.array([counts[w] for w in words], dtype=np.int64),
+        info=np.array(json.dumps(info))
+    )
+
+
+def list_corpora() -> Dict[str, Dict]:
+    """Info of every counted corpus by name."""
+    if not os.path.isdir(COUNTS_DIR):
+        return {}
+    corpora = {}
+    for filename in sorted(os.listdir(COUNTS_DIR)):
+        if filename.endswith('.npz'):
+            data = np.load(os.path.join(COUNTS_DIR, filename), allow_pickle=False)
+            corpora[filename[:-4]] = json.loads(str(data['info']))
+    return corpora
+
+
+def add_corpus(name: str, sources: List[str], domain: str = 'general', append: bool = False,
+               workers: Optional[int] = None) -> Dict:
+    """
+    Count a corpus in parallel and store its counts.
+
+    Args:
+        name: Corpus name
+        sources: nltk:<corpus>, text files or directories of .txt files
+        domain: Domain the corpus belongs to ('general' for the shared index)
+        append: Add to the existing counts of the corpus, skipping files that
+            were already counted (for a growing transcript archive)
+        workers: Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        Dict: Corpus info
+    """
+    counts, info = load_counts(name) if append else (Counter(), {})
+    counted = set(info.get('files', []))
+
+    units = [(source, files) for source, files in _expand_sources(sources)
+             if not (source == 'files' and files[0] in counted)]
+
+    # Group single files into tasks so each worker gets a meaningful chunk
+    tasks = []
+    for source in dict.fromkeys(source for source, _ in units):
+        files = [f for s, fs in units if s == source for f in fs]
+        tasks.extend((source, files[i:i + FILES_PER_TASK]) for i in range(0, len(files), FILES_PER_TASK))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(_count_task, tasks):
+            counts.update(partial)
+
+    info = {
+        'domain': domain,
+        'sources': sorted(set(info.get('sources', [])) | set(sources)),
+        'files': sorted(counted | {f for s, fs in units if s == 'files' for f in fs}),
+        'tokens': int(sum(counts.values())),
+        'unique_words': len(counts),
+        'updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    save_counts(name, counts, info)
+    print(f"Counted corpus '{name}' ({domain}): {info['unique_words']} words, {info['tokens']} tokens")
+    return info
+
+
+def ensure_base_corpora(workers: Optional[int] = None):
+    """Count the default NLTK corpora that have no stored counts yet."""
+    stored = list_corpora()
+    for name, source in BASE_CORPORA.items():
+        if name not in stored:
+            add_corpus(name, [source], 'general', workers=workers)
+
+
+def build_index(domain: Optional[str] = None, corpora: Optional[List[str]] = None,
+                workers: Optional[int] = None) -> str:
+    """
+    Merge stored corpus counts into the runtime index.
+
+    Args:
+        domain: Domain to build for (None or 'general' for the shared index)
+        corpora: Explicit corpus names (defaults to the general corpora plus
+            the corpora of the domain)
+        workers: Worker processes used for counting missing base corpora
+
+    Returns:
+        str: Path of the written index
+    """
+    if corpora is None:
+        ensure_base_corpora(workers)
+    stored = list_corpora()
+    if corpora is None:
+        corpora = [name for name, info in stored.items()
+                   if info.get('domain') in ('general', domain or 'general')]
+    missing = [name for name in corpora if name not in stored]
+    if missing:
+        raise ValueError(f"Corpora have not been counted: {', '.join(missing)}")
+
+    # Merge the stored counters into arrays aligned on one vocabulary
+    per_corpus = {name: load_counts(name)[0] for name in corpora}
+    vocabulary = sorted(set().union(*per_corpus.values()))
+    position = {word: i for i, word in enumerate(vocabulary)}
+    corpus_counts = np.zeros((len(corpora), len(vocabulary)), dtype=np.int64)
+    for row, name in enumerate(corpora):
+        for word, count in per_corpus[name].items():
+            corpus_counts[row, position[word]] = count
+    totals = corpus_counts.sum(axis=0)
+
+    # Rank by total count (higher percentile = more common)
+    order = np.argsort(-totals, kind='stable')
+    percentiles = np.empty(len(vocabulary), dtype=np.float64)
+    percentiles[order] = 100 - (np.arange(1, len(vocabulary) + 1) / len(vocabulary) * 100)
+
+    present = corpus_counts > 0
+    word_percentiles = {
+        word: {
+            'percentile': float(percentiles[i]),
+            'count': int(totals[i]),
+            'sources': [corpora[row] for row in np.flatnonzero(present[:, i])]
+        }
+        for i, word in enumerate(vocabulary)
+    }
+
+    corpus_stats = {
+        name: {
+            'unique_words': int(present[row].sum()),
+            'words_in_percentiles': {
+                'common (75-100)': int((present[row] & (percentiles >= 75)).sum()),
+                'moderate (25-75)': int((present[row] & (percentiles >= 25) & (percentiles < 75)).sum()),
+                'rare (0-25)': int((present[row] & (percentiles < 25)).sum())
+            }
+        }
+        for row, name in enumerate(corpora)
+    }
+    metadata = {
+        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'domain': domain or 'general',
+        'corpora_used': list(corpora),
+        'total_unique_words': len(vocabulary),
+        'corpus_stats': corpus_stats
+    }
+
+    path = index_path(domain)
+    write_index(word_percentiles, list(corpora), metadata, path)
+
+    # Also save a human-readable summary next to the index
+    with open(path[:-len('.bin')].replace('word_frequency_v3', 'word_frequency_metadata') + '.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    load_word_frequency_index(path, reload=True)
+    print(f"Built {metadata['domain']} frequency index with {len(vocabulary)} unique words "
+          f"across {len(corpora)} corpora: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="Count a corpus and store its counts")
+    add_parser.add_argument('name')
+    add_parser.add_argument('sources', nargs='+', help="nltk:<corpus>, .txt files or directories")
+    add_parser.add_argument('--domain', default='general')
+    add_parser.add_argument('--append', action='store_true', help="Only count files not counted before")
+
+    build_parser = subparsers.add_parser('build', help="Merge stored counts into the runtime index")
+    build_parser.add_argument('--domain', default=None)
+    build_parser.add_argument('--corpora', nargs='+', default=None)
+
+    subparsers.add_parser('list', help="Show counted corpora")
+    args = parser.parse_args()
+
+    if args.command == 'add':
+        add_corpus(args.name, args.sources, args.domain, args.append, args.workers)
+    elif args.command == 'build':
+        build_index(args.domain, args.corpora, args.workers)
+    else:
+        for name, info in list_corpora().items():
+            print(f"{name:<20}{info['domain']:<14}{info['unique_words']:>10} words{info['tokens']:>12} tokens"
+                  f"   updated {info['updated']}")
@@ -0,0 +1,185 @@
+import bisect
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Characters folded before matching so curly quotes and dashes in transcripts
+# match the plain-ASCII keyword lists
+CHARACTER_FOLDING = str.maketrans({'’': "'", '‘': "'", '–': '-', '—': '-'})
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class LexiconMatch(NamedTuple):
+    start: int
+    end: int
+    term: str
+    sentence: int
+
+
+class LexiconMatches:
+    """Result of one lexicon scan, grouped by category."""
+
+    def __init__(self, categories: Iterable[str], sentence_count: int = 1):
+        self.by_category: Dict[str, List[LexiconMatch]] = {category: [] for category in categories}
+        self.sentence_count = sentence_count
+
+    def _select(self, category: str, sentences: Optional[range]) -> List[LexiconMatch]:
+        matches = self.by_category.get(category, [])
+        if sentences is None:
+            return matches
+        return [m for m in matches if m.sentence in sentences]
+
+    def count(self, category: str, sentences: Optional[range] = None) -> int:
+        """Total occurrences of the category's terms (optionally within a range of sentences)."""
+        return len(self._select(category, sentences))
+
+    def found(self, category: str, sentences: Optional[range] = None) -> set:
+        """Distinct terms of the category that occur."""
+        return {m.term for m in self._select(category, sentences)}
+
+    def distinct(self, category: str, sentences: Optional[range] = None) -> int:
+        """Number of distinct terms of the category that occur."""
+        return len(self.found(category, sentences))
+
+    def any(self, category: str, sentences: Optional[range] = None) -> bool:
+        return bool(self._select(category, sentences))
+
+    def positions(self, category: str) -> List[LexiconMatch]:
+        """All matches of the category in text order."""
+        return list(self.by_category.get(category, []))
+
+    def sentences_with(self, category: str) -> List[int]:
+        """Sorted indices of the sentences that contain the category."""
+        return sorted({m.sentence for m in self.by_category.get(category, [])})
+
+
+class Lexicon:
+    """
+    Compiled multi-pattern matcher for keyword and phrase lists.
+
+    Every term of every category is compiled into one Aho-Corasick automaton,
+    so a scan reports all categories in a single pass over the text, in time
+    linear in the text length no matter how many terms are loaded. Matching is
+    case-insensitive, treats any run of whitespace as a single space and only
+    accepts matches on word boundaries. A term ending in '*' is a prefix and
+    also matches longer words ('feel*' matches 'feeling').
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        """
+        Args:
+            categories: Mapping of category name to its list of terms. A term may
+                appear in several categories.
+        """
+        self.categories = list(categories)
+        # Pattern id -> (term as listed, prefix flag, categories)
+        self.patterns = []
+        pattern_ids = {}
+        for category, terms in categories.items():
+            for term in terms:
+                prefix = term.endswith('*')
+                key = (self._normalize(term.rstrip('*')), prefix)
+                if not key[0]:
+                    continue
+                if key not in pattern_ids:
+                    pattern_ids[key] = len(self.patterns)
+                    self.patterns.append((term, prefix, []))
+                if category not in self.patterns[pattern_ids[key]][2]:
+                    self.patterns[pattern_ids[key]][2].append(category)
+        self._lengths = [len(key[0]) for key in pattern_ids]
+        self._build([key[0] for key in pattern_ids])
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.translate(CHARACTER_FOLDING).lower().split())
+
+    def _build(self, keys: List[str]):
+        # Trie: goto transitions, failure links and the pattern ids ending at each node
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern_id, key in enumerate(keys):
+            node = 0
+            for char in key:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = nxt
+            self._output[node].append(pattern_id)
+
+        # Breadth-first failure links; outputs are merged so each node lists every
+        # pattern that ends there
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scan(self, text: str) -> LexiconMatches:
+        """Find all terms of all categories in text with one pass."""
+        return self.scan_sentences([text])
+
+    def scan_sentences(self, sentences: List[str]) -> LexiconMatches:
+        """
+        Find all terms in a list of sentences with one pass over their text.
+
+        Matches never span two sentences and record the index of the sentence
+        they occur in, so callers can restrict counts to a section.
+        """
+        text = '\n'.join(sentences).translate(CHARACTER_FOLDING).lower()
+        sentence_starts = []
+        offset = 0
+        for sentence in sentences:
+            sentence_starts.append(offset)
+            offset += len(sentence) + 1
+
+        result = LexiconMatches(self.categories, len(sentences))
+        goto, fail, output = self._goto, self._fail, self._output
+
+        # Original text index of every character fed to the automaton, so that
+        # collapsed whitespace does not shift reported positions
+        consumed = []
+        node = 0
+        previous_space = True
+        for index, char in enumerate(text):
+            if char.isspace():
+                if previous_space:
+                    continue
+                char = ' '
+                previous_space = True
+            else:
+                previous_space = False
+            consumed.append(index)
+
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for pattern_id in output[node]:
+                start = consumed[len(consumed) - self._lengths[pattern_id]]
+                end = index + 1
+                term, prefix, categories = self.patterns[pattern_id]
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix and end < len(text) and _is_word_char(text[end]):
+                    continue
+                sentence = bisect.bisect_right(sentence_starts, start) - 1
+                if bisect.bisect_right(sentence_starts, end - 1) - 1 != sentence:
+                    continue
+                match = LexiconMatch(start - sentence_starts[sentence], end - sentence_starts[sentence],
+                                     term, sentence)
+                for category in categories:
+                    result.by_category[category].append(match)
+        return result
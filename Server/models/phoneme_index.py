@@ -0,0 +1,180 @@
+"""
+Process-wide CMU pronouncing dictionary index.
+
+The first pronunciation of every CMU dict word is stored as a run of integer
+phoneme ids (stress markers stripped) in one flat array with CSR offsets, and
+every phoneme id maps to a category id. A transcript is looked up with one
+vectorized search and its phoneme categories are counted with one bincount.
+
+The index is built from nltk's cmudict once, cached next to the application
+as phoneme_index.npz, and shared by every analyzer in the process.
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Phonetic categories used for pronunciation analysis (ARPAbet, no stress)
+PHONEME_CATEGORIES = {
+    'vowels': ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY', 'OW', 'OY', 'UH', 'UW'],
+    'stops': ['B', 'D', 'G', 'K', 'P', 'T'],
+    'fricatives': ['DH', 'F', 'S', 'SH', 'TH', 'V', 'Z', 'ZH'],
+    'affricates': ['CH', 'JH'],
+    'nasals': ['M', 'N', 'NG'],
+    'liquids': ['L', 'R'],
+    'glides': ['W', 'Y', 'HH']
+}
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "phoneme_index.npz"
+)
+
+
+class PhonemeIndex:
+    """CSR phoneme-id arrays for the CMU dictionary with precomputed categories."""
+
+    def __init__(self, words: np.ndarray, offsets: np.ndarray, phonemes: np.ndarray, phoneme_names: List[str]):
+        """
+        Args:
+            words: Sorted vocabulary
+            offsets: CSR offsets; word i owns phonemes[offsets[i]:offsets[i + 1]]
+            phonemes: Flat phoneme ids
+            phoneme_names: Name of every phoneme id
+        """
+        self.words = words
+        self.offsets = offsets
+        self.phonemes = phonemes
+        self.phoneme_names = list(phoneme_names)
+        self.categories = list(PHONEME_CATEGORIES)
+
+        # Category id of every phoneme id; phonemes outside the categories get
+        # the extra id len(categories) and are only counted in the total
+        category_of = {p: c for c, phonemes in enumerate(PHONEME_CATEGORIES.values()) for p in phonemes}
+        self.phoneme_category = np.array(
+            [category_of.get(name, len(self.categories)) for name in self.phoneme_names], dtype=np.int64
+        )
+
+    @classmethod
+    def from_cmudict(cls, pronunciations: Dict[str, List[List[str]]]) -> 'PhonemeIndex':
+        """Build the index from cmudict.dict() (first pronunciation of each word)."""
+        phoneme_names = sorted({p for phonemes in PHONEME_CATEGORIES.values() for p in phonemes})
+        phoneme_ids = {name: i for i, name in enumerate(phoneme_names)}
+
+        words = sorted(w for w, prons in pronunciations.items() if prons)
+        offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        flat = []
+        for i, word in enumerate(words):
+            for phoneme in pronunciations[word][0]:
+                # Strip stress markers (numbers) from phoneme
+                base = phoneme.rstrip('012')
+                if base not in phoneme_ids:
+                    phoneme_ids[base] = len(phoneme_names)
+                    phoneme_names.append(base)
+                flat.append(phoneme_ids[base])
+            offsets[i + 1] = len(flat)
+
+        return cls(np.array(words), offsets, np.array(flat, dtype=np.uint8), phoneme_names)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'PhonemeIndex':
+        data = np.load(path, allow_pickle=False)
+        return cls(data['words'], data['offsets'], data['phonemes'], data['phoneme_names'].tolist())
+
+    def save(self, path: str = DEFAULT_INDEX_PATH):
+        # Written under a unique temporary name and renamed, so readers (other
+        # workers starting up) never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, words=self.words, offsets=self.offsets, phonemes=self.phonemes,
+                         phoneme_names=np.array(self.phoneme_names))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def lookup(self, words: List[str]) -> np.ndarray:
+        """Row of every word in the index (-1 for words not in the dictionary)."""
+        if not words or self.words.size == 0:
+            return np.full(len(words), -1, dtype=np.int64)
+        queries = np.array(words)
+        rows = np.searchsorted(self.words, queries)
+        rows = np.minimum(rows, self.words.size - 1)
+        return np.where(self.words[rows] == queries, rows, -1)
+
+    def _gather(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Phoneme ids of all known words and the transcript position of the word each belongs to."""
+        rows = self.lookup(words)
+        word_positions = np.flatnonzero(rows >= 0)
+        rows = rows[word_positions]
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # Gather the CSR slices without a Python loop
+        run_starts = np.cumsum(lengths) - lengths
+        positions = np.arange(total) - np.repeat(run_starts, lengths) + np.repeat(starts, lengths)
+        return self.phonemes[positions].astype(np.int64), np.repeat(word_positions, lengths)
+
+    def phoneme_ids(self, words: List[str]) -> np.ndarray:
+        """Concatenated phoneme ids of all known words, in transcript order."""
+        return self._gather(words)[0]
+
+    def word_category_counts(self, words: List[str]) -> np.ndarray:
+        """
+        Phoneme category counts per word.
+
+        Returns:
+            (len(words), len(categories)) array; rows of unknown words are zero
+        """
+        ids, word_positions = self._gather(words)
+        n_categories = len(self.categories) + 1
+        flat = word_positions * n_categories + self.phoneme_category[ids]
+        counts = np.bincount(flat, minlength=len(words) * n_categories).reshape(len(words), n_categories)
+        return counts[:, :-1]
+
+    def category_counts(self, words: List[str]) -> Tuple[Dict[str, int], int]:
+        """
+        Phoneme category counts for a whole transcript.
+
+        Returns:
+            Tuple of {category: count} for categories that occur and the total
+            number of phonemes
+        """
+        ids = self.phoneme_ids(words)
+        counts = np.bincount(self.phoneme_category[ids], minlength=len(self.categories) + 1)
+        return (
+            {category: int(counts[c]) for c, category in enumerate(self.categories) if counts[c]},
+            int(ids.size)
+        )
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_phoneme_index(path: str = DEFAULT_INDEX_PATH) -> PhonemeIndex:
+    """Return the shared index, loading the cache or building it from cmudict on first use."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                if os.path.exists(path):
+                    try:
+                        _index = PhonemeIndex.load(path)
+                    except Exception as e:
+                        # A damaged cache (e.g. left by a killed writer) is rebuilt and rewritten
+                        logging.error(f"Could not load phoneme index from {path}, rebuilding it: {e}")
+                if _index is None:
+                    from nltk.corpus import cmudict
+                    _index = PhonemeIndex.from_cmudict(cmudict.dict())
+                    try:
+                        _index.save(path)
+                    except OSError as e:
+                        print(f"Could not cache phoneme index at {path}: {e}")
+    return _index
@@ -0,0 +1,101 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Sentence boundaries and the pause markers written by process_transcription
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+')
+PAUSE_MARKER_PATTERN = re.compile(r'\[\d+(?:\.\d+)? second pause\]')
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces; 128 words stays safely below that
+MAX_CHUNK_WORDS = 128
+
+# Sentences at or above this similarity count as on-topic for the coverage ratio
+ON_TOPIC_THRESHOLD = 0.3
+
+
+def split_into_chunks(text: str, max_words: int = MAX_CHUNK_WORDS) -> List[str]:
+    """
+    Split a transcript into sentences, breaking run-on sentences into windows
+    short enough for the embedding model to see every word.
+    """
+    text = PAUSE_MARKER_PATTERN.sub(' ', text)
+    chunks = []
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(text):
+        words = sentence.split()
+        for i in range(0, len(words), max_words):
+            chunks.append(' '.join(words[i:i + max_words]))
+    return chunks
+
+
+class RelevanceEngine:
+    """
+    Sentence-level topic relevance.
+
+    All sentences of a speech are encoded in one batched call and compared with
+    the topic embeddings in a single matrix product, so the whole speech is
+    scored (not just the first 256 word pieces) and the cost grows linearly with
+    its length.
+    """
+
+    def __init__(self, encode: Callable, batch_size: int = 64):
+        """
+        Args:
+            encode: Callable taking a list of texts (and batch_size) and returning
+                a 2D embedding array
+            batch_size: Number of sentences encoded per forward pass
+        """
+        self.encode = encode
+        self.batch_size = batch_size
+
+    def analyze(self, text: str, topic_embeddings: np.ndarray,
+                sentences: Optional[List[str]] = None) -> Dict:
+        """
+        Score a speech against one or more topic embeddings.
+
+        Args:
+            text: Speech transcript
+            topic_embeddings: Array of shape (dim,) or (k, dim); row 0 is the topic
+                itself, further rows are alternative interpretations
+            sentences: Optional pre-split sentences (otherwise derived from text)
+
+        Returns:
+            Dict with the aggregate 'score' (similarity to row 0), 'variant_scores'
+            for every row, on-topic 'coverage' and a per-sentence 'timeline'
+        """
+        topics = np.atleast_2d(np.asarray(topic_embeddings, dtype=np.float32))
+        topics = topics / np.maximum(np.linalg.norm(topics, axis=1, keepdims=True), 1e-12)
+
+        chunks = [c for s in sentences for c in split_into_chunks(s)] if sentences is not None \
+            else split_into_chunks(text)
+        if not chunks:
+            return {
+                'score': 0.0,
+                'variant_scores': [0.0] * len(topics),
+                'coverage': 0.0,
+                'timeline': []
+            }
+
+        embeddings = np.asarray(self.encode(chunks, batch_size=self.batch_size), dtype=np.float32)
+        embeddings = embeddings.reshape(len(chunks), -1)
+        units = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        # Per-sentence similarity to every topic row in one operation: (n, k)
+        similarities = units @ topics.T
+
+        # Speech-level embedding: word-count weighted centroid of the sentence embeddings
+        weights = np.array([len(c.split()) for c in chunks], dtype=np.float32)
+        centroid = weights @ units
+        centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+        variant_scores = topics @ centroid
+
+        topic_similarities = similarities[:, 0]
+        return {
+            'score': float(variant_scores[0]),
+            'variant_scores': [float(v) for v in variant_scores],
+            'coverage': float(np.mean(topic_similarities >= ON_TOPIC_THRESHOLD)),
+            'timeline': [
+                {'index': i, 'text': chunk, 'similarity': round(float(sim), 4)}
+                for i, (chunk, sim) in enumerate(zip(chunks, topic_similarities))
+            ]
+        }
@@ -1,6 +1,5 @@
 import re
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from collections import Counter
@@ -9,6 +8,8 @@ import string
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from models.lexicon import Lexicon
+from models.sentence_model import get_sentence_model
 
 # Ensure NLTK data is downloaded
 def download_nltk_data():
@@ -73,12 +74,36 @@ SECTION_TRANSITIONS = [
     'now that we understand', 'building on this idea', 'this leads us to'
 ]
 
-def analyze_speech_structure(transcription):
+# Cue word pairs that reveal how the body is organised, checked in order
+BODY_ORGANIZATION_CUES = [
+    ('sequential', ('first', 'second')),
+    ('sequential', ('one', 'another')),
+    ('sequential', ('first', 'next')),
+    ('comparative', ('however', 'despite')),
+    ('comparative', ('advantage', 'disadvantage')),
+    ('comparative', ('pros', 'cons')),
+    ('causal', ('because', 'therefore')),
+    ('causal', ('cause', 'effect')),
+    ('causal', ('leads to', 'results in'))
+]
+
+# All keyword lists compiled once and matched in a single pass per speech
+STRUCTURE_LEXICON = Lexicon({
+    'intro': INTRO_KEYWORDS,
+    'conclusion': CONCLUSION_KEYWORDS,
+    'transition': TRANSITION_KEYWORDS,
+    'body_start': BODY_START_KEYWORDS,
+    'section_transition': SECTION_TRANSITIONS,
+    'organization': [cue for _, pair in BODY_ORGANIZATION_CUES for cue in pair]
+})
+
+def analyze_speech_structure(transcription, sentences=None):
     """
     Analyze the structure of a speech based on its transcription.
     
     Parameters:
     transcription (str): The transcribed speech text
+    sentences (SentenceModel): Optional sentence model of the transcription (with timings)
     
     Returns:
     dict: Analysis of the speech structure with scores
@@ -88,8 +113,9 @@ def analyze_speech_structure(transcription):
     # Clean text from pause markers
     cleaned_text = re.sub(r'\[\d+\.\d+ second pause\]', '', transcription)
     
-    # Break into sentences
-    sentences = sent_tokenize(cleaned_text)
+    # Break into sentences (from the Whisper timeline when available, punkt otherwise)
+    sentence_model = get_sentence_model(sentences if sentences is not None else cleaned_text)
+    sentences = sentence_model.sentences
     
     if not sentences:
         return {
@@ -103,6 +129,7 @@ def analyze_speech_structure(transcription):
                 "body": 0,
                 "conclusion": 0
             },
+            "section_durations": None,
             "coherence_score": 0,
             "section_completeness": "incomplete"
         }
@@ -111,21 +138,10 @@ def analyze_speech_structure(transcription):
     
     # Improved section detection algorithm
     # First, scan for clear indicators of introduction and conclusion
-    intro_markers = []
-    conclusion_markers = []
-    
-    # Detect introduction and conclusion markers with their positions
-    for i, sentence in enumerate(sentences):
-        sentence_lower = sentence.lower()
-        for keyword in INTRO_KEYWORDS:
-            if keyword in sentence_lower:
-                intro_markers.append((i, keyword))
-                break
-                
-        for keyword in CONCLUSION_KEYWORDS:
-            if keyword in sentence_lower:
-                conclusion_markers.append((i, keyword))
-                break
+    # (one scan of the speech finds every keyword category at once)
+    matches = STRUCTURE_LEXICON.scan_sentences(sentences)
+    intro_markers = matches.sentences_with('intro')
+    conclusion_markers = matches.sentences_with('conclusion')
     
     # Determine introduction and conclusion boundaries
     intro_end = int(total_sentences * 0.2)  # Default: first 20%
@@ -133,14 +149,12 @@ def analyze_speech_structure(transcription):
     
     # If we found introduction markers, use the last one to mark introduction end
     if intro_markers:
-        intro_positions = [pos for pos, _ in intro_markers]
-        last_intro_pos = max(intro_positions)
+        last_intro_pos = max(intro_markers)
         intro_end = min(last_intro_pos + 3, int(total_sentences * 0.3))  # Add a few sentences, cap at 30%
     
     # If we found conclusion markers, use the first one to mark conclusion start
     if conclusion_markers:
-        conclusion_positions = [pos for pos, _ in conclusion_markers]
-        first_conclusion_pos = min(conclusion_positions)
+        first_conclusion_pos = min(conclusion_markers)
         conclusion_start = max(first_conclusion_pos - 1, int(total_sentences * 0.7))  # Back up a sentence, floor at 70%
     
     # Ensure body section exists
@@ -159,6 +173,9 @@ def analyze_speech_structure(transcription):
     body_proportion = len(body_section) / total_sentences
     conclusion_proportion = len(conclusion_section) / total_sentences
     
+    # Section lengths in seconds (None without word timings)
+    section_seconds = sentence_model.section_durations([intro_end, conclusion_start])
+    
     # Score section proportions (ideal: intro 10-20%, body 60-80%, conclusion 10-20%)
     proportion_score = 100
     
@@ -187,47 +204,24 @@ def analyze_speech_structure(transcription):
     else:
         section_completeness = "incomplete"
     
-    # Convert sections to text for analysis
-    intro_text = ' '.join(intro_section).lower()
-    body_text = ' '.join(body_section).lower()
-    conclusion_text = ' '.join(conclusion_section).lower()
+    # Restrict the keyword matches to the body sentences
+    body_range = range(intro_end, conclusion_start)
     
     # Count transitions in the body
-    body_words = word_tokenize(body_text)
-    body_transition_count = sum(1 for word in body_words if word in TRANSITION_KEYWORDS)
+    body_transition_count = matches.count('transition', body_range)
     
     # Enhanced: Check for section-to-section transitions
-    section_transition_count = 0
-    for phrase in SECTION_TRANSITIONS:
-        if phrase in body_text:
-            section_transition_count += 1
+    section_transition_count = matches.distinct('section_transition', body_range)
     
     # Enhanced: Detect body organization
     body_organization = "unclear"
-    if any(keyword in body_text for keyword in BODY_START_KEYWORDS):
-        # Check for sequential ordering words
-        if all(keyword in body_text for keyword in ['first', 'second']):
-            body_organization = "sequential"
-        elif all(keyword in body_text for keyword in ['one', 'another']):
-            body_organization = "sequential"
-        elif all(keyword in body_text for keyword in ['first', 'next']):
-            body_organization = "sequential"
-        # Check for comparative structure
-        elif all(keyword in body_text for keyword in ['however', 'despite']):
-            body_organization = "comparative"
-        elif all(keyword in body_text for keyword in ['advantage', 'disadvantage']):
-            body_organization = "comparative"
-        elif all(keyword in body_text for keyword in ['pros', 'cons']):
-            body_organization = "comparative"
-        # Check for causal structure
-        elif all(keyword in body_text for keyword in ['because', 'therefore']):
-            body_organization = "causal"
-        elif all(keyword in body_text for keyword in ['cause', 'effect']):
-            body_organization = "causal"
-        elif all(keyword in body_text for keyword in ['leads to', 'results in']):
-            body_organization = "causal"
-        else:
-            body_organization = "topical"  # Default if we found start but no clear pattern
+    if matches.any('body_start', body_range):
+        # Sequential, comparative or causal cue pairs; topical if none is complete
+        body_cues = matches.found('organization', body_range)
+        body_organization = next(
+            (organization for organization, pair in BODY_ORGANIZATION_CUES if body_cues.issuperset(pair)),
+            "topical"
+        )
     
     # Calculate coherence score based on transitions between sections
     coherence_score = 70  # Base score
@@ -290,6 +284,7 @@ def analyze_speech_structure(transcription):
             "body": round(body_proportion * 100, 1),
             "conclusion": round(conclusion_proportion * 100, 1)
         },
+        "section_durations": dict(zip(("introduction", "body", "conclusion"), section_seconds)) if section_seconds else None,
         "coherence_score": coherence_score,
         "section_completeness": section_completeness,
         "section_transition_count": section_transition_count
@@ -395,7 +390,7 @@ def get_rating_description(score):
     else:
         return "Needs Improvement"
 
-def evaluate_speech_development(transcription: str, actual_duration: int, expected_duration: str) -> dict:
+def evaluate_speech_development(transcription: str, actual_duration: int, expected_duration: str, sentences=None) -> dict:
     """
     Evaluate the development of a speech based on structure and time utilization.
     
@@ -403,12 +398,13 @@ def evaluate_speech_development(transcription: str, actual_duration: int, expect
     transcription (str): The transcribed speech text
     actual_duration (int): Actual duration in seconds
     expected_duration (str): Expected duration string (e.g., "5–7 minutes")
+    sentences (SentenceModel): Optional sentence model built from the Whisper timeline
     
     Returns:
     dict: Complete speech development evaluation with structure and time utilization analysis
     """
     # Analyze structure
-    structure_analysis = analyze_speech_structure(transcription)
+    structure_analysis = analyze_speech_structure(transcription, sentences)
     
     # Evaluate time utilization with structure information
     time_analysis = evaluate_time_utilization(actual_duration, expected_duration)
@@ -1,18 +1,79 @@
-from sentence_transformers import SentenceTransformer
 import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
 from typing import List, Dict, Tuple
 import spacy
 import re
+import os
+from models.topic_index import TopicIndex
+from models.relevance_engine import RelevanceEngine
+from models.embedding_backend import get_embedding_backend
+from models.lexicon import Lexicon, LexiconMatches
+from models.sentence_model import SentenceModel, get_sentence_model
 
 # Initialize models
-sbert_model = SentenceTransformer('all-MiniLM-L6-v2')
+SBERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Quantized ONNX Runtime model when exported, PyTorch otherwise (EMBEDDING_BACKEND)
+sbert_model = get_embedding_backend(SBERT_MODEL_NAME)
 nlp = spacy.load('en_core_web_sm')
 
+# Marker lists used by the structure, narrative and creativity analyzers.
+# Terms ending in '*' also match inflected forms ('feel*' matches 'feeling').
+DISCOURSE_MARKERS = {
+    'introduction': ['first', 'to begin', 'introduction', 'topic', 'discuss'],
+    'transition': ['however', 'moreover', 'furthermore', 'additionally', 'therefore', 'consequently'],
+    'conclusion': ['finally', 'in conclusion', 'to summarize', 'thus', 'in summary']
+}
+STORY_MARKERS = ['once', 'when i was', 'there was', 'story']
+NARRATIVE_METAPHOR_MARKERS = ['like', 'as if', 'symbolizes', 'represents', 'means']
+LESSON_MARKERS = ['realize*', 'learned', 'understand*', 'truth', 'lesson*']
+EMOTIONAL_WORDS = ['feel*', 'felt', 'heart*', 'love*', 'fear*', 'hope*', 'dream*', 'scared']
+METAPHOR_MARKERS = [
+    'like', 'as', 'symbolizes', 'represents', 'means',
+    'metaphor', 'comparison', 'similar to', 'just as',
+    'reflects', 'mirrors', 'parallels'
+]
+LITERARY_DEVICES = [
+    'rose', 'journey', 'path', 'light', 'darkness',
+    'heart', 'bridge', 'door', 'window', 'book'
+]
+ARTISTIC_ELEMENTS = [
+    'book', 'story', 'author', 'art', 'music',
+    'poem', 'novel', 'character', 'literature',
+    'culture', 'creative', 'artistic'
+]
+STORY_ELEMENTS = [
+    'once', 'when', 'story', 'then', 'finally',
+    'first', 'next', 'later', 'eventually',
+    'in the end', 'learned', 'realized'
+]
+INTERPRETIVE_MARKERS = [
+    'meaning', 'represents', 'symbolizes', 'teaches',
+    'shows', 'illustrates', 'demonstrates', 'reflects'
+]
+
+# Every marker list compiled once; a speech is scanned a single time for all of them
+EFFECTIVENESS_LEXICON = Lexicon({
+    **{f'discourse_{category}': markers for category, markers in DISCOURSE_MARKERS.items()},
+    'story': STORY_MARKERS,
+    'narrative_metaphor': NARRATIVE_METAPHOR_MARKERS,
+    'lesson': LESSON_MARKERS,
+    'emotional': EMOTIONAL_WORDS,
+    'metaphor': METAPHOR_MARKERS,
+    'literary': LITERARY_DEVICES,
+    'artistic': ARTISTIC_ELEMENTS,
+    'story_element': STORY_ELEMENTS,
+    'interpretive': INTERPRETIVE_MARKERS,
+    'intro_cue': ['introduce*', 'begin*'],
+    'conclusion_cue': ['conclusion', 'finally']
+})
+
+def scan_markers(speech_text: str, sentences: SentenceModel = None) -> LexiconMatches:
+    """Match every marker list against the speech, sentence by sentence, in one pass."""
+    return EFFECTIVENESS_LEXICON.scan_sentences(get_sentence_model(sentences if sentences is not None else speech_text).sentences)
+
 def preprocess_text(text: str) -> str:
     """Clean and preprocess text for analysis."""
     # Tokenize and lemmatize
@@ -31,15 +92,13 @@ def preprocess_text(text: str) -> str:
 
 def compute_semantic_similarity(speech_text: str, topic: str) -> float:
     """Compute semantic similarity between speech and topic using SBERT."""
-    # Encode texts
-    speech_embedding = sbert_model.encode(speech_text)
-    topic_embedding = sbert_model.encode(topic)
-    
-    # Calculate cosine similarity
-    similarity = np.dot(speech_embedding, topic_embedding) / \
-                (np.linalg.norm(speech_embedding) * np.linalg.norm(topic_embedding))
-    
-    return float(similarity)
+    # Every sentence is encoded (no truncation); the topic embedding comes from the topic index
+    topic_embedding = topic_index.get(topic)['embedding']
+    return relevance_engine.analyze(speech_text, topic_embedding)['score']
+
+def compute_topic_relevance(speech_text: str, topic_entry: Dict) -> Dict:
+    """Sentence-level relevance of the speech to every cached variant of a topic, in one pass."""
+    return relevance_engine.analyze(speech_text, topic_entry['unit_variant_embeddings'])
 
 def extract_keywords(text: str, n: int = 10) -> List[str]:
     """Extract top n keywords from text using TF-IDF."""
@@ -56,9 +115,11 @@ def extract_keywords(text: str, n: int = 10) -> List[str]:
     
     return [word for word, _ in keyword_scores[:n]]
 
-def analyze_speech_structure(speech_text: str) -> Dict:
+def analyze_speech_structure(speech_text: str, markers: LexiconMatches = None,
+                             sentences: SentenceModel = None) -> Dict:
     """Analyze the structure and coherence of the speech."""
-    sentences = sent_tokenize(speech_text)
+    sentence_model = get_sentence_model(sentences if sentences is not None else speech_text)
+    sentences = sentence_model.sentences
     num_sentences = len(sentences)
     
     # More lenient section detection for shorter speeches
@@ -98,9 +159,10 @@ def analyze_speech_structure(speech_text: str) -> Dict:
         'has_intro': bool(intro and len(intro.split()) >= 3),
         'has_body': bool(body and len(body.split()) >= 5),
         'has_conclusion': bool(conclusion and len(conclusion.split()) >= 3),
-        'has_discourse_markers': _check_discourse_markers(speech_text),
+        'has_discourse_markers': _check_discourse_markers(speech_text, markers),
         'topic_consistency': topic_consistency,
         'num_sentences': num_sentences,
+        'section_durations': sentence_model.section_durations([intro_end, body_end]),
         'sections': {
             'intro': intro,
             'body': body,
@@ -108,25 +170,16 @@ def analyze_speech_structure(speech_text: str) -> Dict:
         }
     }
 
-def _check_discourse_markers(text: str) -> float:
+def _check_discourse_markers(text: str, markers: LexiconMatches = None) -> float:
     """Check for discourse markers and return a score based on their usage."""
-    discourse_markers = {
-        'introduction': ['first', 'to begin', 'introduction', 'topic', 'discuss'],
-        'transition': ['however', 'moreover', 'furthermore', 'additionally', 'therefore', 'consequently'],
-        'conclusion': ['finally', 'in conclusion', 'to summarize', 'thus', 'in summary']
-    }
-    
-    text_lower = text.lower()
-    total_markers = 0
-    for category, markers in discourse_markers.items():
-        for marker in markers:
-            if marker in text_lower:
-                total_markers += 1
+    markers = markers or scan_markers(text)
+    total_markers = sum(markers.distinct(f'discourse_{category}') for category in DISCOURSE_MARKERS)
     
     # Return a normalized score (0-1)
     return min(1.0, total_markers / 5)  # Expecting at least 5 markers for full score
 
-def evaluate_speech_effectiveness(speech_text: str, topic: str, expected_duration: str = "5-7 minutes", actual_duration_seconds: int = 0) -> Dict:
+def evaluate_speech_effectiveness(speech_text: str, topic: str, expected_duration: str = "5-7 minutes", actual_duration_seconds: int = 0,
+                                  sentences: SentenceModel = None) -> Dict:
     """Main function to evaluate speech effectiveness."""
     # Input validation and logging
     if not speech_text or not topic:
@@ -148,20 +201,25 @@ def evaluate_speech_effectiveness(speech_text: str, topic: str, expected_duratio
     processed_speech = preprocess_text(speech_text)
     processed_topic = preprocess_text(topic)
     
-    # Enhanced topic interpretation for creative speeches
-    topic_variations = generate_topic_variations(topic)
+    # Topic embedding, its creative interpretations and keywords come from the cache
+    topic_entry = topic_index.get(topic)
+    
+    # Sentences are segmented once (from the Whisper timeline when given)
+    sentences = get_sentence_model(sentences if sentences is not None else speech_text)
+    
+    # All marker lists are matched in a single scan shared by the analyzers below
+    markers = scan_markers(speech_text, sentences)
     
     # Enhanced analysis components
-    structure_analysis = analyze_speech_structure(speech_text)
-    narrative_score = analyze_narrative_elements(speech_text)
-    creative_elements = analyze_creative_elements(speech_text, topic)
+    structure_analysis = analyze_speech_structure(speech_text, markers, sentences)
+    narrative_score = analyze_narrative_elements(speech_text, markers)
+    creative_elements = analyze_creative_elements(speech_text, topic, topic_entry['keywords'], markers)
     
     # Calculate enhanced relevance score with creative consideration
-    base_relevance = compute_semantic_similarity(speech_text, topic)
-    creative_relevance = max(
-        compute_semantic_similarity(speech_text, variation)
-        for variation in topic_variations
-    )
+    # (all sentences are encoded in one batch and compared against all variations together)
+    topic_relevance = compute_topic_relevance(speech_text, topic_entry)
+    base_relevance = topic_relevance['variant_scores'][0]
+    creative_relevance = max(topic_relevance['variant_scores'])
     
     # Use the better of direct or creative relevance
     effective_relevance = max(base_relevance, creative_relevance)
@@ -196,7 +254,9 @@ def evaluate_speech_effectiveness(speech_text: str, topic: str, expected_duratio
         'details': {
             'narrative_elements': narrative_score,
             'creative_elements': creative_elements,
-            'structure': structure_analysis
+            'structure': structure_analysis,
+            'relevance_coverage': topic_relevance['coverage'],
+            'relevance_timeline': topic_relevance['timeline']
         },
         'feedback': generate_feedback(relevance_score, final_purpose_score, structure_analysis)
     }
@@ -219,8 +279,25 @@ def generate_topic_variations(topic: str) -> List[str]:
     
     return variations
 
-def analyze_narrative_elements(speech_text: str) -> Dict:
+def extract_topic_keywords(topic: str) -> set:
+    """Keyword set of a topic, as used for direct topic mentions."""
+    return set(word_tokenize(topic.lower()))
+
+# Topic embeddings are shared across requests and persisted across restarts
+topic_index = TopicIndex(
+    encode=lambda texts: sbert_model.encode(texts),
+    model_name=f"{SBERT_MODEL_NAME}:{sbert_model.name}",
+    variations=generate_topic_variations,
+    keywords=extract_topic_keywords,
+    capacity=int(os.getenv("TOPIC_INDEX_CAPACITY", "512"))
+)
+
+# Sentence-level relevance scoring over the whole speech
+relevance_engine = RelevanceEngine(encode=sbert_model.encode)
+
+def analyze_narrative_elements(speech_text: str, markers: LexiconMatches = None) -> Dict:
     """Analyze storytelling and narrative elements."""
+    markers = markers or scan_markers(speech_text)
     narrative_elements = {
         'has_story': False,
         'has_characters': False,
@@ -230,35 +307,33 @@ def analyze_narrative_elements(speech_text: str) -> Dict:
     }
     
     # Story detection
-    story_markers = ['once', 'when i was', 'there was', 'story']
-    narrative_elements['has_story'] = any(marker in speech_text.lower() for marker in story_markers)
+    narrative_elements['has_story'] = markers.any('story')
     
     # Character detection
     character_patterns = r'\b(he|she|they|their|someone|people|person)\b'
     narrative_elements['has_characters'] = bool(re.findall(character_patterns, speech_text.lower()))
     
     # Metaphor detection
-    metaphor_markers = ['like', 'as if', 'symbolizes', 'represents', 'means']
-    narrative_elements['has_metaphor'] = any(marker in speech_text.lower() for marker in metaphor_markers)
+    narrative_elements['has_metaphor'] = markers.any('narrative_metaphor')
     
     # Lesson/moral detection
-    lesson_markers = ['realize', 'learned', 'understand', 'truth', 'lesson']
-    narrative_elements['has_lesson'] = any(marker in speech_text.lower() for marker in lesson_markers)
+    narrative_elements['has_lesson'] = markers.any('lesson')
     
     # Emotional connection scoring
-    emotional_words = ['feel', 'felt', 'heart', 'love', 'fear', 'hope', 'dream', 'scared']
-    emotional_count = sum(speech_text.lower().count(word) for word in emotional_words)
+    emotional_count = markers.count('emotional')
     narrative_elements['emotional_connection'] = min(1.0, emotional_count / 10)
     
     return narrative_elements
 
-def analyze_creative_elements(speech_text: str, topic: str) -> Dict:
+def analyze_creative_elements(speech_text: str, topic: str, topic_keywords: set = None,
+                              markers: LexiconMatches = None) -> Dict:
     """Analyze creative and artistic elements."""
+    markers = markers or scan_markers(speech_text)
     return {
-        'metaphor_strength': detect_metaphor_strength(speech_text),
-        'artistic_references': detect_artistic_references(speech_text),
-        'creative_structure': analyze_creative_structure(speech_text),
-        'topic_creativity': measure_topic_creativity(speech_text, topic)
+        'metaphor_strength': detect_metaphor_strength(speech_text, markers),
+        'artistic_references': detect_artistic_references(speech_text, markers),
+        'creative_structure': analyze_creative_structure(speech_text, markers),
+        'topic_creativity': measure_topic_creativity(speech_text, topic, topic_keywords, markers)
     }
 
 def calculate_purpose_achievement(speech_text: str, structure_analysis: Dict, narrative_score: Dict, creative_elements: Dict) -> Dict:
@@ -315,74 +390,51 @@ def scale_purpose_score(purpose_data: Dict) -> float:
     
     return final_score
 
-def detect_metaphor_strength(text: str) -> float:
+def detect_metaphor_strength(text: str, markers: LexiconMatches = None) -> float:
     """Detect and score metaphorical language."""
-    metaphor_markers = [
-        'like', 'as', 'symbolizes', 'represents', 'means',
-        'metaphor', 'comparison', 'similar to', 'just as',
-        'reflects', 'mirrors', 'parallels'
-    ]
-    
-    literary_devices = [
-        'rose', 'journey', 'path', 'light', 'darkness',
-        'heart', 'bridge', 'door', 'window', 'book'
-    ]
-    
-    metaphor_count = sum(text.lower().count(marker) for marker in metaphor_markers)
-    literary_count = sum(text.lower().count(device) for device in literary_devices)
+    markers = markers or scan_markers(text)
+    metaphor_count = markers.count('metaphor')
+    literary_count = markers.count('literary')
     
     # Calculate score (0-1)
     score = min(1.0, (metaphor_count * 0.2) + (literary_count * 0.15))
     return score
 
-def detect_artistic_references(text: str) -> float:
+def detect_artistic_references(text: str, markers: LexiconMatches = None) -> float:
     """Detect and score artistic/literary references."""
-    artistic_elements = [
-        'book', 'story', 'author', 'art', 'music',
-        'poem', 'novel', 'character', 'literature',
-        'culture', 'creative', 'artistic'
-    ]
-    
-    reference_count = sum(text.lower().count(element) for element in artistic_elements)
+    markers = markers or scan_markers(text)
+    reference_count = markers.count('artistic')
     return min(1.0, reference_count * 0.2)
 
-def analyze_creative_structure(text: str) -> float:
+def analyze_creative_structure(text: str, markers: LexiconMatches = None) -> float:
     """Analyze creative speech structure."""
-    # Check for storytelling elements
-    story_elements = [
-        'once', 'when', 'story', 'then', 'finally',
-        'first', 'next', 'later', 'eventually',
-        'in the end', 'learned', 'realized'
-    ]
+    markers = markers or scan_markers(text)
     
     # Count story elements
-    element_count = sum(text.lower().count(element) for element in story_elements)
+    element_count = markers.count('story_element')
     
-    # Check for narrative flow
-    sentences = sent_tokenize(text)
-    has_intro = any('introduce' in s.lower() or 'begin' in s.lower() for s in sentences[:2])
-    has_conclusion = any('conclusion' in s.lower() or 'finally' in s.lower() for s in sentences[-2:])
+    # Check for narrative flow in the first and last two sentences
+    num_sentences = markers.sentence_count
+    has_intro = markers.any('intro_cue', range(0, 2))
+    has_conclusion = markers.any('conclusion_cue', range(max(0, num_sentences - 2), num_sentences))
     
     # Calculate score (0-1)
     structure_score = min(1.0, (element_count * 0.15) + (has_intro * 0.3) + (has_conclusion * 0.3))
     return structure_score
 
-def measure_topic_creativity(text: str, topic: str) -> float:
+def measure_topic_creativity(text: str, topic: str, topic_keywords: set = None,
+                             markers: LexiconMatches = None) -> float:
     """Measure creative interpretation of topic."""
     # Look for creative elements related to the topic
-    topic_words = set(word_tokenize(topic.lower()))
+    topic_words = topic_keywords if topic_keywords is not None else set(word_tokenize(topic.lower()))
     text_words = set(word_tokenize(text.lower()))
     
     # Direct topic mentions
     direct_mentions = len(topic_words.intersection(text_words))
     
     # Look for creative interpretations
-    interpretive_markers = [
-        'meaning', 'represents', 'symbolizes', 'teaches',
-        'shows', 'illustrates', 'demonstrates', 'reflects'
-    ]
-    
-    creative_count = sum(text.lower().count(marker) for marker in interpretive_markers)
+    markers = markers or scan_markers(text)
+    creative_count = markers.count('interpretive')
     
     # Calculate score (0-1) - reward both direct and creative usage
     score = min(1.0, (direct_mentions * 0.2) + (creative_count * 0.25))
@@ -1,9 +1,12 @@
-import re
+from models.audio_frontend import AudioFrontend
+from models.pause_events import detect_pauses
 
 def transcribe_audio(model, audio_path):
     print("Transcribing audio...")
+    # A decoded front end is transcribed from its 16 kHz waveform, so the file is decoded once
+    audio = audio_path.audio if isinstance(audio_path, AudioFrontend) else audio_path
     result = model.transcribe(
-        audio_path,
+        audio,
         fp16=False,
         word_timestamps=True,
         initial_prompt=(
@@ -14,39 +17,14 @@ def transcribe_audio(model, audio_path):
     return result
 
 def process_transcription(result):
-    transcription_with_pauses = []
-    total_pause_duration = 0
+    """
+    Transcript with pause markers, for display.
 
-    for i in range(len(result['segments'])):
-        segment = result['segments'][i]
-        words_in_segment = segment.get('words', [])
+    Args:
+        result: Whisper result or the WordTimeline of the transcription
 
-        for j in range(len(words_in_segment)):
-            word_info = words_in_segment[j]
-            word = word_info['word']
-            transcription_with_pauses.append(word)
-
-            if j < len(words_in_segment) - 1:
-                current_word_end = word_info['end']
-                next_word_start = words_in_segment[j + 1]['start']
-                time_gap = next_word_start - current_word_end
-                if time_gap >= 1.0:
-                    pause_duration = round(time_gap, 1)
-                    pause_marker = f"[{pause_duration} second pause]"
-                    transcription_with_pauses.append(pause_marker)
-                    total_pause_duration += pause_duration
-
-        if i < len(result['segments']) - 1:
-            current_segment_end = segment['end']
-            next_segment_start = result['segments'][i + 1]['start']
-            time_gap = next_segment_start - current_segment_end
-            if time_gap >= 2.0:
-                pause_duration = round(time_gap, 1)
-                pause_marker = f"[{pause_duration} second pause]"
-                transcription_with_pauses.append(pause_marker)
-                total_pause_duration += pause_duration
-
-    transcription_with_pauses = ' '.join(transcription_with_pauses)
-    transcription_with_pauses = re.sub(r'\s+', ' ', transcription_with_pauses).strip()
-
-    return transcription_with_pauses, total_pause_duration
+    Returns:
+        Tuple of the transcript text and the total pause duration
+    """
+    pauses = detect_pauses(result)
+    return pauses.transcript(), pauses.total_duration
@@ -1,22 +1,34 @@
 import re
 import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import wordnet, brown, webtext, gutenberg, cmudict
-from collections import Counter, defaultdict
+from nltk.tokenize import word_tokenize
 import numpy as np
 import statistics
 import os
 import pickle
 import json
+import threading
 from datetime import datetime
 import librosa
 import soundfile as sf
 from scipy.spatial.distance import cosine, euclidean
 from scipy import stats
 import pandas as pd
+from models.lexicon import Lexicon
+from models.word_complexity import DEFAULT_COMPLEXITY_CONFIG, get_complexity_table, score_words
+from models.word_frequency import index_path, load_word_frequency_index
+from models.phoneme_index import PHONEME_CATEGORIES, get_phoneme_index
+from models.word_timeline import WordTimeline, as_word_timeline
+from models.sentence_model import get_sentence_model
+from models.audio_frontend import HOP_LENGTH, N_FFT, SAMPLE_RATE, AudioFrontend, as_audio_frontend
+
+_nltk_data_checked = False
 
 # Download necessary NLTK data
 def download_nltk_data():
+    global _nltk_data_checked
+    if _nltk_data_checked:
+        return
+
     required_data = [
         ('tokenizers/punkt', 'punkt'),
         ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
@@ -33,726 +45,146 @@ def download_nltk_data():
         except LookupError:
             print(f"Downloading {package}...")
             nltk.download(package)
+    _nltk_data_checked = True
 
 # ---------- Word Frequency Analysis ----------
 
-def get_word_frequency_data(force_rebuild=False):
+def get_word_frequency_data(domain=None):
     """
-    Creates or loads word frequency data from multiple corpora.
+    Loads word frequency data from multiple corpora.
+    
+    The index is built offline with the builder CLI
+    (python -m models.frequency_builder build [--domain NAME]); the server
+    never builds it. A domain index only changes the word complexity
+    details of the grammar analysis, which are scored against its
+    percentiles; the grammar score does not depend on word frequency.
     
     Args:
-        force_rebuild (bool): Whether to force rebuilding the frequency data
+        domain (str): Optional domain whose index to use; falls back to the general index
         
     Returns:
-        Dict: Word frequency percentiles and related data
+        WordFrequencyIndex: Memory-mapped word frequency percentiles, looked up
+        like a dict (word_percentiles.get(word))
     """
-    cache_path = 'word_frequency_cache_v2.pkl'
-    
-    # Check if the cached data exists and is not being forced to rebuild
-    if os.path.exists(cache_path) and not force_rebuild:
-        with open(cache_path, 'rb') as f:
-            data = pickle.load(f)
-            # Check if the cached data has the correct structure
-            if isinstance(data, dict) and 'metadata' in data and 'word_percentiles' in data:
-                print(f"Using cached word frequency data (created: {data['metadata']['created']})")
-                return data['word_percentiles']
-    
-    # Otherwise, build the frequency data from multiple corpora
-    print("Building comprehensive word frequency data from multiple corpora... (this may take a moment)")
-    download_nltk_data()
-    
-    # Collection of words from various corpora
-    corpus_collections = {
-        'brown': [word.lower() for word in brown.words()],
-        'webtext': [word.lower() for word in webtext.words()],
-        'gutenberg': [word.lower() for word in gutenberg.words()]
-    }
-    
-    # Create a combined frequency dictionary with source tracking
-    combined_freq = defaultdict(lambda: {'count': 0, 'sources': {}})
-    
-    # Process each corpus
-    for corpus_name, words in corpus_collections.items():
-        corpus_freq = Counter(words)
-        corpus_total = sum(corpus_freq.values())
-        
-        for word, count in corpus_freq.items():
-            # Skip non-alphabetic words and very short words (likely not real words)
-            if not word.isalpha() or len(word) < 2:
-                continue
-                
-            combined_freq[word]['count'] += count
-            combined_freq[word]['sources'][corpus_name] = count / corpus_total
-    
-    # Calculate overall frequency percentiles
-    total_words = sum(item['count'] for item in combined_freq.values())
-    word_items = [(word, data['count']) for word, data in combined_freq.items()]
-    sorted_words = sorted(word_items, key=lambda x: x[1], reverse=True)
-    
-    word_percentiles = {}
-    corpus_coverage = {corpus: set() for corpus in corpus_collections.keys()}
-    
-    for rank, (word, _) in enumerate(sorted_words, 1):
-        # Calculate percentile (higher percentile = more common)
-        percentile = 100 - (rank / len(sorted_words) * 100)
-        word_percentiles[word] = {
-            'percentile': percentile,
-            'sources': combined_freq[word]['sources'],
-            'count': combined_freq[word]['count']
-        }
-        
-        # Track which corpora contain this word
-        for corpus in combined_freq[word]['sources']:
-            corpus_coverage[corpus].add(word)
-    
-    # Calculate corpus diversity statistics
-    corpus_stats = {
-        corpus: {
-            'unique_words': len(words),
-            'words_in_percentiles': {
-                'common (75-100)': len([w for w in word_percentiles if w in corpus_coverage[corpus] and word_percentiles[w]['percentile'] >= 75]),
-                'moderate (25-75)': len([w for w in word_percentiles if w in corpus_coverage[corpus] and 25 <= word_percentiles[w]['percentile'] < 75]),
-                'rare (0-25)': len([w for w in word_percentiles if w in corpus_coverage[corpus] and word_percentiles[w]['percentile'] < 25])
-            }
-        }
-        for corpus, words in corpus_coverage.items()
-    }
-    
-    # Create metadata for the cache
-    metadata = {
-        'created': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        'corpora_used': list(corpus_collections.keys()),
-        'total_unique_words': len(word_percentiles),
-        'corpus_stats': corpus_stats
-    }
-    
-    # Save data with cache version and metadata
-    cache_data = {
-        'metadata': metadata,
-        'word_percentiles': word_percentiles
-    }
-    
-    with open(cache_path, 'wb') as f:
-        pickle.dump(cache_data, f)
-    
-    # Also save a human-readable summary
-    with open('word_frequency_metadata.json', 'w') as f:
-        json.dump(metadata, f, indent=2)
-        
-    print(f"Built frequency data with {len(word_percentiles)} unique words across {len(corpus_collections)} corpora")
-    
-    return word_percentiles
+    # The memory-mapped index is opened once per process and shared between workers
+    if domain and domain != 'general':
+        index = load_word_frequency_index(index_path(domain))
+        if index is not None:
+            return index
+    index = load_word_frequency_index()
+    if index is not None:
+        return index
+    raise RuntimeError("Word frequency index not built; run 'python -m models.frequency_builder build'")
 
 def analyze_word_complexity(word, word_percentiles, config=None):
     """
     Determine the complexity level of a given word using corpus data.
     Returns a score from 1 (basic) to 3 (advanced).
     
+    The frequency component is read from word_percentiles and the WordNet
+    component from the precomputed word complexity table (see
+    models/word_complexity.py); use score_words to score a whole transcript
+    at once.
+    
     Args:
         word: The word to analyze
         word_percentiles: Dictionary of word frequency data
         config: Optional configuration parameters to adjust scoring
     """
-    # Default configuration
-    if config is None:
-        config = {
-            'frequency_weight': 0.5,
-            'length_weight': 0.2,
-            'semantic_weight': 0.3,
-            'domain_adjustment': None
-        }
-    
-    word = word.lower()
-    
-    # Skip non-alphabetic words
-    if not word.isalpha():
-        return 1.5  # Default middle score for non-alphabetic items
-    
-    # Get word frequency data (if available)
-    word_data = word_percentiles.get(word, None)
-    
-    # Calculate frequency score
-    if word_data is None:
-        # Word not found in any corpus - could be very rare, specialized, or a mistake
-        frequency_score = 3  # Initially assume it's advanced (rare)
-    else:
-        percentile = word_data['percentile']
-        
-        # Score based on percentile
-        if percentile >= 75:
-            frequency_score = 1  # Common (basic)
-        elif percentile >= 50:
-            frequency_score = 1.5  # Moderately common
-        elif percentile >= 25:
-            frequency_score = 2  # Moderately rare
-        else:
-            frequency_score = 3  # Rare (advanced)
-            
-        # Adjust score based on corpus diversity
-        # If a word appears in multiple corpora, it's more likely to be general vocabulary
-        source_count = len(word_data['sources'])
-        if source_count > 2:
-            frequency_score = max(1, frequency_score - 0.5)
-    
-    # Length factor - longer words tend to be more complex
-    length_score = min(3, max(1, len(word) / 3.5))
-    
-    # Semantic complexity using WordNet
-    semantic_score = 1.5  # Default middle score
-    
-    synsets = wordnet.synsets(word)
-    if synsets:
-        # Analyze:
-        # 1. Number of meanings (more meanings = more complex)
-        # 2. Definition complexity
-        # 3. Hierarchical depth in WordNet (deeper = more specialized)
-        
-        meanings_count = len(synsets)
-        
-        # Average definition length
-        definitions = [s.definition() for s in synsets]
-        avg_def_length = sum(len(d.split()) for d in definitions) / len(definitions)
-        
-        # Get hypernym path lengths (measure of specificity)
-        hypernym_paths = [len(ss.hypernym_paths()) for ss in synsets if ss.hypernym_paths()]
-        avg_hypernym_length = sum(hypernym_paths) / len(hypernym_paths) if hypernym_paths else 1
-        
-        # Calculate semantic score components
-        meaning_factor = min(3, meanings_count / 2)  # Words with many meanings are often foundational
-        definition_factor = min(3, avg_def_length / 8)  # Complex definitions suggest complex concepts
-        specificity_factor = min(3, avg_hypernym_length / 4)  # Deep in hierarchy = specific/technical
-        
-        # Balance these factors - words with MANY meanings are often simpler foundational words
-        if meanings_count > 10:
-            semantic_score = (specificity_factor * 0.7) + (definition_factor * 0.3)
-        else:
-            semantic_score = (meaning_factor * 0.3) + (definition_factor * 0.4) + (specificity_factor * 0.3)
-    
-    # Domain-specific adjustment (if configured)
-    domain_adjustment = 0
-    if config['domain_adjustment'] and word in config['domain_adjustment']:
-        domain_adjustment = config['domain_adjustment'][word]
-    
-    # Combine all factors with their weights
-    final_score = (
-        (frequency_score * config['frequency_weight']) + 
-        (length_score * config['length_weight']) + 
-        (semantic_score * config['semantic_weight']) + 
-        domain_adjustment
-    )
-    
-    # Ensure the score stays within bounds
-    return min(3, max(1, final_score))
+    return get_complexity_table().score(word, word_percentiles, config)
 
-def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_config=None):
-    """Analyze grammar with better differentiation between quality levels."""
-    # Set default domain configuration if none provided
-    if domain_config is None:
-        domain_config = {
-            'domain_name': 'general',
-            'complexity_weights': {
-                'frequency_weight': 0.5,
-                'length_weight': 0.2,
-                'semantic_weight': 0.3
-            },
-            'domain_terms': {}  # No domain-specific terms adjustment
-        }
-    
-    # Clean text and tokenize
-    cleaned_text = re.sub(r'\[[\d.]+ second pause\]', '', transcription)  # Remove pause markers
-    cleaned_text = re.sub(r'[^\w\s.,!?]', '', cleaned_text)  # Remove special characters
-    
-    # Split into sentences for better analysis
-    sentences = re.split(r'[.!?]+', cleaned_text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    words = word_tokenize(cleaned_text)
-    words = [word for word in words if word.isalpha()]  # Keep only alphabetic words
-    
-    if not words:
-        return {
-            "word_count": 0,
-            "unique_word_count": 0,
-            "avg_word_length": 0,
-            "word_complexity_score": 0,
-            "sentence_complexity": 0,
-            "grammar_score": 70.0,
-            "domain_appropriateness": 0
-        }
-    
-    # Basic text statistics
-    word_count = len(words)
-    unique_words = len(set(words))
-    avg_word_length = sum(len(word) for word in words) / word_count
+def word_complexity_details(words, word_percentiles, domain_config=None):
+    """
+    Average word complexity of a transcript and the share of basic,
+    intermediate and advanced words, weighted for the speech's domain.
     
-    # Configure word complexity analysis
+    Args:
+        words: Tokens of the transcript
+        word_percentiles: Word frequency data (general or domain index)
+        domain_config: Optional domain configuration with complexity weights and domain terms
+    """
+    domain_config = domain_config or {}
     complexity_config = {
-        'frequency_weight': domain_config['complexity_weights']['frequency_weight'],
-        'length_weight': domain_config['complexity_weights']['length_weight'],
-        'semantic_weight': domain_config['complexity_weights']['semantic_weight'],
-        'domain_adjustment': domain_config['domain_terms'] if 'domain_terms' in domain_config else None
-    }
-    
-    # Word complexity analysis
-    complexity_scores = [
-        analyze_word_complexity(word, word_percentiles, complexity_config) 
-        for word in words
-    ]
-    avg_complexity = sum(complexity_scores) / len(complexity_scores)
-    
-    # Count advanced words (score >= 2.5)
-    advanced_word_count = sum(1 for score in complexity_scores if score >= 2.5)
-    advanced_word_percentage = (advanced_word_count / word_count) * 100
-    
-    # Domain-specific vocabulary analysis
-    if 'domain_terms' in domain_config and domain_config['domain_terms']:
-        domain_terms = set(term.lower() for term in domain_config['domain_terms'].keys())
-        domain_terms_used = sum(1 for word in words if word.lower() in domain_terms)
-        domain_terms_percentage = (domain_terms_used / word_count) * 100
-    else:
-        domain_terms_percentage = 0
-    
-    # Sentence structure analysis
-    try:
-        tagged_words = nltk.pos_tag(words)
-        
-        # Analyze overall part-of-speech distribution
-        pos_counts = Counter(tag for _, tag in tagged_words)
-        
-        # Calculate distribution of parts of speech
-        verb_count = sum(1 for _, tag in tagged_words if tag.startswith('VB'))
-        noun_count = sum(1 for _, tag in tagged_words if tag.startswith('NN'))
-        adj_count = sum(1 for _, tag in tagged_words if tag.startswith('JJ'))
-        adv_count = sum(1 for _, tag in tagged_words if tag.startswith('RB'))
-        
-        # Grammatical complexity indicators
-        verb_variety = verb_count / word_count
-        modifier_ratio = (adj_count + adv_count) / word_count
-        
-        # Analyze sentence structure complexity
-        avg_sentence_length = word_count / len(sentences) if sentences else 0
-        
-        # Detect complex syntactic structures (e.g., subordinate clauses)
-        complex_structures_count = 0
-        for sentence in sentences:
-            sentence_words = word_tokenize(sentence)
-            # Simple heuristic: check for subordinating conjunctions or relative pronouns
-            # This is a simplified approach - a full parser would be more accurate
-            if any(word.lower() in {'because', 'although', 'since', 'while', 'whereas', 'if', 'unless', 'until', 'when', 'where', 'who', 'which', 'that'} for word in sentence_words):
-                complex_structures_count += 1
-        
-        complex_sentence_ratio = complex_structures_count / len(sentences) if sentences else 0
-        
-        # Sentence complexity score (0-10)
-        sentence_complexity = min(10, (verb_variety * 3) + (modifier_ratio * 3) + (min(1, avg_sentence_length/20) * 2) + (complex_sentence_ratio * 2))
-        
-    except Exception as e:
-        print(f"Error in linguistic analysis: {e}")
-        sentence_complexity = 5  # Default value
-    
-    # Calculate Grammar and Word Selection Score (0-100)
-    # 40% word complexity, 30% sentence complexity, 30% lexical diversity
-    lexical_diversity = unique_words / word_count
-    lexical_diversity_score = min(10, lexical_diversity * 20)  # Scale to 0-10
-    
-    word_complexity_score = min(10, avg_complexity * 3)  # Scale complexity to 0-10
-    
-    # Base grammar score calculation
-    grammar_score = (word_complexity_score * 4) + (sentence_complexity * 3) + (lexical_diversity_score * 3)
-    
-    # Adjust for domain appropriateness if applicable
-    domain_appropriateness = 0
-    if domain_terms_percentage > 0:
-        domain_appropriateness = min(10, domain_terms_percentage / 2)
-        grammar_score = (grammar_score * 0.9) + (domain_appropriateness * 1)
-    
-    # Normalize to 0-100 scale
-    grammar_score = max(50, min(95, grammar_score))
-    
-    # Detailed word complexity breakdown
-    complexity_distribution = {
-        'basic': sum(1 for score in complexity_scores if score < 1.5) / word_count,
-        'intermediate': sum(1 for score in complexity_scores if 1.5 <= score < 2.5) / word_count,
-        'advanced': sum(1 for score in complexity_scores if score >= 2.5) / word_count
-    }
-    
-    # Add quality indicators
-    quality_indicators = {
-        'informal_markers': ['like', 'um', 'uh', 'kinda', 'gonna', 'wanna', 'ya', 'sorta'],
-        'sophisticated_phrases': [
-            'beyond', 'understand', 'perspective', 'critically', 'purpose',
-            'resilience', 'discipline', 'creativity', 'adapt', 'solve problems',
-            'analyze', 'manage', 'develop', 'skills', 'challenges'
-        ],
-        'complex_structures': [
-            'not just', 'but also', 'beyond', 'through', 'while',
-            'how to', 'isn\'t just', 'about understanding'
-        ],
-        'academic_concepts': [
-            'logic', 'problem-solving', 'emotions', 'perspective',
-            'creativity', 'discipline', 'adapt', 'critically'
-        ]
+        **DEFAULT_COMPLEXITY_CONFIG,
+        **domain_config.get('complexity_weights', {}),
+        'domain_adjustment': domain_config.get('domain_terms')
     }
-
-    # Calculate quality metrics
-    informal_count = sum(phrase in transcription.lower() for phrase in quality_indicators['informal_markers'])
-    sophisticated_count = sum(phrase in transcription.lower() for phrase in quality_indicators['sophisticated_phrases'])
-    complex_count = sum(phrase in transcription.lower() for phrase in quality_indicators['complex_structures'])
-    academic_count = sum(phrase in transcription.lower() for phrase in quality_indicators['academic_concepts'])
-    transitions_count = 0  # Initialize transitions_count
-
-    # Base score calculation (0-100)
-    base_grammar_score = 75.0
-
-    try:
-        sentences = sent_tokenize(transcription)
-        # Bonuses for sophisticated language (up to 25 points)
-        sophistication_bonus = min(25, (
-            (sophisticated_count * 3) +    # 3 points per sophisticated phrase
-            (complex_count * 2) +          # 2 points per complex structure
-            (academic_count * 2)           # 2 points per academic concept
-        ))
-        base_grammar_score += sophistication_bonus
-
-        # Coherence analysis (up to 15 points)
-        coherence_score = 0
-        if len(sentences) >= 3:
-            # Check for strong introduction
-            intro = sentences[0].lower()
-            if any(phrase in intro for phrase in ['learning', 'understand', 'purpose']):
-                coherence_score += 5
-
-            # Check for topic development
-            body_coherence = sum(1 for s in sentences[1:-1] if any(
-                phrase in s.lower() for phrase in ['because', 'therefore', 'how', 'through', 'beyond']
-            ))
-            coherence_score += min(5, body_coherence)
-
-            # Check for strong conclusion
-            conclusion = sentences[-1].lower()
-            if any(phrase in conclusion for phrase in ['purpose', 'prepare', 'life', 'valuable']):
-                coherence_score += 5
-
-        base_grammar_score += coherence_score
-
-        # Penalties for informal language
-        if informal_count > 0:
-            penalty = min(30, informal_count * 10)
-            base_grammar_score = max(40, base_grammar_score - penalty)
-
-    except Exception as e:
-        print(f"Error in grammar analysis: {e}")
-        return {"grammar_score": 70.0, "details": {"error": str(e)}}
-
-    # Normalize final score (40-95 range)
-    final_grammar_score = max(40, min(95, base_grammar_score))
-
-    # Debug logging
-    print(f"Grammar Analysis:")
-    print(f"Sophisticated words: {sophisticated_count}")
-    print(f"Complex structures: {complex_count}")
-    print(f"Transitions: {transitions_count}")
-    print(f"Base score: {base_grammar_score}")
-    print(f"Final score: {final_grammar_score}")
-
-    # Scale down to make scoring more stringent
-    scaling_factor = 0.85  # Adjust this to make scoring more strict
-    final_grammar_score = 40 + ((final_grammar_score - 40) * scaling_factor)
-
-    # Return both the score and details
+    scores = score_words([w for w in words if w.isalpha()], word_percentiles, complexity_config)
+    if not len(scores):
+        return {"avg_word_complexity": 0, "complexity_distribution": {"basic": 0, "intermediate": 0, "advanced": 0}}
     return {
-        "grammar_score": final_grammar_score,
-        "word_count": len(words),
-        "unique_word_count": len(set(words)),
-        "details": {
-            "informal_count": informal_count,
-            "sophisticated_count": sophisticated_count,
-            "transitions_count": transitions_count,
-            "complex_count": complex_count,
-            "avg_sentence_length": avg_sentence_length if 'avg_sentence_length' in locals() else 0,
-            "sentence_complexity": sentence_complexity
+        "avg_word_complexity": round(float(scores.mean()), 2),
+        "complexity_distribution": {
+            "basic": round(float(np.mean(scores < 1.5)), 3),
+            "intermediate": round(float(np.mean((scores >= 1.5) & (scores < 2.5))), 3),
+            "advanced": round(float(np.mean(scores >= 2.5)), 3)
         }
     }
 
-def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_config=None):
-    """Analyze grammar with better differentiation between quality levels."""
-    # Set default domain configuration if none provided
-    if domain_config is None:
-        domain_config = {
-            'domain_name': 'general',
-            'complexity_weights': {
-                'frequency_weight': 0.5,
-                'length_weight': 0.2,
-                'semantic_weight': 0.3
-            },
-            'domain_terms': {}  # No domain-specific terms adjustment
-        }
-    
-    # Clean text and tokenize
-    cleaned_text = re.sub(r'\[[\d.]+ second pause\]', '', transcription)  # Remove pause markers
-    cleaned_text = re.sub(r'[^\w\s.,!?]', '', cleaned_text)  # Remove special characters
-    
-    # Split into sentences for better analysis
-    sentences = re.split(r'[.!?]+', cleaned_text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    words = word_tokenize(cleaned_text)
-    words = [word for word in words if word.isalpha()]  # Keep only alphabetic words
-    
-    if not words:
-        return {
-            "word_count": 0,
-            "unique_word_count": 0,
-            "avg_word_length": 0,
-            "word_complexity_score": 0,
-            "sentence_complexity": 0,
-            "grammar_score": 70.0,
-            "domain_appropriateness": 0
-        }
-    
-    # Basic text statistics
-    word_count = len(words)
-    unique_words = len(set(words))
-    avg_word_length = sum(len(word) for word in words) / word_count
-    
-    # Configure word complexity analysis
-    complexity_config = {
-        'frequency_weight': domain_config['complexity_weights']['frequency_weight'],
-        'length_weight': domain_config['complexity_weights']['length_weight'],
-        'semantic_weight': domain_config['complexity_weights']['semantic_weight'],
-        'domain_adjustment': domain_config['domain_terms'] if 'domain_terms' in domain_config else None
-    }
-    
-    # Word complexity analysis
-    complexity_scores = [
-        analyze_word_complexity(word, word_percentiles, complexity_config) 
-        for word in words
+# Enhanced quality indicators with more sophisticated categories
+GRAMMAR_QUALITY_INDICATORS = {
+    'informal_markers': [
+        'like', 'um', 'uh', 'kinda', 'gonna', 'wanna', 'ya', 'sorta',
+        'you know', 'stuff', 'things', 'just', 'anyway', 'whatever',
+        'basically', 'literally', 'actually'
+    ],
+    'sophisticated_phrases': [
+        'furthermore', 'consequently', 'therefore', 'nevertheless',
+        'alternatively', 'specifically', 'fundamentally', 'essentially',
+        'ultimately', 'particularly', 'systematically', 'effectively',
+        'beyond', 'through', 'despite', 'however', 'moreover',
+        'in contrast', 'significantly', 'traditionally'
+    ],
+    'complex_structures': [
+        'not only', 'but also', 'despite', 'although', 'whereas',
+        'in contrast', 'on the other hand', 'for instance',
+        'in particular', 'as a result', 'consequently',
+        'rather than', 'even though', 'while it may'
+    ],
+    'academic_concepts': [
+        'analysis', 'perspective', 'framework', 'methodology',
+        'principle', 'theory', 'concept', 'strategy', 'approach',
+        'structure', 'function', 'process', 'development',
+        'critical thinking', 'problem-solving', 'understanding'
+    ],
+    'advanced_transitions': [
+        'furthermore', 'moreover', 'however', 'consequently',
+        'in addition', 'specifically', 'notably', 'indeed',
+        'therefore', 'nevertheless', 'conversely', 'similarly'
     ]
-    avg_complexity = sum(complexity_scores) / len(complexity_scores)
-    
-    # Count advanced words (score >= 2.5)
-    advanced_word_count = sum(1 for score in complexity_scores if score >= 2.5)
-    advanced_word_percentage = (advanced_word_count / word_count) * 100
-    
-    # Domain-specific vocabulary analysis
-    if 'domain_terms' in domain_config and domain_config['domain_terms']:
-        domain_terms = set(term.lower() for term in domain_config['domain_terms'].keys())
-        domain_terms_used = sum(1 for word in words if word.lower() in domain_terms)
-        domain_terms_percentage = (domain_terms_used / word_count) * 100
-    else:
-        domain_terms_percentage = 0
-    
-    # Sentence structure analysis
-    try:
-        tagged_words = nltk.pos_tag(words)
-        
-        # Analyze overall part-of-speech distribution
-        pos_counts = Counter(tag for _, tag in tagged_words)
-        
-        # Calculate distribution of parts of speech
-        verb_count = sum(1 for _, tag in tagged_words if tag.startswith('VB'))
-        noun_count = sum(1 for _, tag in tagged_words if tag.startswith('NN'))
-        adj_count = sum(1 for _, tag in tagged_words if tag.startswith('JJ'))
-        adv_count = sum(1 for _, tag in tagged_words if tag.startswith('RB'))
-        
-        # Grammatical complexity indicators
-        verb_variety = verb_count / word_count
-        modifier_ratio = (adj_count + adv_count) / word_count
-        
-        # Analyze sentence structure complexity
-        avg_sentence_length = word_count / len(sentences) if sentences else 0
-        
-        # Detect complex syntactic structures (e.g., subordinate clauses)
-        complex_structures_count = 0
-        for sentence in sentences:
-            sentence_words = word_tokenize(sentence)
-            # Simple heuristic: check for subordinating conjunctions or relative pronouns
-            # This is a simplified approach - a full parser would be more accurate
-            if any(word.lower() in {'because', 'although', 'since', 'while', 'whereas', 'if', 'unless', 'until', 'when', 'where', 'who', 'which', 'that'} for word in sentence_words):
-                complex_structures_count += 1
-        
-        complex_sentence_ratio = complex_structures_count / len(sentences) if sentences else 0
-        
-        # Sentence complexity score (0-10)
-        sentence_complexity = min(10, (verb_variety * 3) + (modifier_ratio * 3) + (min(1, avg_sentence_length/20) * 2) + (complex_sentence_ratio * 2))
-        
-    except Exception as e:
-        print(f"Error in linguistic analysis: {e}")
-        sentence_complexity = 5  # Default value
-    
-    # Calculate Grammar and Word Selection Score (0-100)
-    # 40% word complexity, 30% sentence complexity, 30% lexical diversity
-    lexical_diversity = unique_words / word_count
-    lexical_diversity_score = min(10, lexical_diversity * 20)  # Scale to 0-10
-    
-    word_complexity_score = min(10, avg_complexity * 3)  # Scale complexity to 0-10
-    
-    # Base grammar score calculation
-    grammar_score = (word_complexity_score * 4) + (sentence_complexity * 3) + (lexical_diversity_score * 3)
-    
-    # Adjust for domain appropriateness if applicable
-    domain_appropriateness = 0
-    if domain_terms_percentage > 0:
-        domain_appropriateness = min(10, domain_terms_percentage / 2)
-        grammar_score = (grammar_score * 0.9) + (domain_appropriateness * 1)
-    
-    # Normalize to 0-100 scale
-    grammar_score = max(50, min(95, grammar_score))
-    
-    # Detailed word complexity breakdown
-    complexity_distribution = {
-        'basic': sum(1 for score in complexity_scores if score < 1.5) / word_count,
-        'intermediate': sum(1 for score in complexity_scores if 1.5 <= score < 2.5) / word_count,
-        'advanced': sum(1 for score in complexity_scores if score >= 2.5) / word_count
-    }
-    
-    # Add quality indicators
-    quality_indicators = {
-        'informal_markers': ['like', 'um', 'uh', 'kinda', 'gonna', 'wanna', 'ya', 'sorta'],
-        'sophisticated_phrases': [
-            'beyond', 'understand', 'perspective', 'critically', 'purpose',
-            'resilience', 'discipline', 'creativity', 'adapt', 'solve problems',
-            'analyze', 'manage', 'develop', 'skills', 'challenges'
-        ],
-        'complex_structures': [
-            'not just', 'but also', 'beyond', 'through', 'while',
-            'how to', 'isn\'t just', 'about understanding'
-        ],
-        'academic_concepts': [
-            'logic', 'problem-solving', 'emotions', 'perspective',
-            'creativity', 'discipline', 'adapt', 'critically'
-        ]
-    }
-
-    # Calculate quality metrics
-    informal_count = sum(phrase in transcription.lower() for phrase in quality_indicators['informal_markers'])
-    sophisticated_count = sum(phrase in transcription.lower() for phrase in quality_indicators['sophisticated_phrases'])
-    complex_count = sum(phrase in transcription.lower() for phrase in quality_indicators['complex_structures'])
-    academic_count = sum(phrase in transcription.lower() for phrase in quality_indicators['academic_concepts'])
-    transitions_count = 0  # Initialize transitions_count
-
-    # Base score calculation (0-100)
-    base_grammar_score = 75.0
-
-    try:
-        sentences = sent_tokenize(transcription)
-        # Bonuses for sophisticated language (up to 25 points)
-        sophistication_bonus = min(25, (
-            (sophisticated_count * 3) +    # 3 points per sophisticated phrase
-            (complex_count * 2) +          # 2 points per complex structure
-            (academic_count * 2)           # 2 points per academic concept
-        ))
-        base_grammar_score += sophistication_bonus
-
-        # Coherence analysis (up to 15 points)
-        coherence_score = 0
-        if len(sentences) >= 3:
-            # Check for strong introduction
-            intro = sentences[0].lower()
-            if any(phrase in intro for phrase in ['learning', 'understand', 'purpose']):
-                coherence_score += 5
-
-            # Check for topic development
-            body_coherence = sum(1 for s in sentences[1:-1] if any(
-                phrase in s.lower() for phrase in ['because', 'therefore', 'how', 'through', 'beyond']
-            ))
-            coherence_score += min(5, body_coherence)
-
-            # Check for strong conclusion
-            conclusion = sentences[-1].lower()
-            if any(phrase in conclusion for phrase in ['purpose', 'prepare', 'life', 'valuable']):
-                coherence_score += 5
-
-        base_grammar_score += coherence_score
-
-        # Penalties for informal language
-        if informal_count > 0:
-            penalty = min(30, informal_count * 10)
-            base_grammar_score = max(40, base_grammar_score - penalty)
-
-    except Exception as e:
-        print(f"Error in grammar analysis: {e}")
-        return {"grammar_score": 70.0, "details": {"error": str(e)}}
-
-    # Normalize final score (40-95 range)
-    final_grammar_score = max(40, min(95, base_grammar_score))
+}
 
-    # Debug logging
-    print(f"Grammar Analysis:")
-    print(f"Sophisticated words: {sophisticated_count}")
-    print(f"Complex structures: {complex_count}")
-    print(f"Transitions: {transitions_count}")
-    print(f"Base score: {base_grammar_score}")
-    print(f"Final score: {final_grammar_score}")
+# Markers checked per sentence for complexity and coherence
+GRAMMAR_SENTENCE_MARKERS = {
+    'complex_sentence': ['because', 'although', 'however', 'while',
+                         'therefore', 'moreover', 'furthermore', 'despite'],
+    'intro': ['learning', 'understand', 'purpose', 'think about'],
+    'development': ['furthermore', 'moreover', 'beyond', 'additionally'],
+    'conclusion': ['therefore', 'thus', 'ultimately', 'in conclusion']
+}
 
-    # Scale down to make scoring more stringent
-    scaling_factor = 0.85  # Adjust this to make scoring more strict
-    final_grammar_score = 40 + ((final_grammar_score - 40) * scaling_factor)
+# All grammar marker lists compiled once and matched in a single pass per transcript
+GRAMMAR_LEXICON = Lexicon({**GRAMMAR_QUALITY_INDICATORS, **GRAMMAR_SENTENCE_MARKERS})
 
-    # Return both the score and details
-    return {
-        "grammar_score": final_grammar_score,
-        "word_count": len(words),
-        "unique_word_count": len(set(words)),
-        "details": {
-            "informal_count": informal_count,
-            "sophisticated_count": sophisticated_count,
-            "transitions_count": transitions_count,
-            "complex_count": complex_count,
-            "avg_sentence_length": avg_sentence_length if 'avg_sentence_length' in locals() else 0,
-            "sentence_complexity": sentence_complexity
-        }
-    }
-
-def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_config=None):
+def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_config=None, sentences=None):
     """Analyze grammar with better differentiation between quality levels."""
     # ...existing code until quality_indicators...
 
-    # Enhanced quality indicators with more sophisticated categories
-    quality_indicators = {
-        'informal_markers': [
-            'like', 'um', 'uh', 'kinda', 'gonna', 'wanna', 'ya', 'sorta',
-            'you know', 'stuff', 'things', 'just', 'anyway', 'whatever',
-            'basically', 'literally', 'actually'
-        ],
-        'sophisticated_phrases': [
-            'furthermore', 'consequently', 'therefore', 'nevertheless',
-            'alternatively', 'specifically', 'fundamentally', 'essentially',
-            'ultimately', 'particularly', 'systematically', 'effectively',
-            'beyond', 'through', 'despite', 'however', 'moreover',
-            'in contrast', 'significantly', 'traditionally'
-        ],
-        'complex_structures': [
-            'not only', 'but also', 'despite', 'although', 'whereas',
-            'in contrast', 'on the other hand', 'for instance',
-            'in particular', 'as a result', 'consequently',
-            'rather than', 'even though', 'while it may'
-        ],
-        'academic_concepts': [
-            'analysis', 'perspective', 'framework', 'methodology',
-            'principle', 'theory', 'concept', 'strategy', 'approach',
-            'structure', 'function', 'process', 'development',
-            'critical thinking', 'problem-solving', 'understanding'
-        ],
-        'advanced_transitions': [
-            'furthermore', 'moreover', 'however', 'consequently',
-            'in addition', 'specifically', 'notably', 'indeed',
-            'therefore', 'nevertheless', 'conversely', 'similarly'
-        ]
-    }
-
     try:
-        sentences = sent_tokenize(transcription)
+        # Shared sentence model of the transcription (punkt on the text when not given)
+        sentences = get_sentence_model(sentences if sentences is not None else transcription).sentences
+        markers = GRAMMAR_LEXICON.scan_sentences(sentences)
         
         # Start with a higher base score
         base_grammar_score = 65.0
         
         # Enhanced sophistication analysis
-        informal_count = sum(phrase in transcription.lower() for phrase in quality_indicators['informal_markers'])
-        sophisticated_count = sum(phrase in transcription.lower() for phrase in quality_indicators['sophisticated_phrases'])
-        complex_count = sum(phrase in transcription.lower() for phrase in quality_indicators['complex_structures'])
-        academic_count = sum(phrase in transcription.lower() for phrase in quality_indicators['academic_concepts'])
-        advanced_transitions = sum(phrase in transcription.lower() for phrase in quality_indicators['advanced_transitions'])
+        # (each distinct phrase counts once, as before)
+        informal_count = markers.distinct('informal_markers')
+        sophisticated_count = markers.distinct('sophisticated_phrases')
+        complex_count = markers.distinct('complex_structures')
+        academic_count = markers.distinct('academic_concepts')
+        advanced_transitions = markers.distinct('advanced_transitions')
         
         # Calculate vocabulary diversity
         words = word_tokenize(transcription.lower())
@@ -784,29 +216,23 @@ def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_c
                 structure_score += min(15, length_variety * 1.5)
             
             # Analyze sentence complexity
-            complex_sentence_markers = ['because', 'although', 'however', 'while',
-                                     'therefore', 'moreover', 'furthermore', 'despite']
-            complex_sentences = sum(1 for s in sentences 
-                                 if any(marker in s.lower() for marker in complex_sentence_markers))
+            complex_sentences = len(markers.sentences_with('complex_sentence'))
             complexity_ratio = complex_sentences / len(sentences)
             structure_score += min(10, complexity_ratio * 20)
             
             # Coherence analysis
             if len(sentences) >= 3:
                 # Check for strong introduction
-                intro_markers = ['learning', 'understand', 'purpose', 'think about']
-                if any(marker in sentences[0].lower() for marker in intro_markers):
+                if markers.any('intro', range(0, 1)):
                     coherence_bonus += 5
                 
                 # Check for proper development
-                development_markers = ['furthermore', 'moreover', 'beyond', 'additionally']
-                development_count = sum(1 for s in sentences[1:-1] 
-                                     if any(marker in s.lower() for marker in development_markers))
+                development_count = len([i for i in markers.sentences_with('development')
+                                         if 0 < i < len(sentences) - 1])
                 coherence_bonus += min(5, development_count * 1.5)
                 
                 # Check for strong conclusion
-                conclusion_markers = ['therefore', 'thus', 'ultimately', 'in conclusion']
-                if any(marker in sentences[-1].lower() for marker in conclusion_markers):
+                if markers.any('conclusion', range(len(sentences) - 1, len(sentences))):
                     coherence_bonus += 5
         
         # Informal language penalty (reduced maximum impact)
@@ -829,6 +255,9 @@ def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_c
         # Ensure score is within valid range
         final_grammar_score = max(40, min(95, final_grammar_score))
         
+        # Word complexity is reported with the details; it does not change the grammar score
+        complexity = word_complexity_details(words, word_percentiles, domain_config) if word_percentiles else {}
+        
     except Exception as e:
         print(f"Error in grammar analysis: {e}")
         return {"grammar_score": 70.0, "details": {"error": str(e)}}
@@ -854,7 +283,8 @@ def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_c
             "academic_count": academic_count,
             "advanced_transitions": advanced_transitions,
             "sentence_complexity": structure_score,
-            "coherence_score": coherence_bonus
+            "coherence_score": coherence_bonus,
+            **complexity
         }
     }
 
@@ -862,6 +292,66 @@ def analyze_grammar_and_word_selection(transcription, word_percentiles, domain_c
 
 # ---------- ADVANCED PRONUNCIATION ANALYSIS ENGINE ----------
 
+# Pronunciation analysis modes: 'full' runs the audio feature path, 'fast'
+# estimates from Whisper word probabilities and timing, 'auto' uses the audio
+# path unless the server is busy
+PRONUNCIATION_MODES = ('full', 'fast', 'auto')
+DEFAULT_PRONUNCIATION_MODE = os.environ.get('PRONUNCIATION_MODE', 'auto')
+
+# 'auto' switches to the fast estimate when this many audio analyses are already
+# running, or when the 1-minute load average per CPU exceeds the threshold
+MAX_CONCURRENT_FULL_PRONUNCIATION = int(os.environ.get('PRONUNCIATION_MAX_FULL', max(1, (os.cpu_count() or 2) // 2)))
+PRONUNCIATION_LOAD_THRESHOLD = float(os.environ.get('PRONUNCIATION_LOAD_THRESHOLD', 0.8))
+
+# Linear maps (intercept, slope) from fast-mode component scores to the audio
+# path's scale; written by calibrate_pronunciation.py
+PRONUNCIATION_CALIBRATION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pronunciation_calibration.json"
+)
+
+_full_pronunciation_active = 0
+_full_pronunciation_lock = threading.Lock()
+
+
+def load_fast_calibration(path=PRONUNCIATION_CALIBRATION_PATH):
+    """Fitted fast-mode coefficients, or an empty dict (identity maps) if not calibrated."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return {component: tuple(coefficients) for component, coefficients in json.load(f)['coefficients'].items()}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring pronunciation calibration at {path}: {e}")
+        return {}
+
+
+def _acquire_full_pronunciation_slot(mode):
+    """Decide between the audio path and the fast estimate; True means a full-analysis slot was taken."""
+    global _full_pronunciation_active
+    mode = (mode or DEFAULT_PRONUNCIATION_MODE).lower()
+    if mode not in PRONUNCIATION_MODES:
+        print(f"Unknown pronunciation mode '{mode}', using 'auto'")
+        mode = 'auto'
+    if mode == 'fast':
+        return False
+    
+    if mode == 'auto' and hasattr(os, 'getloadavg'):
+        if os.getloadavg()[0] / (os.cpu_count() or 1) > PRONUNCIATION_LOAD_THRESHOLD:
+            return False
+    
+    with _full_pronunciation_lock:
+        if mode == 'auto' and _full_pronunciation_active >= MAX_CONCURRENT_FULL_PRONUNCIATION:
+            return False
+        _full_pronunciation_active += 1
+    return True
+
+
+def _release_full_pronunciation_slot():
+    global _full_pronunciation_active
+    with _full_pronunciation_lock:
+        _full_pronunciation_active -= 1
+
+
 class PronunciationAnalyzer:
     """Enhanced pronunciation analysis engine for competition-grade evaluation."""
     
@@ -893,26 +383,21 @@ class PronunciationAnalyzer:
         if config:
             self.config.update(config)
         
-        # Load CMU pronunciation dictionary
-        self.pronunciation_dict = cmudict.dict() if hasattr(cmudict, 'dict') else {}
+        # CMU pronunciation dictionary, loaded once per process and shared
+        self.phoneme_index = get_phoneme_index()
         
         # Define phonetic categories for analysis
-        self.phoneme_categories = {
-            'vowels': ['AA', 'AE', 'AH', 'AO', 'AW', 'AY', 'EH', 'ER', 'EY', 'IH', 'IY', 'OW', 'OY', 'UH', 'UW'],
-            'stops': ['B', 'D', 'G', 'K', 'P', 'T'],
-            'fricatives': ['DH', 'F', 'S', 'SH', 'TH', 'V', 'Z', 'ZH'],
-            'affricates': ['CH', 'JH'],
-            'nasals': ['M', 'N', 'NG'],
-            'liquids': ['L', 'R'],
-            'glides': ['W', 'Y', 'HH']
-        }
+        self.phoneme_categories = PHONEME_CATEGORIES
+        
+        # Calibration of the fast (transcription-only) estimate
+        self.fast_calibration = load_fast_calibration()
         
-        # Audio processing parameters
+        # Audio processing parameters (Whisper's front end, shared with the transcription)
         self.audio_params = {
-            'sample_rate': 16000,
+            'sample_rate': SAMPLE_RATE,
             'n_mfcc': 13,
-            'n_fft': 512,
-            'hop_length': 160  # 10ms at 16kHz
+            'n_fft': N_FFT,
+            'hop_length': HOP_LENGTH  # 10ms at 16kHz
         }
         
         # Load reference models if available
@@ -930,26 +415,22 @@ class PronunciationAnalyzer:
         Extract audio features from speech file for pronunciation analysis.
         
         Args:
-            audio_file: Path to audio file
+            audio_file: Path to audio file, or the AudioFrontend of the transcription
             
         Returns:
             Dict: Audio features including mfccs, pitch, energy, etc.
         """
         try:
-            # Load audio file
-            y, sr = librosa.load(audio_file, sr=self.audio_params['sample_rate'])
+            # Spectral features come from the front end's STFT and log-mel,
+            # computed once per upload
+            frontend = as_audio_frontend(audio_file)
+            sr = frontend.sample_rate
             
-            # Normalize audio
-            y = librosa.util.normalize(y)
+            # Normalize audio (the spectral features below do not depend on the level)
+            y = librosa.util.normalize(frontend.audio)
             
             # Extract MFCCs (Mel Frequency Cepstral Coefficients)
-            mfccs = librosa.feature.mfcc(
-                y=y, 
-                sr=sr, 
-                n_mfcc=self.audio_params['n_mfcc'],
-                n_fft=self.audio_params['n_fft'],
-                hop_length=self.audio_params['hop_length']
-            )
+            mfccs = frontend.mfcc(self.audio_params['n_mfcc'])
             
             # Extract pitch (F0) contour
             pitch, voiced_flag, voiced_probs = librosa.pyin(
@@ -963,51 +444,26 @@ class PronunciationAnalyzer:
             pitch = np.nan_to_num(pitch)
             
             # Calculate energy contour
-            energy = np.array([
-                sum(abs(y[i:i+self.audio_params['hop_length']])) 
-                for i in range(0, len(y), self.audio_params['hop_length'])
-            ])
+            hop_length = self.audio_params['hop_length']
+            energy = np.add.reduceat(np.abs(y), np.arange(0, len(y), hop_length)) if len(y) else np.zeros(0)
             
             # Trim to same length as other features
             energy = energy[:len(pitch)]
             
             # Extract spectral contrast
-            contrast = librosa.feature.spectral_contrast(
-                y=y, 
-                sr=sr,
-                n_fft=self.audio_params['n_fft'],
-                hop_length=self.audio_params['hop_length']
-            )
+            contrast = frontend.spectral_contrast()
             
             # Extract spectral centroid (brightness)
-            centroid = librosa.feature.spectral_centroid(
-                y=y, 
-                sr=sr,
-                n_fft=self.audio_params['n_fft'],
-                hop_length=self.audio_params['hop_length']
-            )
+            centroid = frontend.spectral_centroid()
             
             # Extract spectral bandwidth (spread)
-            bandwidth = librosa.feature.spectral_bandwidth(
-                y=y, 
-                sr=sr,
-                n_fft=self.audio_params['n_fft'],
-                hop_length=self.audio_params['hop_length']
-            )
+            bandwidth = frontend.spectral_bandwidth(centroid)
             
             # Extract zero crossing rate (noisiness/consonant info)
-            zcr = librosa.feature.zero_crossing_rate(
-                y, 
-                frame_length=self.audio_params['n_fft'],
-                hop_length=self.audio_params['hop_length']
-            )
+            zcr = frontend.zero_crossing_rate()
             
             # Detect onsets for speech rate and rhythm analysis
-            onset_env = librosa.onset.onset_strength(
-                y=y, 
-                sr=sr,
-                hop_length=self.audio_params['hop_length']
-            )
+            onset_env = frontend.onset_strength()
             onsets = librosa.onset.onset_detect(
                 onset_envelope=onset_env, 
                 sr=sr,
@@ -1044,32 +500,12 @@ class PronunciationAnalyzer:
         Returns:
             Dict: Phoneme accuracy metrics
         """
-        # Convert transcript to expected phoneme sequence using CMU dict
-        expected_phonemes = []
-        phoneme_categories_found = defaultdict(int)
-        total_phonemes = 0
-        
         # Get transcript words
         words = [w.lower() for w in word_tokenize(transcript) if w.isalpha()]
         
-        # Look up expected pronunciation for each word
-        for word in words:
-            if word in self.pronunciation_dict:
-                # Get the first (most common) pronunciation
-                phonemes = self.pronunciation_dict[word][0]
-                expected_phonemes.append(phonemes)
-                
-                # Count phoneme categories
-                for phoneme in phonemes:
-                    # Strip stress markers (numbers) from phoneme
-                    base_phoneme = ''.join([c for c in phoneme if not c.isdigit()])
-                    total_phonemes += 1
-                    
-                    # Track which category this phoneme belongs to
-                    for category, phoneme_list in self.phoneme_categories.items():
-                        if base_phoneme in phoneme_list:
-                            phoneme_categories_found[category] += 1
-                            break
+        # Count the phoneme categories of the expected pronunciations (first,
+        # most common pronunciation of each word) for the whole transcript at once
+        phoneme_categories_found, total_phonemes = self.phoneme_index.category_counts(words)
         
         # If we don't have word alignments or audio features, use a statistical approach
         # based on typical error patterns
@@ -1275,19 +711,16 @@ class PronunciationAnalyzer:
         
         # Calculate speech rate if we have word alignments
         speech_rate = None
-        if word_alignments and len(word_alignments) > 1:
-            # Extract word durations
-            word_durations = []
-            for i in range(len(word_alignments) - 1):
-                if 'start' in word_alignments[i] and 'end' in word_alignments[i]:
-                    duration = word_alignments[i]['end'] - word_alignments[i]['start']
-                    word_durations.append(duration)
+        if word_alignments is not None and len(word_alignments) > 1:
+            # Word durations straight from the timeline (words without timestamps dropped)
+            word_durations = word_alignments.durations()
+            word_durations = word_durations[~np.isnan(word_durations)]
             
-            if word_durations:
+            if word_durations.size:
                 # Calculate words per minute
-                total_duration = sum(word_durations)
+                total_duration = float(word_durations.sum())
                 if total_duration > 0:
-                    word_count = len(word_durations)
+                    word_count = word_durations.size
                     speech_rate = (word_count / total_duration) * 60
         
         # Overall prosody score (weighted average of components)
@@ -1323,7 +756,7 @@ class PronunciationAnalyzer:
                 }
 
             # Calculate fluency metrics
-            speaking_duration = sum(align['duration'] for align in word_alignments) if word_alignments else 0
+            speaking_duration = float(np.nansum(word_alignments.durations())) if word_alignments is not None else 0
             pause_duration = total_duration - speaking_duration if speaking_duration <= total_duration else 0
             
             speaking_rate = (total_speech_length / total_duration) * 60 if total_duration > 0 else 0
@@ -1476,9 +909,9 @@ class PronunciationAnalyzer:
         Perform complete pronunciation analysis on speech audio.
         
         Args:
-            audio_file: Path to audio file
+            audio_file: Path to audio file, or the AudioFrontend of the transcription
             transcript: Text transcription of speech
-            word_alignments: Optional word timing information
+            word_alignments: Optional WordTimeline of the transcription
             
         Returns:
             Dict: Complete pronunciation analysis results
@@ -1487,7 +920,7 @@ class PronunciationAnalyzer:
         audio_features = self.extract_audio_features(audio_file)
         
         # If no audio features could be extracted, use confidence scores if available
-        if not audio_features and isinstance(word_alignments, dict) and 'segments' in word_alignments:
+        if not audio_features and isinstance(word_alignments, WordTimeline) and len(word_alignments.segment_bounds):
             return self._analyze_from_confidence_scores(word_alignments, transcript)
         
         # Analyze phoneme accuracy
@@ -1506,183 +939,218 @@ class PronunciationAnalyzer:
         articulation = self.analyze_articulation(audio_features, transcript, word_alignments)
         
         # Calculate overall pronunciation score
+        overall_score = self._overall_score(
+            phoneme_accuracy['overall_score'], prosody['overall_score'], fluency_score,
+            articulation['overall_score'], transcript
+        )
+        
+        return {
+            'pronunciation_score': round(overall_score, 1),
+            'phoneme_accuracy': phoneme_accuracy,
+            'prosody': prosody,
+            'fluency': {
+                'overall_score': fluency_score,  # Store normalized score
+                'details': fluency  # Store original fluency details
+            },
+            'articulation': articulation,
+            'mode': 'full'
+        }
+    
+    def _overall_score(self, phoneme_score, prosody_score, fluency_score, articulation_score, transcript):
+        """Weighted pronunciation score with difficulty and accent adjustments, within the scoring scale."""
         weights = self.config['scoring_weights']
         overall_score = (
-            (phoneme_accuracy['overall_score'] * weights['phoneme_accuracy']) +
-            (prosody['overall_score'] * weights['prosody']) +
-            (fluency_score * weights['fluency']) +  # Use normalized fluency_score
-            (articulation['overall_score'] * weights['articulation'])
+            (phoneme_score * weights['phoneme_accuracy']) +
+            (prosody_score * weights['prosody']) +
+            (fluency_score * weights['fluency']) +
+            (articulation_score * weights['articulation'])
         )
         
         # Apply difficulty adjustment if configured
         if self.config['difficulty_adjustment']:
             # Adjust based on transcript complexity
             words = word_tokenize(transcript)
-            advanced_word_count = sum(1 for word in words if len(word) > 8)  # Simple heuristic
-            complexity_factor = min(1.1, max(0.9, 1 + (advanced_word_count / len(words) * 0.2)))
-            overall_score *= complexity_factor
+            if words:
+                advanced_word_count = sum(1 for word in words if len(word) > 8)  # Simple heuristic
+                complexity_factor = min(1.1, max(0.9, 1 + (advanced_word_count / len(words) * 0.2)))
+                overall_score *= complexity_factor
         
         # Apply accent adjustment if configured
         # This prevents penalizing non-native accents too harshly
-        if self.config['accent_adjustment'] and phoneme_accuracy['overall_score'] < 75:
+        if self.config['accent_adjustment'] and phoneme_score < 75:
             # Boost phoneme accuracy score but keep other scores
-            phoneme_boost = min(15, max(0, 75 - phoneme_accuracy['overall_score'])) * 0.5
+            phoneme_boost = min(15, max(0, 75 - phoneme_score)) * 0.5
             overall_score += (phoneme_boost * weights['phoneme_accuracy'])
         
         # Ensure score is within configured scale
         min_score, max_score = self.config['scoring_scale']
-        overall_score = max(min_score, min(max_score, overall_score))
-        
-        return {
-            'pronunciation_score': round(overall_score, 1),
-            'phoneme_accuracy': phoneme_accuracy,
-            'prosody': prosody,
-            'fluency': {
-                'overall_score': fluency_score,  # Store normalized score
-                'details': fluency  # Store original fluency details
-            },
-            'articulation': articulation
-        }
+        return max(min_score, min(max_score, overall_score))
     
-    def _analyze_from_confidence_scores(self, word_alignments, transcript):
+    def _calibrated(self, component, score):
+        """Map a fast-mode component score onto the scale of the audio path."""
+        intercept, slope = self.fast_calibration.get(component, (0.0, 1.0))
+        return max(60.0, min(95.0, intercept + slope * score))
+    
+    def analyze_pronunciation_fast(self, word_alignments, transcript):
         """
-        Fallback analysis method when audio features cannot be extracted.
-        Uses confidence scores from ASR system if available.
+        Low-cost pronunciation estimate from the transcription alone.
+        
+        Uses Whisper's per-word probabilities and word/pause durations instead of
+        audio features: phoneme accuracy is the phoneme-weighted word probability
+        (per phoneme category through the CMU index), rhythm comes from the
+        spread of per-phoneme word durations and fluency from the pauses between
+        words. Component scores are mapped onto the audio path's scale with the
+        coefficients fitted by calibrate_pronunciation.py.
         
         Args:
-            word_alignments: Word alignment data with confidence scores
+            word_alignments: WordTimeline (or Whisper result) of the transcription
             transcript: Text transcription
             
         Returns:
-            Dict: Basic pronunciation analysis results
+            Dict: Pronunciation analysis results in the same shape as the audio path
         """
-        # Extract confidence scores if available
-        confidence_scores = []
-        word_durations = []
-        
-        if 'segments' in word_alignments:
-            for segment in word_alignments['segments']:
-                # Extract confidence score
-                if 'confidence' in segment:
-                    confidence_scores.append(segment['confidence'])
-                
-                # Analyze words in the segment
-                for word_info in segment.get('words', []):
-                    if 'start' in word_info and 'end' in word_info:
-                        duration = word_info['end'] - word_info['start']
-                        word_durations.append(duration)
-        
-        # Calculate phoneme accuracy from confidence scores
-        phoneme_accuracy = {}
-        if confidence_scores:
-            avg_confidence = np.mean(confidence_scores)
-            std_confidence = np.std(confidence_scores)
-            
-            # Map confidence to phoneme accuracy score
-            accuracy_score = 65 + (avg_confidence * 30)
-            accuracy_score = max(60, min(95, accuracy_score))
+        timeline = as_word_timeline(word_alignments)
+        words = [re.sub(r"[^a-z']", '', timeline.strings[t].lower()) for t in timeline.token.tolist()]
+        probabilities = timeline.probability.astype(np.float64)
+        durations = timeline.durations()
+        has_probability = ~np.isnan(probabilities)
+        
+        # Phoneme accuracy: word probabilities weighted by the phonemes of each word
+        category_counts = self.phoneme_index.word_category_counts(words)
+        phonemes_per_word = category_counts.sum(axis=1)
+        weights = np.where(has_probability, np.maximum(phonemes_per_word, 1), 0).astype(np.float64)
+        probabilities = np.nan_to_num(probabilities)
+        
+        if weights.sum() > 0:
+            mean_probability = float(np.average(probabilities, weights=weights))
             
+            # Per category: probability of the words weighted by how many of the category's phonemes they hold
+            category_weights = category_counts * has_probability[:, None]
+            category_totals = category_weights.sum(axis=0)
+            category_probability = (probabilities @ category_weights) / np.maximum(category_totals, 1)
+            category_scores = {
+                category: self._calibrated('phoneme_accuracy', 65 + category_probability[c] * 30)
+                for c, category in enumerate(self.phoneme_index.categories) if category_totals[c]
+            }
+            phoneme_score = self._calibrated('phoneme_accuracy', 65 + mean_probability * 30)
             phoneme_accuracy = {
-                'overall_score': round(accuracy_score, 1),
+                'overall_score': round(phoneme_score, 1),
                 'categories': {
-                    'general': {
-                        'count': len(confidence_scores),
-                        'score': round(accuracy_score, 1)
-                    }
+                    category: {'count': int(category_totals[c]), 'score': round(category_scores[category], 1)}
+                    for c, category in enumerate(self.phoneme_index.categories) if category_totals[c]
                 },
-                'difficult_phonemes': []
+                'difficult_phonemes': self._identify_difficult_phonemes(category_scores)
             }
         else:
-            # Default phoneme accuracy
+            mean_probability = None
             phoneme_accuracy = {
                 'overall_score': 75.0,
                 'categories': {},
                 'difficult_phonemes': []
             }
         
-        # Calculate speech rhythm score based on word durations
-        prosody = {}
-        if word_durations and len(word_durations) > 1:
-            # Calculate coefficient of variation (lower is more consistent)
-            mean_duration = np.mean(word_durations)
-            std_duration = np.std(word_durations)
-            cv = std_duration / mean_duration if mean_duration > 0 else 0
-            
-            # Calculate speech rate
-            total_duration = sum(word_durations)
-            word_count = len(word_durations)
-            speech_rate = (word_count / total_duration) * 60 if total_duration > 0 else None
-            
-            # Convert to rhythm score (lower CV = higher score)
-            rhythm_score = 90 - min(cv * 100, 30)
-            rhythm_score = max(60, min(95, rhythm_score))
+        # Rhythm: consistency of the time spent per phoneme (lower CV = higher score)
+        timed = ~np.isnan(durations) & (durations > 0)
+        rhythm_score = 80.0
+        speech_rate = None
+        if np.count_nonzero(timed) > 1:
+            per_phoneme = durations[timed] / np.maximum(phonemes_per_word[timed], 1)
+            cv = float(per_phoneme.std() / per_phoneme.mean()) if per_phoneme.mean() > 0 else 0
+            rhythm_score = self._calibrated('rhythm', 90 - min(cv * 100, 30))
             
-            # Default prosody scores with rhythm from durations
-            prosody = {
-                'overall_score': round((rhythm_score + 80 + 80) / 3, 1),  # Avg with default scores
-                'intonation_score': 80.0,  # Default
-                'rhythm_score': round(rhythm_score, 1),
-                'stress_score': 80.0,  # Default
-                'speech_rate': round(speech_rate, 1) if speech_rate else None
-            }
-        else:
-            # Default prosody scores
-            prosody = {
-                'overall_score': 80.0,
-                'intonation_score': 80.0,
-                'rhythm_score': 80.0,
-                'stress_score': 80.0,
-                'speech_rate': None
-            }
+            total_word_time = float(durations[timed].sum())
+            speech_rate = (np.count_nonzero(timed) / total_word_time) * 60 if total_word_time > 0 else None
         
-        # Default fluency and articulation scores
-        fluency = {
-            'overall_score': 80.0,
-            'pause_quality_score': 80.0,
-            'hesitation_score': 80.0,
-            'flow_score': 80.0,
-            'pause_count': None,
-            'avg_pause_duration': None
+        prosody = {
+            'overall_score': round((rhythm_score + 80 + 80) / 3, 1),  # Intonation and stress need audio
+            'intonation_score': 80.0,
+            'rhythm_score': round(rhythm_score, 1),
+            'stress_score': 80.0,
+            'speech_rate': round(speech_rate, 1) if speech_rate else None
         }
         
+        # Fluency: pauses between words and speaking rate over the whole span
+        total_duration = float(np.nanmax(timeline.end) - np.nanmin(timeline.start)) if timeline.has_times else 0
+        if total_duration > 0:
+            speaking_duration = float(np.nansum(durations))
+            pause_duration = max(0.0, total_duration - speaking_duration)
+            gaps = timeline.gaps(within_segments=True)
+            hesitations = int(np.count_nonzero(gaps >= 0.5))
+            speaking_rate = (len(timeline) / total_duration) * 60
+            articulation_rate = (len(timeline) / speaking_duration) * 60 if speaking_duration > 0 else 0
+            pause_pattern_score = self._evaluate_pause_patterns(pause_duration, total_duration)
+            rate_score = min(10, max(4, speaking_rate / 20))
+            fluency = {
+                'score': round(pause_pattern_score * 0.4 + rate_score * 0.6, 1),
+                'speaking_rate': round(speaking_rate, 1),
+                'articulation_rate': round(articulation_rate, 1),
+                'pause_pattern_score': round(pause_pattern_score, 1),
+                'details': {
+                    'total_words': len(timeline),
+                    'total_duration': round(total_duration, 2),
+                    'speaking_duration': round(speaking_duration, 2),
+                    'pause_duration': round(pause_duration, 2),
+                    'hesitation_count': hesitations
+                }
+            }
+            fluency_score = self._calibrated('fluency', fluency['score'] * 10)
+        else:
+            fluency = {'score': 7.0, 'details': {}}
+            fluency_score = 80.0
+        
+        # Articulation: share of clearly recognised words, and the consonant categories
+        if mean_probability is not None:
+            clear_share = float(np.average(probabilities >= 0.5, weights=weights))
+            clarity_score = self._calibrated('articulation', 65 + clear_share * 30)
+            consonant_scores = [phoneme_accuracy['categories'][c]['score'] for c in ('stops', 'fricatives', 'affricates')
+                                if c in phoneme_accuracy['categories']]
+            precision_score = float(np.mean(consonant_scores)) if consonant_scores else clarity_score
+        else:
+            clarity_score = precision_score = 80.0
         articulation = {
-            'overall_score': 80.0,
-            'clarity_score': 80.0,
-            'precision_score': 80.0
+            'overall_score': round((clarity_score + precision_score) / 2, 1),
+            'clarity_score': round(clarity_score, 1),
+            'precision_score': round(precision_score, 1)
         }
         
-        # Calculate overall pronunciation score
-        weights = self.config['scoring_weights']
-        overall_score = (
-            (phoneme_accuracy['overall_score'] * weights['phoneme_accuracy']) +
-            (prosody['overall_score'] * weights['prosody']) +
-            (fluency['overall_score'] * weights['fluency']) +
-            (articulation['overall_score'] * weights['articulation'])
+        overall_score = self._overall_score(
+            phoneme_accuracy['overall_score'], prosody['overall_score'], fluency_score,
+            articulation['overall_score'], transcript
         )
         
-        # Ensure score is within configured scale
-        min_score, max_score = self.config['scoring_scale']
-        overall_score = max(min_score, min(max_score, overall_score))
-        
         return {
             'pronunciation_score': round(overall_score, 1),
             'phoneme_accuracy': phoneme_accuracy,
             'prosody': prosody,
-            'fluency': fluency,
+            'fluency': {
+                'overall_score': round(fluency_score, 1),
+                'details': fluency
+            },
             'articulation': articulation,
-            'note': "Limited analysis based on confidence scores only. For more detailed analysis, provide audio file."
+            'mode': 'fast',
+            'note': "Estimated from word recognition confidence and timing; no audio features were analyzed."
         }
+    
+    def _analyze_from_confidence_scores(self, word_alignments, transcript):
+        """
+        Fallback analysis method when audio features cannot be extracted.
+        
+        Whisper reports confidence per word ('probability'), not per segment,
+        so this is the fast, transcription-based estimate.
+        """
+        return self.analyze_pronunciation_fast(word_alignments, transcript)
 
 
-def analyze_pronunciation(result, transcription, audio_file=None, domain_config=None):
+def analyze_pronunciation(result, transcription, audio_file=None, domain_config=None, mode=None):
     """
     Enhanced pronunciation analysis function that integrates with the vocabulary evaluation.
     
     Parameters:
-    result (dict): Result data from the speech recognition process
+    result (dict or WordTimeline): Result data from the speech recognition process
     transcription (str): The transcribed speech text
-    audio_file (str): Optional path to the audio file for detailed analysis
+    audio_file (str or AudioFrontend): Optional audio file (or its decoded front end) for detailed analysis
     domain_config (dict): Optional configuration for domain-specific scoring
+    mode (str): 'full', 'fast' or 'auto' (default: PRONUNCIATION_MODE, 'auto')
     
     Returns:
     dict: Pronunciation analysis results
@@ -1707,24 +1175,33 @@ def analyze_pronunciation(result, transcription, audio_file=None, domain_config=
     # Initialize the analyzer
     analyzer = PronunciationAnalyzer(config=analyzer_config)
     
-    # If audio file is provided, perform detailed analysis
-    if audio_file and os.path.exists(audio_file):
-        word_alignments = result.get('segments', []) if isinstance(result, dict) else []
-        return analyzer.analyze_pronunciation(audio_file, transcription, word_alignments)
+    # Word timings (result may already be the transcription's WordTimeline)
+    word_alignments = as_word_timeline(result)
+    
+    # If audio file is provided and the mode allows it, perform detailed analysis
+    has_audio = isinstance(audio_file, AudioFrontend) or (audio_file and os.path.exists(audio_file))
+    if has_audio and _acquire_full_pronunciation_slot(mode):
+        try:
+            return analyzer.analyze_pronunciation(audio_file, transcription, word_alignments)
+        finally:
+            _release_full_pronunciation_slot()
     
-    # Otherwise, use the confidence scores from result
-    return analyzer._analyze_from_confidence_scores(result, transcription)
+    # Otherwise, estimate from the word probabilities and timing of the transcription
+    return analyzer.analyze_pronunciation_fast(word_alignments, transcription)
 
 
-def calculate_vocabulary_evaluation(result, transcription, audio_file=None, domain_config=None):
+def calculate_vocabulary_evaluation(result, transcription, audio_file=None, domain_config=None, sentences=None,
+                                    pronunciation_mode=None):
     """
     Calculate the vocabulary evaluation scores with enhanced pronunciation analysis.
     
     Parameters:
-    result (dict): Result data from the speech recognition process
+    result (dict or WordTimeline): Result data from the speech recognition process
     transcription (str): The transcribed speech text
-    audio_file (str): Optional path to the audio file for detailed pronunciation analysis
+    audio_file (str or AudioFrontend): Optional audio file (or its decoded front end) for detailed pronunciation analysis
     domain_config (dict): Optional configuration for domain-specific scoring
+    sentences (SentenceModel): Optional sentence model of the transcription
+    pronunciation_mode (str): Optional pronunciation mode ('full', 'fast' or 'auto')
     
     Returns:
     dict: Complete vocabulary evaluation
@@ -1732,15 +1209,21 @@ def calculate_vocabulary_evaluation(result, transcription, audio_file=None, doma
     # Ensure NLTK data is downloaded
     download_nltk_data()
     
-    # Get word frequency data
-    word_percentiles = get_word_frequency_data()
+    # Get word frequency data (domain-specific percentiles when that index has been built);
+    # without an index only the word complexity details are left out
+    try:
+        word_percentiles = get_word_frequency_data(domain=(domain_config or {}).get('domain_name'))
+    except RuntimeError as e:
+        print(f"Error loading word frequency data: {e}")
+        word_percentiles = {}
     
     # Grammar and Word Selection Analysis
     try:
         grammar_analysis = analyze_grammar_and_word_selection(
             transcription, 
             word_percentiles,
-            domain_config
+            domain_config,
+            sentences
         )
         
         # Extract grammar score and ensure it exists
@@ -1770,7 +1253,8 @@ def calculate_vocabulary_evaluation(result, transcription, audio_file=None, doma
         result, 
         transcription,
         audio_file,
-        domain_config
+        domain_config,
+        pronunciation_mode
     )
     
     # Pronunciation score (50-95) -> (0-10)
@@ -1791,9 +1275,9 @@ def calculate_vocabulary_evaluation(result, transcription, audio_file=None, doma
     # Add evaluation metadata for transparency
     evaluation_metadata = {
         "evaluation_version": "3.0",
-        "corpora_used": ["brown", "webtext", "gutenberg"],
+        "corpora_used": getattr(word_percentiles, 'corpora', []),
         "domain_specific": domain_config["domain_name"] if domain_config else "general",
-        "detailed_pronunciation": audio_file is not None
+        "detailed_pronunciation": pronunciation_analysis.get("mode") == "full"
     }
     
     return {
@@ -1909,18 +1393,22 @@ DOMAIN_CONFIGS = {
 }
 
 # Function to run evaluation with full parameters for easier usage
-def evaluate_speech(result, transcription, audio_file=None, domain_type="general"):
+def evaluate_speech(result, transcription, audio_file=None, domain_type="general", sentences=None,
+                    pronunciation_mode=None):
     """
     Run a complete evaluation with simplified parameters.
     
     Parameters:
-    result (dict): Result data from the speech recognition process
+    result (dict or WordTimeline): Result data from the speech recognition process
     transcription (str): The transcribed speech text
-    audio_file (str): Optional path to the audio file for detailed pronunciation analysis
+    audio_file (str or AudioFrontend): Optional audio file (or its decoded front end) for detailed pronunciation analysis
     domain_type (str): The domain type for the evaluation (general, academic, business, technical, presentation)
+    sentences (SentenceModel): Optional sentence model of the transcription
+    pronunciation_mode (str): Optional pronunciation mode ('full', 'fast' or 'auto')
     
     Returns:
     dict: Complete evaluation results
     """
     domain_config = DOMAIN_CONFIGS.get(domain_type, DOMAIN_CONFIGS["general"])
-    return calculate_vocabulary_evaluation(result, transcription, audio_file, domain_config)
\ No newline at end of file
+    return calculate_vocabulary_evaluation(result, transcription, audio_file, domain_config, sentences,
+                                           pronunciation_mode)
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Precomputed word complexity table.
+
+The WordNet semantic component of the complexity score, the expensive one,
+is computed offline for the whole vocabulary (every word with frequency data
+plus every single-word WordNet lemma) and stored as an array; words outside
+the table are computed on demand and kept in an LRU cache. The frequency
+component is a lookup in the word frequency index passed at scoring time,
+so general and domain indexes score against their own percentiles.
+
+Build (or rebuild after the frequency data changes) with:
+
+    python -m models.word_complexity build
+"""
+import argparse
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+DEFAULT_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "word_complexity_table.npz"
+)
+
+DEFAULT_COMPLEXITY_CONFIG = {
+    'frequency_weight': 0.5,
+    'length_weight': 0.2,
+    'semantic_weight': 0.3,
+    'domain_adjustment': None
+}
+
+# Score given to tokens that are not purely alphabetic
+NON_WORD_SCORE = 1.5
+
+
+def frequency_component(word_data: Optional[Dict]) -> float:
+    """Frequency part of the complexity score (1 = common, 3 = rare)."""
+    if word_data is None:
+        # Word not found in any corpus - could be very rare, specialized, or a mistake
+        return 3.0
+
+    percentile = word_data['percentile']
+    if percentile >= 75:
+        score = 1.0
+    elif percentile >= 50:
+        score = 1.5
+    elif percentile >= 25:
+        score = 2.0
+    else:
+        score = 3.0
+
+    # A word that appears in multiple corpora is more likely to be general vocabulary
+    if len(word_data['sources']) > 2:
+        score = max(1.0, score - 0.5)
+    return score
+
+
+def semantic_component(word: str) -> float:
+    """WordNet part of the complexity score: meanings, definition length and specificity."""
+    from nltk.corpus import wordnet
+
+    synsets = wordnet.synsets(word)
+    if not synsets:
+        return 1.5
+
+    meanings_count = len(synsets)
+    definitions = [s.definition() for s in synsets]
+    avg_def_length = sum(len(d.split()) for d in definitions) / len(definitions)
+
+    hypernym_paths = [len(paths) for paths in (ss.hypernym_paths() for ss in synsets) if paths]
+    avg_hypernym_length = sum(hypernym_paths) / len(hypernym_paths) if hypernym_paths else 1
+
+    meaning_factor = min(3, meanings_count / 2)  # Words with many meanings are often foundational
+    definition_factor = min(3, avg_def_length / 8)  # Complex definitions suggest complex concepts
+    specificity_factor = min(3, avg_hypernym_length / 4)  # Deep in hierarchy = specific/technical
+
+    if meanings_count > 10:
+        return (specificity_factor * 0.7) + (definition_factor * 0.3)
+    return (meaning_factor * 0.3) + (definition_factor * 0.4) + (specificity_factor * 0.3)
+
+
+class WordComplexityTable:
+    """Array-backed complexity components with O(1) lookup and an LRU fallback."""
+
+    def __init__(self, words: np.ndarray, semantic: np.ndarray, cache_size: int = 8192):
+        """
+        Args:
+            words: Vocabulary (1D string array)
+            semantic: Semantic component per word (float32)
+            cache_size: Number of out-of-vocabulary words kept in the LRU cache
+        """
+        self.words = words
+        self.semantic = semantic
+        self.index = {word: i for i, word in enumerate(words.tolist())}
+        self._oov_semantic = lru_cache(maxsize=cache_size)(semantic_component)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TABLE_PATH):
+        data = np.load(path, allow_pickle=False)
+        return cls(data['words'], data['semantic'])
+
+    @classmethod
+    def empty(cls):
+        """Table without precomputed entries: every word goes through the LRU fallback."""
+        return cls(np.array([], dtype='U1'), np.zeros(0, np.float32))
+
+    def semantic_score(self, word: str) -> float:
+        """Semantic component for a lowercase alphabetic word."""
+        i = self.index.get(word)
+        if i is not None:
+            return float(self.semantic[i])
+        return self._oov_semantic(word)
+
+    def score_words(self, tokens: Iterable[str], word_percentiles: Optional[Dict] = None,
+                    config: Optional[Dict] = None) -> np.ndarray:
+        """
+        Complexity scores (1 = basic, 3 = advanced) for a sequence of tokens.
+
+        Args:
+            tokens: Words of a transcript
+            word_percentiles: Word frequency index the frequency component is read from
+            config: Weights and optional domain adjustments (see DEFAULT_COMPLEXITY_CONFIG)
+
+        Returns:
+            np.ndarray: One score per token
+        """
+        config = config or DEFAULT_COMPLEXITY_CONFIG
+        word_percentiles = word_percentiles if word_percentiles is not None else {}
+        tokens = [t.lower() for t in tokens]
+        scores = np.full(len(tokens), NON_WORD_SCORE, dtype=np.float64)
+
+        positions = [i for i, t in enumerate(tokens) if t.isalpha()]
+        if not positions:
+            return scores
+        words = [tokens[i] for i in positions]
+
+        frequency = np.array([frequency_component(word_percentiles.get(w)) for w in words], dtype=np.float64)
+
+        # Gather the table rows in one step; only unknown words take the fallback
+        rows = np.array([self.index.get(w, -1) for w in words], dtype=np.int64)
+        known = rows >= 0
+        semantic = np.empty(len(words), dtype=np.float64)
+        semantic[known] = self.semantic[rows[known]]
+        for j in np.flatnonzero(~known):
+            semantic[j] = self._oov_semantic(words[j])
+
+        lengths = np.array([len(w) for w in words], dtype=np.float64)
+        length = np.clip(lengths / 3.5, 1, 3)
+
+        adjustment = np.zeros(len(words), dtype=np.float64)
+        if config.get('domain_adjustment'):
+            adjustment = np.array([config['domain_adjustment'].get(w, 0) for w in words], dtype=np.float64)
+
+        combined = (frequency * config['frequency_weight'] +
+                    length * config['length_weight'] +
+                    semantic * config['semantic_weight'] +
+                    adjustment)
+        scores[positions] = np.clip(combined, 1, 3)
+        return scores
+
+    def score(self, word: str, word_percentiles: Optional[Dict] = None, config: Optional[Dict] = None) -> float:
+        return float(self.score_words([word], word_percentiles, config)[0])
+
+
+def build_table(word_percentiles: Dict, path: str = DEFAULT_TABLE_PATH) -> int:
+    """
+    Precompute the semantic component for every word with frequency data and
+    every single-word WordNet lemma, and save it to path.
+
+    Returns:
+        int: Number of words in the table
+    """
+    from nltk.corpus import wordnet
+
+    vocabulary = {w for w in word_percentiles if w.isalpha()}
+    vocabulary.update(lemma.lower() for lemma in wordnet.all_lemma_names() if lemma.isalpha())
+    words = sorted(vocabulary)
+
+    semantic = np.empty(len(words), dtype=np.float32)
+    for i, word in enumerate(words):
+        semantic[i] = semantic_component(word)
+        if (i + 1) % 10000 == 0:
+            print(f"Scored {i + 1}/{len(words)} words")
+
+    np.savez_compressed(
+        path,
+        words=np.array(words),
+        semantic=semantic,
+        created=np.array(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    print(f"Saved word complexity table with {len(words)} words to {path}")
+    return len(words)
+
+
+_table = None
+
+
+def get_complexity_table() -> WordComplexityTable:
+    """Return the shared table, loading it on first use (empty if it has not been built)."""
+    global _table
+    if _table is None:
+        if os.path.exists(DEFAULT_TABLE_PATH):
+            _table = WordComplexityTable.load(DEFAULT_TABLE_PATH)
+            print(f"Loaded word complexity table with {len(_table.index)} words")
+        else:
+            print("Word complexity table not built; scoring words on demand "
+                  "(run 'python -m models.word_complexity build')")
+            _table = WordComplexityTable.empty()
+    return _table
+
+
+def score_words(tokens: Iterable[str], word_percentiles: Optional[Dict] = None,
+                config: Optional[Dict] = None) -> np.ndarray:
+    """Score a whole transcript in one call with the shared table."""
+    return get_complexity_table().score_words(tokens, word_percentiles, config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Word complexity table")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Precompute the table for the full vocabulary")
+    build_parser.add_argument('--output', default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from models.vocabulary_evaluation import get_word_frequency_data
+        build_table(get_word_frequency_data(), args.output)
@@ -0,0 +1,223 @@
+"""
+Memory-mapped word frequency index.
+
+File layout (little endian):
+
+    magic      4 bytes   b'VLWF'
+    version    uint32
+    header_len uint32
+    header     JSON (metadata, corpus names, array offsets), padded to 8 bytes
+    words      S<width>  UTF-8 vocabulary, sorted bytewise
+    percentile float32   per word (higher = more common)
+    count      uint32    per word, occurrences across all corpora
+    sources    uint32    per word, bit i set when corpus i contains the word
+
+The file is opened with mmap, so every worker process shares the same pages
+through the OS page cache and loading costs next to nothing. Lookups are a
+binary search over the sorted vocabulary.
+"""
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+MAGIC = b'VLWF'
+FORMAT_VERSION = 3
+
+# Resolved relative to the application directory, not the working directory
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(DATA_DIR, "word_frequency_v3.bin")
+LEGACY_CACHE_PATH = os.path.join(DATA_DIR, "word_frequency_cache_v2.pkl")
+
+
+def index_path(domain: Optional[str] = None) -> str:
+    """Index file for a domain; the general index is shared by every domain without its own."""
+    if not domain or domain == 'general':
+        return DEFAULT_INDEX_PATH
+    return os.path.join(DATA_DIR, f"word_frequency_v3.{domain}.bin")
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def write_index(word_percentiles: Dict, corpora: List[str], metadata: Dict, path: str = DEFAULT_INDEX_PATH):
+    """
+    Write word frequency data in the binary index format.
+
+    Args:
+        word_percentiles: Mapping of word to {'percentile', 'count', 'sources'}
+            where 'sources' is a collection of corpus names
+        corpora: Corpus names; their order defines the source bits
+        metadata: Free-form metadata stored in the header
+        path: Output file (written atomically)
+    """
+    if len(corpora) > 32:
+        raise ValueError("At most 32 corpora fit in the source bitmask")
+    bits = {corpus: 1 << i for i, corpus in enumerate(corpora)}
+
+    encoded = sorted((word.encode('utf-8'), data) for word, data in word_percentiles.items())
+    width = max((len(w) for w, _ in encoded), default=1)
+    words = np.array([w for w, _ in encoded], dtype=f'S{width}')
+    percentile = np.array([d['percentile'] for _, d in encoded], dtype='<f4')
+    count = np.array([d['count'] for _, d in encoded], dtype='<u4')
+    sources = np.array([sum(bits.get(c, 0) for c in d['sources']) for _, d in encoded], dtype='<u4')
+
+    arrays = [('words', words), ('percentile', percentile), ('count', count), ('sources', sources)]
+    header = {
+        'version': FORMAT_VERSION,
+        'metadata': metadata,
+        'corpora': list(corpora),
+        'size': len(encoded),
+        'word_width': width,
+        'arrays': {}
+    }
+
+    # Offsets depend on the header length, which depends on the offsets; the
+    # header is padded to a fixed size so one pass is enough
+    def layout(header_size):
+        offset = _align(12 + header_size)
+        sections = {}
+        for name, array in arrays:
+            sections[name] = [offset, array.dtype.str]
+            offset = _align(offset + array.nbytes)
+        return sections
+
+    header['arrays'] = layout(0)
+    header_size = _align(len(json.dumps(header).encode('utf-8')) + 256)
+    header['arrays'] = layout(header_size)
+    header_bytes = json.dumps(header).encode('utf-8').ljust(header_size, b' ')
+
+    # A unique temporary file per writer: workers converting the legacy cache
+    # at the same time each rename their own complete file into place
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + struct.pack('<II', FORMAT_VERSION, header_size) + header_bytes)
+            for name, array in arrays:
+                f.write(b'\0' * (header['arrays'][name][0] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WordFrequencyIndex:
+    """
+    Read-only, memory-mapped word frequency data with a dict-like interface.
+
+    ``index.get(word)`` returns {'percentile', 'count', 'sources'} (sources is
+    the list of corpora containing the word) or None for unknown words.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mmap[:4]
+        version, header_size = struct.unpack('<II', self._mmap[4:12])
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} word frequency index")
+        header = json.loads(self._mmap[12:12 + header_size].decode('utf-8'))
+
+        self.metadata = header['metadata']
+        self.corpora = header['corpora']
+        self.size = header['size']
+        for name, (offset, dtype) in header['arrays'].items():
+            setattr(self, name, np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=self.size, offset=offset))
+
+    def _find(self, word: str) -> int:
+        key = word.encode('utf-8')
+        i = int(np.searchsorted(self.words, key))
+        if i < self.size and self.words[i] == key:
+            return i
+        return -1
+
+    def _sources(self, mask: int) -> List[str]:
+        return [corpus for bit, corpus in enumerate(self.corpora) if mask >> bit & 1]
+
+    def get(self, word: str, default=None) -> Optional[Dict]:
+        i = self._find(word)
+        if i < 0:
+            return default
+        return {
+            'percentile': float(self.percentile[i]),
+            'count': int(self.count[i]),
+            'sources': self._sources(int(self.sources[i]))
+        }
+
+    def __getitem__(self, word: str) -> Dict:
+        entry = self.get(word)
+        if entry is None:
+            raise KeyError(word)
+        return entry
+
+    def __contains__(self, word) -> bool:
+        return isinstance(word, str) and self._find(word) >= 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[str]:
+        for word in self.words:
+            yield word.decode('utf-8')
+
+
+def convert_legacy_cache(pickle_path: str = LEGACY_CACHE_PATH, path: str = DEFAULT_INDEX_PATH) -> bool:
+    """Convert the pickled v2 cache to the binary index. Returns False if there is nothing to convert."""
+    if not os.path.exists(pickle_path):
+        return False
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+    if not (isinstance(data, dict) and 'metadata' in data and 'word_percentiles' in data):
+        return False
+
+    metadata = data['metadata']
+    write_index(data['word_percentiles'], metadata.get('corpora_used', []), metadata, path)
+    print(f"Converted {pickle_path} to {path}")
+    return True
+
+
+_indexes = {}
+
+
+def load_word_frequency_index(path: str = DEFAULT_INDEX_PATH, reload: bool = False) -> Optional[WordFrequencyIndex]:
+    """
+    Return the memory-mapped index at path, opened once per process.
+
+    A missing general index is created from the legacy pickle when one exists.
+    Returns None when no index is available, so the caller can build one from
+    the corpora. Pass reload=True after rewriting the file.
+    """
+    if path in _indexes and not reload:
+        return _indexes[path]
+    try:
+        if not os.path.exists(path) and (path != DEFAULT_INDEX_PATH or not convert_legacy_cache(path=path)):
+            return None
+        _indexes[path] = WordFrequencyIndex(path)
+    except (OSError, ValueError) as e:
+        print(f"Word frequency index unavailable ({path}): {e}")
+        return None
+    return _indexes[path]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Word frequency index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help="Convert the legacy pickle cache")
+    convert_parser.add_argument('--input', default=LEGACY_CACHE_PATH)
+    convert_parser.add_argument('--output', default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'convert' and not convert_legacy_cache(args.input, args.output):
+        print(f"No usable legacy cache at {args.input}")
@@ -0,0 +1,112 @@
+"""
+Complete speech analyses as compressed blobs.
+
+Speech documents only keep scores and metadata. The full analysis of an
+upload (transcript, word timeline, pause events and every analyzer's
+details) is serialized as JSON, compressed and written to the blob store
+under analyses/{user_id}/{speech_id}. It is read back only when a client
+asks for the details of one speech.
+
+Blobs start with a 4-byte header (b"VLA" and the codec id). Codec 2 is
+zstandard; without the zstandard package blobs are written with zlib
+(codec 1). Either is read back whichever is installed for writing.
+"""
+import asyncio
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.pause_events import PauseEvents
+from models.word_timeline import WordTimeline
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"VLA"
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+COMPRESSION_LEVEL = 6
+
+
+def analysis_blob_name(user_id: str, speech_id: str) -> str:
+    return f"analyses/{user_id}/{speech_id}.vla"
+
+
+def _column(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    """Rounded values with NaN (unknown) as None, which JSON can represent."""
+    values = values.astype(np.float64).round(decimals)
+    return [None if v != v else v for v in values.tolist()]
+
+
+def timeline_columns(timeline: WordTimeline) -> Dict:
+    """Word timeline as parallel columns (much smaller than one object per word)."""
+    return {
+        'word': [timeline.strings[t].strip() for t in timeline.token.tolist()],
+        'start': _column(timeline.start, 3),
+        'end': _column(timeline.end, 3),
+        'probability': _column(timeline.probability, 4),
+        'segment': timeline.segment.tolist()
+    }
+
+
+def pause_columns(pauses: PauseEvents) -> Dict:
+    return {name: pauses.events[name].tolist() for name in pauses.events.dtype.names}
+
+
+def _default(value):
+    """JSON form of the NumPy and datetime values analyzers return."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, WordTimeline):
+        return timeline_columns(value)
+    if isinstance(value, PauseEvents):
+        return pause_columns(value)
+    return str(value)
+
+
+def encode_analysis(analysis: Dict) -> bytes:
+    payload = json.dumps(analysis, default=_default, separators=(',', ':')).encode('utf-8')
+    if zstandard is not None:
+        return MAGIC + bytes([CODEC_ZSTD]) + zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(payload)
+    return MAGIC + bytes([CODEC_ZLIB]) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+
+def decode_analysis(blob: bytes) -> Dict:
+    if blob[:3] != MAGIC:
+        raise ValueError("Not a speech analysis blob")
+    codec, body = blob[3], blob[4:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("The zstandard package is needed to read this analysis")
+        payload = zstandard.ZstdDecompressor().decompress(body)
+    elif codec == CODEC_ZLIB:
+        payload = zlib.decompress(body)
+    else:
+        raise ValueError(f"Unknown analysis codec {codec}")
+    return json.loads(payload)
+
+
+async def save_analysis(blob_store, user_id: str, speech_id: str, analysis: Dict) -> Dict:
+    """
+    Write the analysis of a speech to blob storage.
+
+    Returns:
+        Fields for the speech document: blob name and compressed size
+    """
+    name = analysis_blob_name(user_id, speech_id)
+    blob = encode_analysis(analysis)
+    await asyncio.to_thread(blob_store.put_bytes, name, blob)
+    return {"analysis_blob": name, "analysis_bytes": len(blob)}
+
+
+async def load_analysis(blob_store, name: str) -> Dict:
+    return decode_analysis(await asyncio.to_thread(blob_store.get_bytes, name))
@@ -0,0 +1,76 @@
+"""
+Audio uploads to blob storage off the analysis path.
+
+upload_file starts the upload as soon as the file is saved and only waits
+for it when the speech is stored, so transcription starts without waiting
+for the network. Uploads run on a small dedicated thread pool
+(STORAGE_UPLOAD_WORKERS) and failed uploads are retried with exponential
+backoff (STORAGE_UPLOAD_RETRIES). The blob store (see blob_store.py) decides
+how the bytes are sent.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+STORAGE_UPLOAD_WORKERS = int(os.getenv("STORAGE_UPLOAD_WORKERS", "4"))
+STORAGE_UPLOAD_RETRIES = int(os.getenv("STORAGE_UPLOAD_RETRIES", "3"))
+
+_executor = ThreadPoolExecutor(max_workers=STORAGE_UPLOAD_WORKERS, thread_name_prefix="storage-upload")
+
+
+def upload_audio(blob_store, local_path: str, destination: str, retries: int = STORAGE_UPLOAD_RETRIES) -> str:
+    """
+    Upload a file to blob storage and return its URL (blocking).
+
+    Args:
+        blob_store: FirebaseBlobStore or FilesystemBlobStore
+        local_path: File to upload
+        destination: Object name, e.g. audio/{user_id}/{filename}
+        retries: Attempts after the first one fails
+
+    Returns:
+        URL of the uploaded object
+    """
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            url = blob_store.upload(local_path, destination)
+            logging.info(f"Uploaded {destination} in {time.perf_counter() - start:.2f}s")
+            return url
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            logging.warning(f"Upload of {destination} failed ({e}); retrying in {delay}s")
+            time.sleep(delay)
+
+
+def start_audio_upload(blob_store, local_path: str, destination: str) -> asyncio.Future:
+    """Start upload_audio on the upload pool and return a future for the URL."""
+    return asyncio.get_running_loop().run_in_executor(_executor, upload_audio, blob_store, local_path, destination)
+
+
+async def finish_audio_upload(upload: asyncio.Future) -> Optional[str]:
+    """Wait for an upload; None (logged) if it failed after all retries."""
+    try:
+        return await upload
+    except Exception as e:
+        logging.error(f"Error uploading audio to blob storage: {e}")
+        return None
+
+
+def remove_after_upload(upload: Optional[asyncio.Future], local_path: str):
+    """Delete the local file now, or once a pending upload of it is finished."""
+    def remove(done=None):
+        if done is not None and not done.cancelled() and done.exception() is not None:
+            logging.error(f"Error uploading audio to blob storage: {done.exception()}")
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+    if upload is not None and not upload.done():
+        upload.add_done_callback(remove)
+    else:
+        remove()
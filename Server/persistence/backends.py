@@ -0,0 +1,70 @@
+"""
+Storage backend selection.
+
+STORAGE_BACKEND picks where users, speeches and uploaded audio are kept:
+
+- firestore (default): Firestore and Firebase Storage. Needs the FIREBASE_*
+  credentials, which are read on first use.
+- sqlite: a local SQLite database in WAL mode (SQLITE_PATH) and audio
+  files under BLOB_DIR, served by the app at /blobs. Runs fully offline, for
+  self-hosting and for load tests of the /upload/ pipeline with real
+  persistence costs.
+- memory: in-process store and BLOB_DIR, for benchmarks.
+"""
+import logging
+import os
+
+from persistence.audio_uploads import STORAGE_UPLOAD_WORKERS
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(SERVER_DIR, "vocallabs.db"))
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(SERVER_DIR, "blobs"))
+
+STORAGE_BACKENDS = ('firestore', 'sqlite', 'memory')
+
+_speech_stores = {}
+_blob_stores = {}
+
+
+def _backend_name(backend=None):
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected one of {', '.join(STORAGE_BACKENDS)})")
+    return backend
+
+
+def get_speech_store(backend=None):
+    """
+    Return the user and speech store, created once per process.
+
+    Args:
+        backend: 'firestore', 'sqlite' or 'memory' (defaults to STORAGE_BACKEND)
+    """
+    backend = _backend_name(backend)
+    if backend not in _speech_stores:
+        if backend == 'firestore':
+            from firebase_config import get_async_db
+            from persistence.speech_store import FirestoreSpeechStore
+            _speech_stores[backend] = FirestoreSpeechStore(get_async_db())
+        elif backend == 'sqlite':
+            from persistence.sqlite_store import SQLiteSpeechStore
+            _speech_stores[backend] = SQLiteSpeechStore(SQLITE_PATH)
+        else:
+            from persistence.speech_store import MemorySpeechStore
+            _speech_stores[backend] = MemorySpeechStore()
+        logging.info(f"Using {backend} speech store")
+    return _speech_stores[backend]
+
+
+def get_blob_store(backend=None):
+    """Return the blob store for uploaded audio, created once per process."""
+    backend = _backend_name(backend)
+    if backend not in _blob_stores:
+        from persistence.blob_store import FilesystemBlobStore, FirebaseBlobStore
+        if backend == 'firestore':
+            _blob_stores[backend] = FirebaseBlobStore(pool_size=STORAGE_UPLOAD_WORKERS)
+        else:
+            _blob_stores[backend] = FilesystemBlobStore(BLOB_DIR)
+    return _blob_stores[backend]
@@ -0,0 +1,103 @@
+"""
+Blob storage for uploaded audio and stored analyses.
+
+- FirebaseBlobStore: the app's Cloud Storage bucket. Uploaded audio is made
+  public and its URL is returned; other blobs (stored analyses) stay
+  private. The storage client is shared, and its HTTP connection pool is
+  sized to the upload workers. Files above RESUMABLE_THRESHOLD go up as
+  chunked resumable uploads, so a dropped connection resends one chunk
+  instead of the whole file.
+- FilesystemBlobStore: files under a local directory (self-hosted and
+  offline mode). The app serves only its audio/ subdirectory, at
+  /blobs/audio.
+"""
+import os
+import shutil
+import threading
+
+# Resumable upload chunks must be a multiple of 256 KB
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+RESUMABLE_THRESHOLD = int(os.getenv("STORAGE_RESUMABLE_THRESHOLD", str(RESUMABLE_CHUNK_SIZE)))
+
+
+class FirebaseBlobStore:
+    """Objects in the Firebase app's default Cloud Storage bucket."""
+
+    name = 'firebase'
+
+    def __init__(self, pool_size: int = 4):
+        """
+        Args:
+            pool_size: HTTP connections kept open to Cloud Storage
+        """
+        self.pool_size = pool_size
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        with self._lock:
+            if self._bucket is None:
+                from requests.adapters import HTTPAdapter
+                from firebase_config import get_bucket
+
+                self._bucket = get_bucket()
+                self._bucket.client._http.mount("https://", HTTPAdapter(pool_connections=self.pool_size,
+                                                                        pool_maxsize=self.pool_size))
+            return self._bucket
+
+    def upload(self, local_path: str, destination: str) -> str:
+        """Upload a file, make it public and return its URL (blocking)."""
+        resumable = os.path.getsize(local_path) > RESUMABLE_THRESHOLD
+        blob = self.bucket.blob(destination, chunk_size=RESUMABLE_CHUNK_SIZE if resumable else None)
+        blob.upload_from_filename(local_path)
+        blob.make_public()
+        return blob.public_url
+
+    def put_bytes(self, name: str, data: bytes):
+        self.bucket.blob(name).upload_from_string(data, content_type="application/octet-stream")
+
+    def get_bytes(self, name: str) -> bytes:
+        return self.bucket.blob(name).download_as_bytes()
+
+
+class FilesystemBlobStore:
+    """Files under a local directory."""
+
+    name = 'filesystem'
+
+    def __init__(self, root: str, url_prefix: str = "/blobs"):
+        """
+        Args:
+            root: Directory the blobs are stored in
+            url_prefix: Path the app serves root at
+        """
+        self.root = os.path.abspath(root)
+        self.url_prefix = url_prefix
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, destination: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, destination))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Blob name escapes the blob directory: {destination}")
+        return path
+
+    def upload(self, local_path: str, destination: str) -> str:
+        """Copy a file into the blob directory and return its URL path."""
+        path = self.path(destination)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Copy to a temporary name first so readers never see a partial file
+        shutil.copyfile(local_path, path + ".part")
+        os.replace(path + ".part", path)
+        return f"{self.url_prefix}/{destination}"
+
+    def put_bytes(self, name: str, data: bytes):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "wb") as f:
+            f.write(data)
+        os.replace(path + ".part", path)
+
+    def get_bytes(self, name: str) -> bytes:
+        with open(self.path(name), "rb") as f:
+            return f.read()
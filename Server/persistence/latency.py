@@ -0,0 +1,52 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class LatencyRecorder:
+    """Latency of the most recent calls of each persistence operation."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Calls kept per operation for the percentiles
+        """
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            if operation not in self._samples:
+                self._samples[operation] = deque(maxlen=self.window)
+                self._counts[operation] = 0
+            self._samples[operation].append(seconds * 1000)
+            self._counts[operation] += 1
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Time the enclosed block (including awaits) as one call of operation."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def stats(self):
+        """Call count and latency percentiles in milliseconds per operation."""
+        with self._lock:
+            snapshot = {op: (self._counts[op], np.array(samples)) for op, samples in self._samples.items()}
+        return {
+            op: {
+                'calls': count,
+                'mean_ms': round(float(ms.mean()), 2),
+                'p50_ms': round(float(np.percentile(ms, 50)), 2),
+                'p95_ms': round(float(np.percentile(ms, 95)), 2),
+                'max_ms': round(float(ms.max()), 2)
+            }
+            for op, (count, ms) in snapshot.items()
+        }
@@ -0,0 +1,116 @@
+"""
+Per-user progress rollups, maintained when a speech is stored.
+
+One rollup document per user holds running statistics of every score over
+all speeches, per speech type and per month:
+
+    {"count": 12,
+     "all": {metric: stats},
+     "by_speech_type": {"Prepared Speech": {metric: stats}, ...},
+     "by_month": {"2026-10": {metric: stats}, ...}}
+
+    stats = {"count", "sum", "sum_sq", "min", "max", "last": [up to ROLLUP_LAST_N values]}
+
+The stores apply add_to_rollup in the same atomic write as the speech
+itself, so the progress endpoint reads one document instead of scanning the
+user's history. Means, standard deviations and trends are derived on read.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+ROLLUP_METRICS = [
+    "overall_score",
+    "speech_development_score",
+    "vocabulary_evaluation_score",
+    "effectiveness_score",
+    "voice_analysis_score",
+    "proficiency_score"
+]
+
+# Most recent values kept per metric and group, for sparklines and trends
+ROLLUP_LAST_N = 10
+
+UNKNOWN_SPEECH_TYPE = "Unknown"
+
+
+def empty_rollup() -> Dict:
+    return {"count": 0, "all": {}, "by_speech_type": {}, "by_month": {}}
+
+
+def month_key(recorded_at: datetime) -> str:
+    return recorded_at.strftime("%Y-%m")
+
+
+def _add_value(stats: Optional[Dict], value: float) -> Dict:
+    if stats is None:
+        stats = {"count": 0, "sum": 0.0, "sum_sq": 0.0, "min": value, "max": value, "last": []}
+    stats["count"] += 1
+    stats["sum"] += value
+    stats["sum_sq"] += value * value
+    stats["min"] = min(stats["min"], value)
+    stats["max"] = max(stats["max"], value)
+    stats["last"] = (stats["last"] + [value])[-ROLLUP_LAST_N:]
+    return stats
+
+
+def add_to_rollup(rollup: Optional[Dict], speech: Dict, recorded_at: datetime) -> Dict:
+    """
+    Add one speech's scores to a rollup (updated in place).
+
+    Args:
+        rollup: Current rollup document, or None for a user's first speech
+        speech: Speech document with the ROLLUP_METRICS scores and speech_type
+        recorded_at: When the speech was stored (selects the month)
+
+    Returns:
+        The updated rollup
+    """
+    rollup = rollup or empty_rollup()
+    rollup["count"] += 1
+    groups = [
+        rollup["all"],
+        rollup["by_speech_type"].setdefault(speech.get("speech_type") or UNKNOWN_SPEECH_TYPE, {}),
+        rollup["by_month"].setdefault(month_key(recorded_at), {})
+    ]
+    for metric in ROLLUP_METRICS:
+        value = speech.get(metric)
+        if value is None:
+            continue
+        for group in groups:
+            group[metric] = _add_value(group.get(metric), float(value))
+    return rollup
+
+
+def _summarize(stats: Dict) -> Dict:
+    count = stats["count"]
+    mean = stats["sum"] / count
+    variance = max(0.0, stats["sum_sq"] / count - mean * mean)
+    last = stats["last"]
+    # Change per speech over the most recent values
+    trend = float(np.polyfit(np.arange(len(last)), last, 1)[0]) if len(last) >= 3 else None
+    return {
+        "count": count,
+        "mean": round(mean, 2),
+        "std": round(variance ** 0.5, 2),
+        "min": stats["min"],
+        "max": stats["max"],
+        "last": last,
+        "trend": round(trend, 3) if trend is not None else None
+    }
+
+
+def _summarize_group(group: Dict) -> Dict:
+    return {metric: _summarize(stats) for metric, stats in group.items()}
+
+
+def progress_summary(rollup: Optional[Dict]) -> Dict:
+    """Means, spreads and trends of every metric, overall, per speech type and per month."""
+    rollup = rollup or empty_rollup()
+    return {
+        "speech_count": rollup["count"],
+        "overall": _summarize_group(rollup["all"]),
+        "by_speech_type": {name: _summarize_group(group) for name, group in rollup["by_speech_type"].items()},
+        "by_month": {month: _summarize_group(group) for month, group in sorted(rollup["by_month"].items())}
+    }
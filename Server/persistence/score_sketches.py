@@ -0,0 +1,289 @@
+"""
+Score percentiles from mergeable streaming quantile sketches.
+
+Every stored speech adds its scores to a KLL sketch (Karnin, Lang and
+Liberty, "Optimal Quantile Approximation in Streams", 2016) per metric and
+speech type, plus one per metric over all speech types. A sketch keeps a few
+hundred of the scores it has seen, in levels where an item at level h stands
+for 2**h scores, so its size grows only with log(n / k).
+
+Error bound: with k = SKETCH_K = 200, the rank of a score is within about
++-1.7% of n with 99% confidence (for example "72nd percentile" means
+between roughly the 70th and 74th). Sketches that have seen fewer scores
+than their level 0 capacity (~k) are exact. benchmark_score_sketches.py
+measures the error against exact percentiles.
+
+Sketches are mergeable: the union of two sketches is a valid sketch of the
+union of their streams with the same bound. Each worker process writes its
+sketches as one shard (score_sketches/{shard_id}, a compressed blob of some
+tens of KB) at most every SCORE_SKETCH_FLUSH_SECONDS, and readers merge all
+shards. The merged view is rebuilt at most every SCORE_SKETCH_TTL seconds;
+a percentile lookup is then a binary search over the retained scores.
+
+A worker starts a new shard every SCORE_SKETCH_SHARD_SECONDS, so a shard
+that has not been written for longer than that (plus the flush interval) is
+final. Shards of stopped workers stay and keep counting;
+backfill_score_sketches.py compacts final shards into one, and builds a
+shard from speeches stored before sketches existed.
+"""
+import asyncio
+import base64
+import json
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from persistence.rollups import ROLLUP_METRICS
+
+SKETCH_K = 200
+# Level capacities shrink by this factor per level below the top one
+SKETCH_C = 2 / 3
+
+ALL_SPEECH_TYPES = "all"
+
+SCORE_SKETCH_FLUSH_SECONDS = float(os.getenv("SCORE_SKETCH_FLUSH_SECONDS", "30"))
+SCORE_SKETCH_TTL = float(os.getenv("SCORE_SKETCH_TTL", "60"))
+SCORE_SKETCH_SHARD_SECONDS = float(os.getenv("SCORE_SKETCH_SHARD_SECONDS", "3600"))
+
+
+class KLLSketch:
+    """KLL quantile sketch of a stream of floats."""
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels = [[]]
+        self._sorted = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(SKETCH_C ** depth * self.k)) + 1
+
+    def _retained(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_retained(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        """Compact full levels (each keeps every other sorted item, at twice the weight) until the sketch fits."""
+        while self._retained() >= self._max_retained():
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    items = sorted(self.levels[h])
+                    # An odd item out stays at this level
+                    keep = [items.pop()] if len(items) % 2 else []
+                    self.levels[h + 1].extend(items[random.getrandbits(1)::2])
+                    self.levels[h] = keep
+                    break
+
+    def update(self, value: float):
+        value = float(value)
+        self.levels[0].append(value)
+        self.n += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._sorted = None
+        if self._retained() >= self._max_retained():
+            self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """Add another sketch's stream to this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._sorted = None
+        self._compress()
+
+    def _sorted_view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retained items in order and their cumulative weights (rebuilt after changes)."""
+        if self._sorted is None:
+            items = np.concatenate([np.asarray(level, dtype=np.float64) for level in self.levels])
+            weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64)
+                                      for h, level in enumerate(self.levels)])
+            order = np.argsort(items, kind="stable")
+            self._sorted = (items[order], np.concatenate([[0], np.cumsum(weights[order])]))
+        return self._sorted
+
+    def percentile(self, value: float) -> Optional[float]:
+        """Percentage of the stream scoring below value (ties count half), in O(log retained)."""
+        if not self.n:
+            return None
+        items, cumulative = self._sorted_view()
+        below = cumulative[np.searchsorted(items, value, side="left")]
+        at_or_below = cumulative[np.searchsorted(items, value, side="right")]
+        return float(100.0 * (below + at_or_below) / (2 * cumulative[-1]))
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at fraction q (0-1) of the stream."""
+        if not self.n:
+            return None
+        items, cumulative = self._sorted_view()
+        index = np.searchsorted(cumulative[1:], q * cumulative[-1], side="left")
+        return float(items[min(index, len(items) - 1)])
+
+    def to_dict(self) -> Dict:
+        return {
+            "k": self.k, "n": self.n, "min": self.min, "max": self.max,
+            # float64, so scores read back compare equal to the same score looked up
+            "levels": [base64.b64encode(np.asarray(level, dtype=np.float64).tobytes()).decode()
+                       for level in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'KLLSketch':
+        sketch = cls(data["k"])
+        sketch.n, sketch.min, sketch.max = data["n"], data["min"], data["max"]
+        sketch.levels = [np.frombuffer(base64.b64decode(level), dtype=np.float64).tolist()
+                         for level in data["levels"]]
+        return sketch
+
+
+SketchKey = Tuple[str, str]
+
+
+def encode_sketches(sketches: Dict[SketchKey, KLLSketch]) -> bytes:
+    payload = {f"{metric}|{speech_type}": sketch.to_dict() for (metric, speech_type), sketch in sketches.items()}
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_sketches(blob: bytes) -> Dict[SketchKey, KLLSketch]:
+    payload = json.loads(zlib.decompress(blob))
+    return {tuple(key.split("|", 1)): KLLSketch.from_dict(data) for key, data in payload.items()}
+
+
+def merge_sketches(shards: Iterable[Dict[SketchKey, KLLSketch]]) -> Dict[SketchKey, KLLSketch]:
+    merged = {}
+    for sketches in shards:
+        for key, sketch in sketches.items():
+            if key not in merged:
+                merged[key] = KLLSketch(sketch.k)
+            merged[key].merge(sketch)
+    return merged
+
+
+def add_speech_scores(sketches: Dict[SketchKey, KLLSketch], speech: Dict):
+    """Add a speech's scores to the sketches of its speech type and of all types."""
+    for metric in ROLLUP_METRICS:
+        value = speech.get(metric)
+        if value is None:
+            continue
+        for speech_type in (speech.get("speech_type"), ALL_SPEECH_TYPES):
+            if speech_type:
+                sketches.setdefault((metric, speech_type), KLLSketch()).update(value)
+
+
+class ScorePercentiles:
+    """This worker's sketch shard and the merged view of all shards."""
+
+    def __init__(self, store, flush_seconds: float = SCORE_SKETCH_FLUSH_SECONDS, ttl: float = SCORE_SKETCH_TTL,
+                 shard_seconds: float = SCORE_SKETCH_SHARD_SECONDS):
+        """
+        Args:
+            store: Speech store holding the shards
+            flush_seconds: Least time between two writes of this worker's shard
+            ttl: Most time the merged view is served before the shards are read again
+            shard_seconds: Time after which the worker starts a new shard
+        """
+        self.store = store
+        self.flush_seconds = flush_seconds
+        self.ttl = ttl
+        self.shard_seconds = shard_seconds
+        self._start_shard()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._merged = None
+        self._merged_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+
+    def _start_shard(self):
+        self.shard_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.local = {}
+        self._shard_started = time.monotonic()
+
+    def record(self, speech: Dict):
+        """Add a stored speech's scores to this worker's shard."""
+        with self._lock:
+            # The current shard is fully written, so it can be left as it is
+            if not self._dirty and time.monotonic() - self._shard_started > self.shard_seconds:
+                self._start_shard()
+            add_speech_scores(self.local, speech)
+            self._dirty = True
+
+    async def flush(self, force: bool = False):
+        """Write this worker's shard if it changed and the flush interval has passed."""
+        if not self._dirty or (not force and time.monotonic() - self._last_flush < self.flush_seconds):
+            return
+        # One write at a time, so an older shard never overwrites a newer one
+        async with self._flush_lock:
+            with self._lock:
+                shard_id, blob = self.shard_id, encode_sketches(self.local)
+                self._dirty = False
+            self._last_flush = time.monotonic()
+            try:
+                await self.store.put_sketch_shard(shard_id, blob)
+            except Exception:
+                # Written again on the next flush (the shard holds every score recorded so far)
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    async def run_flusher(self):
+        """Flush the shard periodically, so scores of a worker that stops receiving uploads are still written."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Error writing score sketch shard: {str(e)}")
+
+    async def _merged_view(self) -> Dict[SketchKey, KLLSketch]:
+        async with self._refresh_lock:
+            if self._merged is None or time.monotonic() - self._merged_at > self.ttl:
+                shards = await self.store.list_sketch_shards()
+                # This worker's own shard is taken from memory, which is never behind the store
+                others = [decode_sketches(blob) for shard_id, (blob, _) in shards.items() if shard_id != self.shard_id]
+                with self._lock:
+                    others.append({key: KLLSketch.from_dict(sketch.to_dict()) for key, sketch in self.local.items()})
+                self._merged = merge_sketches(others)
+                self._merged_at = time.monotonic()
+            return self._merged
+
+    async def percentile(self, metric: str, value: float, speech_type: str = ALL_SPEECH_TYPES) -> Dict:
+        """
+        Percentile of a score among all stored speeches of a speech type.
+
+        Returns:
+            The percentile (None when no speech was scored yet) and the number of speeches it is based on
+        """
+        sketch = (await self._merged_view()).get((metric, speech_type))
+        if sketch is None:
+            return {"percentile": None, "count": 0}
+        return {"percentile": round(sketch.percentile(value), 1), "count": sketch.n}
+
+    async def speech_percentiles(self, speech: Dict) -> Dict:
+        """Percentiles of every score of a speech among speeches of its type."""
+        speech_type = speech.get("speech_type") or ALL_SPEECH_TYPES
+        return {
+            metric: (await self.percentile(metric, speech[metric], speech_type))["percentile"]
+            for metric in ROLLUP_METRICS if speech.get(metric) is not None
+        }
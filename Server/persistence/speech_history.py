@@ -0,0 +1,76 @@
+"""
+Paginated speech history of a user.
+
+Pages are newest first, and only the projected fields are read from the
+store (Firestore uses a field mask), so listings never transfer
+transcripts or analyses. Cursors are opaque strings produced by the store.
+
+Pages are cached per user for SPEECH_HISTORY_TTL seconds. upload_file
+invalidates a user's pages when it stores a speech. The cache is per
+process, so another worker may serve a page up to the TTL old.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+SCORE_FIELDS = [
+    "overall_score",
+    "speech_development_score",
+    "vocabulary_evaluation_score",
+    "effectiveness_score",
+    "voice_analysis_score",
+    "proficiency_score",
+    "recorded_at"
+]
+
+# Field sets a client can ask for
+SPEECH_PROJECTIONS = {
+    "scores": SCORE_FIELDS,
+    "summary": SCORE_FIELDS + ["topic", "speech_type", "expected_duration", "actual_duration"]
+}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SPEECH_HISTORY_TTL = float(os.getenv("SPEECH_HISTORY_TTL", "60"))
+# Users whose pages are kept
+SPEECH_HISTORY_CACHE_USERS = int(os.getenv("SPEECH_HISTORY_CACHE_USERS", "1000"))
+
+
+class SpeechHistoryCache:
+    """Per-user TTL cache of history pages, least recently used users evicted first."""
+
+    def __init__(self, ttl: float = SPEECH_HISTORY_TTL, max_users: int = SPEECH_HISTORY_CACHE_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, key: tuple) -> Optional[Dict]:
+        with self._lock:
+            pages = self._pages.get(user_id)
+            entry = pages.get(key) if pages else None
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._pages.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: str, key: tuple, page: Dict):
+        with self._lock:
+            self._pages.setdefault(user_id, {})[key] = (time.monotonic() + self.ttl, page)
+            self._pages.move_to_end(user_id)
+            while len(self._pages) > self.max_users:
+                self._pages.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._pages.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"users": len(self._pages), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,397 @@
+"""
+Async persistence of users and their speeches.
+
+Handlers await the store, so Firestore round trips no longer block the event
+loop, and independent reads of one request can run concurrently with
+asyncio.gather. All writes of a request are collected in a batch and sent as
+one atomic commit:
+
+    batch = store.batch()
+    speech_id = batch.add_speech(user_id, speech_data)
+    await batch.commit()
+
+Two stores expose the same interface:
+
+- FirestoreSpeechStore: the async Firestore client. users/{id} documents
+  have a speeches subcollection. The number of stored speeches is kept in
+  users/{id}/counters/speeches and incremented in the batch that writes the
+  speech, so numbering a speech reads one document. Counters of users
+  created before the counter existed are seeded once with an aggregation
+  count query.
+  The user's progress rollup (persistence/rollups.py) is kept in
+  users/{id}/rollups/progress. Updating it needs a read, so a batch that
+  stores a speech commits as a transaction that reads the rollup, adds the
+  speech and writes everything at once; Firestore retries it on contention.
+  Score sketch shards (persistence/score_sketches.py) are documents of the
+  top-level score_sketches collection.
+- MemorySpeechStore: in-process dicts with the same behaviour, for tests,
+  local runs and benchmarks (see benchmark_speech_store.py). It can
+  simulate a network round trip per call.
+
+Every store call is timed; store.latency.stats() reports the call count and
+latency percentiles per operation (served on /metrics/).
+"""
+import asyncio
+import copy
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from persistence.latency import LatencyRecorder
+from persistence.rollups import add_to_rollup
+
+COUNTER_COLLECTION = "counters"
+SPEECH_COUNTER_ID = "speeches"
+ROLLUP_COLLECTION = "rollups"
+PROGRESS_ROLLUP_ID = "progress"
+SKETCH_COLLECTION = "score_sketches"
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class FirestoreBatch:
+    """Writes of one request, committed together."""
+
+    def __init__(self, store: 'FirestoreSpeechStore'):
+        self.store = store
+        self.writes = []
+        # (user_id, speech) pairs to add to the users' progress rollups
+        self.rollup_updates = []
+
+    def add_user(self, data: Dict) -> str:
+        from firebase_admin import firestore
+
+        user_ref = self.store.db.collection("users").document()
+        self.writes.append((user_ref, {**data, "createdAt": firestore.SERVER_TIMESTAMP}, False))
+        return user_ref.id
+
+    def add_speech(self, user_id: str, data: Dict, speech_id: Optional[str] = None) -> str:
+        """Stage the speech (under a new id, or the given one), the increment of the user's speech counter and the update of their progress rollup."""
+        from firebase_admin import firestore
+
+        speech_ref = self.store._user_ref(user_id).collection("speeches").document(speech_id)
+        self.writes.append((speech_ref, {**data, "recorded_at": firestore.SERVER_TIMESTAMP}, False))
+        self.writes.append((self.store._counter_ref(user_id), {"count": firestore.Increment(1)}, True))
+        self.rollup_updates.append((user_id, data))
+        return speech_ref.id
+
+    async def _commit_batch(self):
+        batch = self.store.db.batch()
+        for ref, data, merge in self.writes:
+            batch.set(ref, data, merge=merge)
+        await batch.commit()
+
+    async def _commit_transaction(self):
+        from google.cloud.firestore import async_transactional
+
+        @async_transactional
+        async def apply(transaction):
+            # Runs again from the start if a rollup changed before the commit
+            rollups = {}
+            for user_id, _ in self.rollup_updates:
+                if user_id not in rollups:
+                    snapshot = await self.store._rollup_ref(user_id).get(transaction=transaction)
+                    rollups[user_id] = snapshot.to_dict()
+            now = _now()
+            for user_id, data in self.rollup_updates:
+                rollups[user_id] = add_to_rollup(rollups[user_id], data, now)
+            for ref, data, merge in self.writes:
+                transaction.set(ref, data, merge=merge)
+            for user_id, rollup in rollups.items():
+                transaction.set(self.store._rollup_ref(user_id), rollup)
+
+        await apply(self.store.db.transaction())
+
+    async def commit(self):
+        if not self.writes:
+            return
+        with self.store.latency.timed("commit"):
+            if self.rollup_updates:
+                await self._commit_transaction()
+            else:
+                await self._commit_batch()
+        self.writes, self.rollup_updates = [], []
+
+
+class FirestoreSpeechStore:
+    """Users and speeches in Firestore, through the async client."""
+
+    name = 'firestore'
+
+    def __init__(self, db):
+        """
+        Args:
+            db: google.cloud.firestore.AsyncClient (firebase_admin.firestore_async.client())
+        """
+        self.db = db
+        self.latency = LatencyRecorder()
+
+    def _user_ref(self, user_id):
+        return self.db.collection("users").document(user_id)
+
+    def _counter_ref(self, user_id):
+        return self._user_ref(user_id).collection(COUNTER_COLLECTION).document(SPEECH_COUNTER_ID)
+
+    def _rollup_ref(self, user_id):
+        return self._user_ref(user_id).collection(ROLLUP_COLLECTION).document(PROGRESS_ROLLUP_ID)
+
+    def batch(self) -> FirestoreBatch:
+        return FirestoreBatch(self)
+
+    async def get_user(self, user_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_user"):
+            snapshot = await self._user_ref(user_id).get()
+        return snapshot.to_dict()
+
+    async def find_user_by_email(self, email: str) -> Optional[Tuple[str, Dict]]:
+        with self.latency.timed("find_user_by_email"):
+            docs = await self.db.collection("users").where("email", "==", email).limit(1).get()
+        return (docs[0].id, docs[0].to_dict()) if docs else None
+
+    async def speech_count(self, user_id: str) -> int:
+        """Number of stored speeches: one counter read, or one aggregation query to seed it."""
+        with self.latency.timed("speech_count"):
+            counter = await self._counter_ref(user_id).get()
+            if counter.exists:
+                return counter.get("count")
+
+            # Aggregation queries are billed per 1000 index entries, not per document
+            results = await self._user_ref(user_id).collection("speeches").count().get()
+            count = int(results[0][0].value)
+            try:
+                # create() fails if a concurrent request seeded the counter first
+                await self._counter_ref(user_id).create({"count": count})
+            except Exception:
+                return (await self._counter_ref(user_id).get()).get("count")
+            return count
+
+    async def next_speech_number(self, user_id: str) -> int:
+        """Number of the user's next speech, for display only: concurrent uploads can get the same number."""
+        return await self.speech_count(user_id) + 1
+
+    async def get_speech(self, user_id: str, speech_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_speech"):
+            snapshot = await self._user_ref(user_id).collection("speeches").document(speech_id).get()
+        return snapshot.to_dict()
+
+    async def list_speeches(self, user_id: str, limit: int, cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a user's speeches, newest first.
+
+        Args:
+            limit: Speeches per page
+            cursor: next_cursor of the previous page (the id of its last speech)
+            fields: Fields to read (a Firestore field mask); all when None
+
+        Returns:
+            The speeches (with their id) and the cursor of the next page, or None
+        """
+        from firebase_admin import firestore
+
+        speeches = self._user_ref(user_id).collection("speeches")
+        query = speeches.order_by("recorded_at", direction=firestore.Query.DESCENDING)
+        if fields:
+            query = query.select(fields)
+        with self.latency.timed("list_speeches"):
+            if cursor:
+                last = await speeches.document(cursor).get(field_paths=["recorded_at"])
+                if not last.exists:
+                    raise ValueError("Invalid cursor")
+                query = query.start_after(last)
+            # One extra document tells whether there is a next page
+            docs = await query.limit(limit + 1).get()
+        page = [{"id": doc.id, **doc.to_dict()} for doc in docs[:limit]]
+        return page, (page[-1]["id"] if len(docs) > limit else None)
+
+    async def iter_speeches(self, user_id: str) -> AsyncIterator[Tuple[str, Dict]]:
+        async for doc in self._user_ref(user_id).collection("speeches").stream():
+            yield doc.id, doc.to_dict()
+
+    async def iter_user_ids(self) -> AsyncIterator[str]:
+        async for doc in self.db.collection("users").select([]).stream():
+            yield doc.id
+
+    async def get_rollup(self, user_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_rollup"):
+            snapshot = await self._rollup_ref(user_id).get()
+        return snapshot.to_dict()
+
+    async def put_rollup(self, user_id: str, rollup: Dict):
+        """Replace a user's progress rollup (used by backfill_rollups.py)."""
+        with self.latency.timed("put_rollup"):
+            await self._rollup_ref(user_id).set(rollup)
+
+    async def put_sketch_shard(self, shard_id: str, data: bytes, replaces: List[str] = ()):
+        """Write a score sketch shard, deleting the shards it replaces in the same commit."""
+        from firebase_admin import firestore
+
+        shards = self.db.collection(SKETCH_COLLECTION)
+        batch = self.db.batch()
+        batch.set(shards.document(shard_id), {"data": data, "updated_at": firestore.SERVER_TIMESTAMP})
+        for replaced in replaces:
+            batch.delete(shards.document(replaced))
+        with self.latency.timed("put_sketch_shard"):
+            await batch.commit()
+
+    async def list_sketch_shards(self) -> Dict[str, Tuple[bytes, datetime]]:
+        """Every score sketch shard, with the time it was last written."""
+        with self.latency.timed("list_sketch_shards"):
+            docs = await self.db.collection(SKETCH_COLLECTION).get()
+        return {doc.id: (doc.get("data"), doc.get("updated_at")) for doc in docs}
+
+
+class MemoryBatch:
+    """Writes of one request, applied together under the store's lock."""
+
+    def __init__(self, store: 'MemorySpeechStore'):
+        self.store = store
+        self.operations = []
+
+    def add_user(self, data: Dict) -> str:
+        user_id = uuid.uuid4().hex[:20]
+        self.operations.append(lambda: self.store.users.__setitem__(user_id, {**data, "createdAt": _now()}))
+        return user_id
+
+    def add_speech(self, user_id: str, data: Dict, speech_id: Optional[str] = None) -> str:
+        speech_id = speech_id or uuid.uuid4().hex[:20]
+
+        def apply():
+            speeches = self.store.speeches.setdefault(user_id, {})
+            count = self.store.counters.get(user_id, len(speeches))
+            recorded_at = _now()
+            speeches[speech_id] = {**data, "recorded_at": recorded_at}
+            self.store.counters[user_id] = count + 1
+            self.store.rollups[user_id] = add_to_rollup(self.store.rollups.get(user_id), data, recorded_at)
+
+        self.operations.append(apply)
+        return speech_id
+
+    async def commit(self):
+        if not self.operations:
+            return
+        with self.store.latency.timed("commit"):
+            await self.store._round_trip()
+            with self.store._lock:
+                for operation in self.operations:
+                    operation()
+        self.operations = []
+
+
+class MemorySpeechStore:
+    """Users and speeches in process memory, with the Firestore store's semantics."""
+
+    name = 'memory'
+
+    def __init__(self, round_trip_ms: float = 0.0):
+        """
+        Args:
+            round_trip_ms: Simulated network latency added to every call
+        """
+        self.users = {}
+        self.speeches = {}
+        self.counters = {}
+        self.rollups = {}
+        self.sketch_shards = {}
+        self.round_trip_ms = round_trip_ms
+        self.latency = LatencyRecorder()
+        self._lock = threading.Lock()
+
+    async def _round_trip(self):
+        if self.round_trip_ms:
+            await asyncio.sleep(self.round_trip_ms / 1000)
+
+    def batch(self) -> MemoryBatch:
+        return MemoryBatch(self)
+
+    async def get_user(self, user_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_user"):
+            await self._round_trip()
+            user = self.users.get(user_id)
+            return dict(user) if user is not None else None
+
+    async def find_user_by_email(self, email: str) -> Optional[Tuple[str, Dict]]:
+        with self.latency.timed("find_user_by_email"):
+            await self._round_trip()
+            for user_id, user in list(self.users.items()):
+                if user.get("email") == email:
+                    return user_id, dict(user)
+            return None
+
+    async def speech_count(self, user_id: str) -> int:
+        with self.latency.timed("speech_count"):
+            await self._round_trip()
+            with self._lock:
+                if user_id not in self.counters:
+                    self.counters[user_id] = len(self.speeches.get(user_id, {}))
+                return self.counters[user_id]
+
+    async def next_speech_number(self, user_id: str) -> int:
+        """Number of the user's next speech, for display only: concurrent uploads can get the same number."""
+        return await self.speech_count(user_id) + 1
+
+    async def get_speech(self, user_id: str, speech_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_speech"):
+            await self._round_trip()
+            speech = self.speeches.get(user_id, {}).get(speech_id)
+            return dict(speech) if speech is not None else None
+
+    async def list_speeches(self, user_id: str, limit: int, cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """One page of a user's speeches, newest first (the cursor is the id of the last speech)."""
+        with self.latency.timed("list_speeches"):
+            await self._round_trip()
+            speeches = sorted(self.speeches.get(user_id, {}).items(),
+                              key=lambda item: (item[1]["recorded_at"], item[0]), reverse=True)
+            start = 0
+            if cursor:
+                ids = [speech_id for speech_id, _ in speeches]
+                if cursor not in ids:
+                    raise ValueError("Invalid cursor")
+                start = ids.index(cursor) + 1
+            page = [
+                {"id": speech_id, **({f: data[f] for f in fields if f in data} if fields else data)}
+                for speech_id, data in speeches[start:start + limit]
+            ]
+            return page, (page[-1]["id"] if start + limit < len(speeches) else None)
+
+    async def iter_speeches(self, user_id: str) -> AsyncIterator[Tuple[str, Dict]]:
+        await self._round_trip()
+        for speech_id, data in list(self.speeches.get(user_id, {}).items()):
+            yield speech_id, dict(data)
+
+    async def iter_user_ids(self) -> AsyncIterator[str]:
+        """User ids in order, like the Firestore and SQLite stores."""
+        await self._round_trip()
+        for user_id in sorted(self.users):
+            yield user_id
+
+    async def get_rollup(self, user_id: str) -> Optional[Dict]:
+        with self.latency.timed("get_rollup"):
+            await self._round_trip()
+            with self._lock:
+                rollup = self.rollups.get(user_id)
+                return copy.deepcopy(rollup) if rollup is not None else None
+
+    async def put_rollup(self, user_id: str, rollup: Dict):
+        with self.latency.timed("put_rollup"):
+            await self._round_trip()
+            with self._lock:
+                self.rollups[user_id] = rollup
+
+    async def put_sketch_shard(self, shard_id: str, data: bytes, replaces: List[str] = ()):
+        with self.latency.timed("put_sketch_shard"):
+            await self._round_trip()
+            with self._lock:
+                self.sketch_shards[shard_id] = (data, _now())
+                for replaced in replaces:
+                    self.sketch_shards.pop(replaced, None)
+
+    async def list_sketch_shards(self) -> Dict[str, Tuple[bytes, datetime]]:
+        with self.latency.timed("list_sketch_shards"):
+            await self._round_trip()
+            with self._lock:
+                return dict(self.sketch_shards)
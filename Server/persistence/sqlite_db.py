@@ -0,0 +1,52 @@
+"""
+Shared SQLite connection handling for the local databases (the SQLite
+speech store and the transcript index).
+
+Databases run in WAL mode, so readers never wait for the writer. Every
+thread keeps its own connection in autocommit mode, and writes go through
+transaction(), whose BEGIN IMMEDIATE takes the write lock first, so what a
+transaction reads cannot change before it commits.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SQLiteDatabase:
+    """Per-thread connections to a database file."""
+
+    def __init__(self, path: str, schema: str):
+        """
+        Args:
+            path: Database file (created with the schema if missing)
+            schema: Statements creating the tables if they don't exist
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection().executescript(schema)
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """This thread's connection inside a write transaction, committed unless the block raises."""
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
@@ -0,0 +1,272 @@
+"""
+Users and speeches in a local SQLite database.
+
+The self-hosted counterpart of FirestoreSpeechStore, with the same async
+interface. The database runs in WAL mode, so readers never wait for the
+writer. Every worker thread keeps its own connection, and calls run on
+asyncio's thread pool so they don't block the event loop. Documents are
+stored as JSON next to the columns the queries filter and sort on
+(connections and transactions: persistence/sqlite_db.py). A batch is one
+transaction; BEGIN IMMEDIATE takes the write lock first, so the progress
+rollup of a stored speech is read, updated and written back without
+another writer in between.
+"""
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from persistence.latency import LatencyRecorder
+from persistence.rollups import add_to_rollup
+from persistence.sqlite_db import SQLiteDatabase
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE TABLE IF NOT EXISTS speeches (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS speeches_user ON speeches (user_id, recorded_at);
+CREATE TABLE IF NOT EXISTS counters (
+    user_id TEXT PRIMARY KEY,
+    speech_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sketch_shards (
+    id TEXT PRIMARY KEY,
+    updated_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# Speeches read per query while iterating over a user's history
+PAGE_SIZE = 500
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _document(data: str, timestamp_field: str, timestamp: str) -> Dict:
+    document = json.loads(data)
+    document[timestamp_field] = datetime.fromisoformat(timestamp)
+    return document
+
+
+class SQLiteBatch:
+    """Writes of one request, committed as one transaction."""
+
+    def __init__(self, store: 'SQLiteSpeechStore'):
+        self.store = store
+        self.statements = []
+        # (user_id, speech) pairs to add to the users' progress rollups
+        self.rollup_updates = []
+
+    def add_user(self, data: Dict) -> str:
+        user_id = uuid.uuid4().hex[:20]
+        self.statements.append((
+            "INSERT INTO users (id, email, created_at, data) VALUES (?, ?, ?, ?)",
+            (user_id, data.get("email"), _now(), json.dumps(data, default=str))
+        ))
+        return user_id
+
+    def add_speech(self, user_id: str, data: Dict, speech_id: Optional[str] = None) -> str:
+        """Stage the speech (under a new id, or the given one), the increment of the user's speech counter and the update of their progress rollup."""
+        speech_id = speech_id or uuid.uuid4().hex[:20]
+        self.statements.append((
+            "INSERT INTO speeches (id, user_id, recorded_at, data) VALUES (?, ?, ?, ?)",
+            (speech_id, user_id, _now(), json.dumps(data, default=str))
+        ))
+        # A missing counter is seeded from the speeches, which already include this one
+        self.statements.append((
+            "INSERT INTO counters (user_id, speech_count) "
+            "VALUES (?, (SELECT COUNT(*) FROM speeches WHERE user_id = ?)) "
+            "ON CONFLICT (user_id) DO UPDATE SET speech_count = speech_count + 1",
+            (user_id, user_id)
+        ))
+        self.rollup_updates.append((user_id, data))
+        return speech_id
+
+    async def commit(self):
+        if not self.statements:
+            return
+        statements, self.statements = self.statements, []
+        rollup_updates, self.rollup_updates = self.rollup_updates, []
+        with self.store.latency.timed("commit"):
+            await asyncio.to_thread(self.store._execute_transaction, statements, rollup_updates)
+
+
+class SQLiteSpeechStore:
+    """Users and speeches in a SQLite database file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file (created with the schema if missing)
+        """
+        self.path = path
+        self.latency = LatencyRecorder()
+        self.db = SQLiteDatabase(path, SCHEMA)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        return self.db.connection().execute(sql, params).fetchall()
+
+    def _execute_transaction(self, statements: List[Tuple[str, Tuple]],
+                             rollup_updates: List[Tuple[str, Dict]] = ()):
+        with self.db.transaction() as connection:
+            for sql, params in statements:
+                connection.execute(sql, params)
+            now = datetime.now(timezone.utc)
+            for user_id, data in rollup_updates:
+                row = connection.execute("SELECT data FROM rollups WHERE user_id = ?", (user_id,)).fetchone()
+                rollup = add_to_rollup(json.loads(row[0]) if row else None, data, now)
+                connection.execute("INSERT OR REPLACE INTO rollups (user_id, data) VALUES (?, ?)",
+                                   (user_id, json.dumps(rollup)))
+
+    async def _read(self, operation: str, sql: str, params: Tuple = ()) -> List[tuple]:
+        with self.latency.timed(operation):
+            return await asyncio.to_thread(self._query, sql, params)
+
+    def batch(self) -> SQLiteBatch:
+        return SQLiteBatch(self)
+
+    async def get_user(self, user_id: str) -> Optional[Dict]:
+        rows = await self._read("get_user", "SELECT data, created_at FROM users WHERE id = ?", (user_id,))
+        return _document(rows[0][0], "createdAt", rows[0][1]) if rows else None
+
+    async def find_user_by_email(self, email: str) -> Optional[Tuple[str, Dict]]:
+        rows = await self._read("find_user_by_email",
+                                "SELECT id, data, created_at FROM users WHERE email = ? LIMIT 1", (email,))
+        return (rows[0][0], _document(rows[0][1], "createdAt", rows[0][2])) if rows else None
+
+    def _speech_count(self, user_id: str) -> int:
+        rows = self._query("SELECT speech_count FROM counters WHERE user_id = ?", (user_id,))
+        if rows:
+            return rows[0][0]
+        # Seed the counter once from the (user_id, recorded_at) index
+        self._query("INSERT OR IGNORE INTO counters (user_id, speech_count) "
+                    "VALUES (?, (SELECT COUNT(*) FROM speeches WHERE user_id = ?))", (user_id, user_id))
+        return self._query("SELECT speech_count FROM counters WHERE user_id = ?", (user_id,))[0][0]
+
+    async def speech_count(self, user_id: str) -> int:
+        with self.latency.timed("speech_count"):
+            return await asyncio.to_thread(self._speech_count, user_id)
+
+    async def next_speech_number(self, user_id: str) -> int:
+        """Number of the user's next speech, for display only: concurrent uploads can get the same number."""
+        return await self.speech_count(user_id) + 1
+
+    async def get_speech(self, user_id: str, speech_id: str) -> Optional[Dict]:
+        rows = await self._read("get_speech", "SELECT data, recorded_at FROM speeches WHERE id = ? AND user_id = ?",
+                                (speech_id, user_id))
+        return _document(rows[0][0], "recorded_at", rows[0][1]) if rows else None
+
+    async def list_speeches(self, user_id: str, limit: int, cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a user's speeches, newest first.
+
+        Pages are read by keyset on the (user_id, recorded_at) index; with
+        fields, only those values are extracted from the stored documents
+        (a field a document lacks is left out, as in the other stores).
+
+        Returns:
+            The speeches (with their id) and the cursor of the next page, or None
+        """
+        after = ()
+        if cursor:
+            try:
+                after = tuple(base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1))
+            except Exception:
+                raise ValueError("Invalid cursor")
+            if len(after) != 2:
+                raise ValueError("Invalid cursor")
+
+        fields = [f for f in fields if f != "recorded_at"] if fields else None
+        columns = ", ".join(f"json_extract(data, '$.{f}')" for f in fields) if fields else "data"
+        rows = await self._read(
+            "list_speeches",
+            f"SELECT id, recorded_at, {columns} FROM speeches WHERE user_id = ? "
+            + ("AND (recorded_at, id) < (?, ?) " if after else "")
+            + "ORDER BY recorded_at DESC, id DESC LIMIT ?",
+            (user_id, *after, limit + 1)
+        )
+
+        page = []
+        for row in rows[:limit]:
+            if fields:
+                # json_extract gives NULL for a missing field
+                speech = {f: value for f, value in zip(fields, row[2:]) if value is not None}
+            else:
+                speech = json.loads(row[2])
+            speech["recorded_at"] = datetime.fromisoformat(row[1])
+            page.append({"id": row[0], **speech})
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = base64.urlsafe_b64encode(f"{last[1]}|{last[0]}".encode()).decode()
+        return page, next_cursor
+
+    async def iter_speeches(self, user_id: str) -> AsyncIterator[Tuple[str, Dict]]:
+        after = ("", "")
+        while True:
+            rows = await self._read(
+                "iter_speeches",
+                "SELECT id, data, recorded_at FROM speeches WHERE user_id = ? AND (recorded_at, id) > (?, ?) "
+                "ORDER BY recorded_at, id LIMIT ?",
+                (user_id, after[0], after[1], PAGE_SIZE)
+            )
+            for speech_id, data, recorded_at in rows:
+                yield speech_id, _document(data, "recorded_at", recorded_at)
+            if len(rows) < PAGE_SIZE:
+                return
+            after = (rows[-1][2], rows[-1][0])
+
+    async def iter_user_ids(self) -> AsyncIterator[str]:
+        after = ""
+        while True:
+            rows = await self._read("iter_user_ids", "SELECT id FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                                    (after, PAGE_SIZE))
+            for (user_id,) in rows:
+                yield user_id
+            if len(rows) < PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    async def get_rollup(self, user_id: str) -> Optional[Dict]:
+        rows = await self._read("get_rollup", "SELECT data FROM rollups WHERE user_id = ?", (user_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def put_rollup(self, user_id: str, rollup: Dict):
+        with self.latency.timed("put_rollup"):
+            await asyncio.to_thread(self._execute_transaction, [
+                ("INSERT OR REPLACE INTO rollups (user_id, data) VALUES (?, ?)", (user_id, json.dumps(rollup)))
+            ])
+
+    async def put_sketch_shard(self, shard_id: str, data: bytes, replaces: List[str] = ()):
+        """Write a score sketch shard, deleting the shards it replaces in the same transaction."""
+        statements = [("INSERT OR REPLACE INTO sketch_shards (id, updated_at, data) VALUES (?, ?, ?)",
+                       (shard_id, _now(), data))]
+        statements += [("DELETE FROM sketch_shards WHERE id = ?", (replaced,)) for replaced in replaces]
+        with self.latency.timed("put_sketch_shard"):
+            await asyncio.to_thread(self._execute_transaction, statements)
+
+    async def list_sketch_shards(self) -> Dict[str, Tuple[bytes, datetime]]:
+        """Every score sketch shard, with the time it was last written."""
+        rows = await self._read("list_sketch_shards", "SELECT id, data, updated_at FROM sketch_shards")
+        return {shard_id: (bytes(data), datetime.fromisoformat(updated_at)) for shard_id, data, updated_at in rows}
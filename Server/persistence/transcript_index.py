@@ -0,0 +1,262 @@
+"""
+Full-text search over stored transcripts.
+
+A local SQLite database (TRANSCRIPT_INDEX_PATH) holds an FTS5 inverted index
+of every stored speech's transcript, whichever STORAGE_BACKEND keeps the
+speeches. upload_file adds each speech after storing it. The transcripts
+table is the index's external content: the words of the Whisper word
+timeline, their start and end times, and the user and club the speech
+belongs to. The user and club ids are indexed columns too, so a query
+scoped to one user or one club is answered from the inverted index
+instead of filtering every matching speech.
+
+Queries are phrases, and hits come newest first by recording time (no
+relevance ranking pass over every match of a common phrase). Each hit comes
+with an FTS5 snippet and the start and end time of every occurrence of the
+phrase, found by matching the phrase's tokens against the speech's words
+(tokenized like FTS5's unicode61). benchmark_transcript_search.py measures
+query latency over a synthetic index.
+
+Rebuild the index from the speech store (speeches stored before the index
+existed, or after losing the file):
+    python -m persistence.transcript_index rebuild [--backend firestore|sqlite|memory]
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from persistence.latency import LatencyRecorder
+from persistence.sqlite_db import SQLiteDatabase
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSCRIPT_INDEX_PATH = os.getenv("TRANSCRIPT_INDEX_PATH", os.path.join(SERVER_DIR, "transcript_index.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    speech_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    club_id TEXT,
+    recorded_at TEXT NOT NULL,
+    topic TEXT,
+    text TEXT NOT NULL,
+    starts BLOB NOT NULL,
+    ends BLOB NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+    text, user_id, club_id,
+    content='transcripts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Words of the snippet around the first match
+SNIPPET_WORDS = 16
+# Occurrences with timestamps returned per speech
+MAX_OCCURRENCES = 10
+
+# Bracketed markers ("[1.2 second pause]") in transcripts without a word timeline
+MARKER_PATTERN = re.compile(r"\[[^\]]*\]")
+# Letters and digits; everything else (underscores too) separates tokens, as in unicode61
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercased text without diacritics (canonical decomposition never adds spaces)."""
+    text = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c)) if not text.isascii() else text
+
+
+def tokens(text: str) -> List[str]:
+    """Tokens like those of FTS5's unicode61 tokenizer."""
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def _match_string(value: str) -> str:
+    """An FTS5 phrase (double quotes escaped by doubling)."""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def find_phrase(text: str, phrase: List[str]) -> List[tuple]:
+    """(first word, last word) index pairs of the phrase's occurrences in a space separated text."""
+    # Normalizing keeps the spaces, so a match's word is the number of spaces before it
+    normalized = normalize(text)
+    pattern = re.compile(r"(?<![^\W_])" + r"[\W_]+".join(map(re.escape, phrase)) + r"(?![^\W_])")
+    occurrences = []
+    for match in pattern.finditer(normalized):
+        occurrences.append((normalized.count(" ", 0, match.start()), normalized.count(" ", 0, match.end() - 1)))
+        if len(occurrences) == MAX_OCCURRENCES:
+            break
+    return occurrences
+
+
+def _seconds(value: float) -> Optional[float]:
+    return None if value != value else round(float(value), 2)
+
+
+class TranscriptIndex:
+    """FTS5 index of transcripts with their word timings."""
+
+    def __init__(self, path: str = TRANSCRIPT_INDEX_PATH):
+        """
+        Args:
+            path: Database file (created with the schema if missing)
+        """
+        self.path = path
+        self.latency = LatencyRecorder()
+        self.db = SQLiteDatabase(path, SCHEMA)
+
+    def _add(self, speech_id, user_id, club_id, recorded_at, topic, words, starts, ends) -> bool:
+        # Words are stored space separated, so one must not contain spaces
+        text = " ".join("".join(word.split()) for word in words)
+        with self.db.transaction() as connection:
+            # Ignored if the speech is already indexed
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO transcripts (speech_id, user_id, club_id, recorded_at, topic, text, starts, ends) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (speech_id, user_id, club_id, recorded_at, topic, text,
+                 np.asarray(starts, dtype=np.float32).tobytes(), np.asarray(ends, dtype=np.float32).tobytes())
+            )
+            if cursor.rowcount:
+                connection.execute("INSERT INTO transcript_fts (rowid, text, user_id, club_id) VALUES (?, ?, ?, ?)",
+                                   (cursor.lastrowid, text, user_id, club_id))
+        return bool(cursor.rowcount)
+
+    async def add_speech(self, speech_id: str, user_id: str, word_timeline: Dict, club_id: Optional[str] = None,
+                         recorded_at: Optional[datetime] = None, topic: Optional[str] = None) -> bool:
+        """
+        Index a stored speech (a speech already in the index is left as it is).
+
+        Args:
+            word_timeline: Timeline columns ('word', 'start', 'end'), as stored in analysis blobs
+            club_id: Club of the speaker, if they belong to one
+
+        Returns:
+            True if the speech was added
+        """
+        recorded_at = (recorded_at or datetime.now(timezone.utc)).isoformat()
+        starts = [np.nan if s is None else s for s in word_timeline['start']]
+        ends = [np.nan if e is None else e for e in word_timeline['end']]
+        with self.latency.timed("add_speech"):
+            return await asyncio.to_thread(self._add, speech_id, user_id, club_id, recorded_at, topic,
+                                           word_timeline['word'], starts, ends)
+
+    def _search(self, phrase: str, user_id: Optional[str], club_id: Optional[str], limit: int) -> List[Dict]:
+        query_tokens = tokens(phrase)
+        if not query_tokens:
+            return []
+        match = f"text : {_match_string(' '.join(query_tokens))}"
+        conditions, params = [], []
+        if user_id:
+            match += f" AND user_id : {_match_string(user_id)}"
+            conditions.append("AND t.user_id = ?")
+            params.append(user_id)
+        if club_id:
+            match += f" AND club_id : {_match_string(club_id)}"
+            conditions.append("AND t.club_id = ?")
+            params.append(club_id)
+
+        # The page is picked first, so snippets are only made for its hits, not every match
+        page = ("SELECT t.id FROM transcript_fts JOIN transcripts t ON t.id = transcript_fts.rowid "
+                f"WHERE transcript_fts MATCH ? {' '.join(conditions)} ORDER BY t.recorded_at DESC, t.id DESC LIMIT ?")
+        rows = self.db.connection().execute(
+            "SELECT t.speech_id, t.user_id, t.club_id, t.recorded_at, t.topic, t.text, t.starts, t.ends, "
+            f"snippet(transcript_fts, 0, '[', ']', '...', {SNIPPET_WORDS}) "
+            "FROM transcript_fts JOIN transcripts t ON t.id = transcript_fts.rowid "
+            f"WHERE transcript_fts MATCH ? AND transcript_fts.rowid IN ({page}) ORDER BY t.recorded_at DESC, t.id DESC",
+            (match, match, *params, limit)
+        ).fetchall()
+
+        results = []
+        for speech_id, user, club, recorded_at, topic, text, starts, ends, snippet in rows:
+            words = text.split(" ")
+            starts = np.frombuffer(starts, dtype=np.float32)
+            ends = np.frombuffer(ends, dtype=np.float32)
+            results.append({
+                "speech_id": speech_id,
+                "user_id": user,
+                "club_id": club,
+                "recorded_at": recorded_at,
+                "topic": topic,
+                "snippet": snippet,
+                "occurrences": [
+                    {"start": _seconds(starts[first]), "end": _seconds(ends[last]),
+                     "text": " ".join(words[first:last + 1])}
+                    for first, last in find_phrase(text, query_tokens)
+                ]
+            })
+        return results
+
+    async def search(self, phrase: str, user_id: Optional[str] = None, club_id: Optional[str] = None,
+                     limit: int = 20) -> Dict:
+        """
+        Speeches containing a phrase, most recently recorded first.
+
+        Args:
+            phrase: Words to find, in order (punctuation and case are ignored)
+            user_id: Only this user's speeches
+            club_id: Only speeches of this club's members
+
+        Returns:
+            The hits (with snippet and timed occurrences) and the query time
+        """
+        start = time.perf_counter()
+        with self.latency.timed("search"):
+            results = await asyncio.to_thread(self._search, phrase, user_id, club_id, limit)
+        return {"results": results, "took_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def stats(self) -> Dict:
+        speeches = self.db.connection().execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        return {"speeches": speeches, **self.latency.stats()}
+
+
+def transcript_words(transcription: str) -> Dict:
+    """Timeline columns of a transcript without word timings (speeches stored before timelines were kept)."""
+    words = MARKER_PATTERN.sub(" ", transcription or "").split()
+    return {'word': words, 'start': [None] * len(words), 'end': [None] * len(words)}
+
+
+async def rebuild(index: TranscriptIndex, backend: Optional[str] = None):
+    """Add every stored speech to the index (already indexed speeches are skipped)."""
+    from persistence.analysis_blobs import load_analysis
+    from persistence.backends import get_blob_store, get_speech_store
+
+    store = get_speech_store(backend)
+    blob_store = get_blob_store(backend)
+    added = 0
+    async for user_id in store.iter_user_ids():
+        user = await store.get_user(user_id) or {}
+        async for speech_id, speech in store.iter_speeches(user_id):
+            if speech.get("analysis_blob"):
+                analysis = await load_analysis(blob_store, speech["analysis_blob"])
+                timeline = analysis.get("word_timeline") or transcript_words(analysis.get("transcription"))
+            else:
+                timeline = transcript_words(speech.get("transcription"))
+            added += await index.add_speech(speech_id, user_id, timeline, club_id=user.get("club_id"),
+                                            recorded_at=speech.get("recorded_at"), topic=speech.get("topic"))
+    print(f"Indexed {added} speeches")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from persistence.backends import STORAGE_BACKENDS
+
+    load_dotenv(dotenv_path=os.path.join(SERVER_DIR, "../.env"))
+
+    parser = argparse.ArgumentParser(description="Transcript search index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help="Index every stored speech")
+    rebuild_parser.add_argument('--backend', choices=STORAGE_BACKENDS, default=None)
+    rebuild_parser.add_argument('--path', default=TRANSCRIPT_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        asyncio.run(rebuild(TranscriptIndex(args.path), args.backend))